@@ -73,7 +73,10 @@ def run_migrations_online():
 
     with connectable.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection, target_metadata=target_metadata,
+            # Some migrations commit in batches (autocommit_block), so each
+            # revision runs in a transaction of its own
+            transaction_per_migration=True
         )
 
         with context.begin_transaction():
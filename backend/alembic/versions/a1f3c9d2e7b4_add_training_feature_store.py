@@ -0,0 +1,23 @@
+"""add_training_feature_store
+
+Revision ID: a1f3c9d2e7b4
+Revises: xxxx
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic
+revision = 'a1f3c9d2e7b4'
+down_revision = 'xxxx'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.add_column('ml_training_data', sa.Column('feature_vector', sa.LargeBinary(), nullable=True))
+    op.add_column('ml_training_data', sa.Column('feature_version', sa.Integer(), nullable=True))
+
+def downgrade():
+    op.drop_column('ml_training_data', 'feature_version')
+    op.drop_column('ml_training_data', 'feature_vector')
@@ -0,0 +1,73 @@
+"""add_message_search
+
+Revision ID: a4d9e2f7c1b8
+Revises: f2a8c5e1d7b3
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic
+revision = 'a4d9e2f7c1b8'
+down_revision = 'f2a8c5e1d7b3'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.add_column('messages', sa.Column('search_vector', postgresql.TSVECTOR(), nullable=True))
+        op.execute(
+            "CREATE OR REPLACE FUNCTION messages_search_vector_update() RETURNS trigger AS $$ "
+            "BEGIN "
+            "NEW.search_vector := to_tsvector('simple', coalesce(NEW.message_text, '')); "
+            "RETURN NEW; "
+            "END; "
+            "$$ LANGUAGE plpgsql"
+        )
+        op.execute(
+            "CREATE TRIGGER messages_search_vector_trigger "
+            "BEFORE INSERT OR UPDATE OF message_text ON messages "
+            "FOR EACH ROW EXECUTE PROCEDURE messages_search_vector_update()"
+        )
+        op.execute("UPDATE messages SET search_vector = to_tsvector('simple', coalesce(message_text, ''))")
+        op.create_index('ix_messages_search_vector', 'messages', ['search_vector'], postgresql_using='gin')
+    elif dialect == 'sqlite':
+        # Same table and triggers as database_optimizations.sql, created if missing
+        op.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS message_fts USING fts5("
+            "message_text, content='messages', content_rowid='id')"
+        )
+        op.execute(
+            "CREATE TRIGGER IF NOT EXISTS messages_ai AFTER INSERT ON messages BEGIN "
+            "INSERT INTO message_fts(rowid, message_text) VALUES (new.id, new.message_text); "
+            "END"
+        )
+        op.execute(
+            "CREATE TRIGGER IF NOT EXISTS messages_ad AFTER DELETE ON messages BEGIN "
+            "INSERT INTO message_fts(message_fts, rowid, message_text) VALUES ('delete', old.id, old.message_text); "
+            "END"
+        )
+        op.execute(
+            "CREATE TRIGGER IF NOT EXISTS messages_au AFTER UPDATE OF message_text ON messages BEGIN "
+            "INSERT INTO message_fts(message_fts, rowid, message_text) VALUES ('delete', old.id, old.message_text); "
+            "INSERT INTO message_fts(rowid, message_text) VALUES (new.id, new.message_text); "
+            "END"
+        )
+        # Index the messages stored so far
+        op.execute("INSERT INTO message_fts(message_fts) VALUES ('rebuild')")
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.drop_index('ix_messages_search_vector', table_name='messages')
+        op.execute("DROP TRIGGER IF EXISTS messages_search_vector_trigger ON messages")
+        op.execute("DROP FUNCTION IF EXISTS messages_search_vector_update()")
+        op.drop_column('messages', 'search_vector')
+    elif dialect == 'sqlite':
+        op.execute("DROP TRIGGER IF EXISTS messages_au")
+        op.execute("DROP TRIGGER IF EXISTS messages_ad")
+        op.execute("DROP TRIGGER IF EXISTS messages_ai")
+        op.execute("DROP TABLE IF EXISTS message_fts")
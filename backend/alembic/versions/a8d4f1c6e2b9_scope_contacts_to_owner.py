@@ -0,0 +1,53 @@
+"""scope_contacts_to_owner
+
+Revision ID: a8d4f1c6e2b9
+Revises: f5b2d8a4c7e3
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic
+revision = 'a8d4f1c6e2b9'
+down_revision = 'f5b2d8a4c7e3'
+branch_labels = None
+depends_on = None
+
+# Names an unnamed UNIQUE (telegram_id), as SQLite reflects it, so batch mode can drop it
+NAMING_CONVENTION = {'uq': 'uq_%(table_name)s_%(column_0_name)s'}
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    constraints = inspector.get_unique_constraints('contacts')
+    indexes = inspector.get_indexes('contacts')
+
+    # A peer is a contact of every account talking to it; contacts are unique
+    # per owner instead of globally. Databases created from app.db.models have
+    # a unique constraint on telegram_id, ones from app.models a unique index
+    with op.batch_alter_table('contacts', naming_convention=NAMING_CONVENTION) as batch_op:
+        for constraint in constraints:
+            if constraint['column_names'] == ['telegram_id']:
+                batch_op.drop_constraint(constraint['name'] or 'uq_contacts_telegram_id', type_='unique')
+        if 'uq_contacts_user_id_telegram_id' not in {constraint['name'] for constraint in constraints}:
+            batch_op.create_unique_constraint('uq_contacts_user_id_telegram_id', ['user_id', 'telegram_id'])
+    for index in indexes:
+        # PostgreSQL also lists the index backing the constraint dropped above
+        if (
+            index['unique'] and index['column_names'] == ['telegram_id']
+            and index['name'] != 'uq_contacts_ownerless_telegram_id' and 'duplicates_constraint' not in index
+        ):
+            op.drop_index(index['name'], table_name='contacts')
+    # NULL owners never conflict in the constraint above
+    if 'uq_contacts_ownerless_telegram_id' not in {index['name'] for index in indexes}:
+        op.create_index(
+            'uq_contacts_ownerless_telegram_id', 'contacts', ['telegram_id'],
+            unique=True, postgresql_where=sa.text('user_id IS NULL'), sqlite_where=sa.text('user_id IS NULL')
+        )
+
+def downgrade():
+    # Fails if two owners have a contact for the same peer
+    op.drop_index('uq_contacts_ownerless_telegram_id', table_name='contacts')
+    with op.batch_alter_table('contacts') as batch_op:
+        batch_op.drop_constraint('uq_contacts_user_id_telegram_id', type_='unique')
+        batch_op.create_unique_constraint('uq_contacts_telegram_id', ['telegram_id'])
@@ -0,0 +1,35 @@
+"""add_ai_categorization_cache
+
+Revision ID: b7e2d4a9c1f0
+Revises: a1f3c9d2e7b4
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic
+revision = 'b7e2d4a9c1f0'
+down_revision = 'a1f3c9d2e7b4'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        'ai_categorization_cache',
+        sa.Column('key', sa.String(length=255), nullable=False),
+        sa.Column('prompt_version', sa.String(length=32), nullable=False),
+        sa.Column('category', sa.String(length=50), nullable=False),
+        sa.Column('confidence', sa.Float(), nullable=False),
+        sa.Column('reasoning', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=True),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('key')
+    )
+    op.create_index(op.f('ix_ai_categorization_cache_prompt_version'), 'ai_categorization_cache', ['prompt_version'], unique=False)
+    op.create_index(op.f('ix_ai_categorization_cache_expires_at'), 'ai_categorization_cache', ['expires_at'], unique=False)
+
+def downgrade():
+    op.drop_index(op.f('ix_ai_categorization_cache_expires_at'), table_name='ai_categorization_cache')
+    op.drop_index(op.f('ix_ai_categorization_cache_prompt_version'), table_name='ai_categorization_cache')
+    op.drop_table('ai_categorization_cache')
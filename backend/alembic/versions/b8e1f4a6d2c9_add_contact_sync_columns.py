@@ -0,0 +1,27 @@
+"""add_contact_sync_columns
+
+Revision ID: b8e1f4a6d2c9
+Revises: a4d9e2f7c1b8
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic
+revision = 'b8e1f4a6d2c9'
+down_revision = 'a4d9e2f7c1b8'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Databases created from app.models already have last_message_time
+    existing = {column['name'] for column in sa.inspect(op.get_bind()).get_columns('contacts')}
+    with op.batch_alter_table('contacts') as batch_op:
+        if 'last_message_time' not in existing:
+            batch_op.add_column(sa.Column('last_message_time', sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column('sync_hash', sa.String(length=32), nullable=True))
+
+def downgrade():
+    with op.batch_alter_table('contacts') as batch_op:
+        batch_op.drop_column('sync_hash')
@@ -0,0 +1,21 @@
+"""add_message_ai_tier
+
+Revision ID: c3d8f1e6a2b5
+Revises: b7e2d4a9c1f0
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic
+revision = 'c3d8f1e6a2b5'
+down_revision = 'b7e2d4a9c1f0'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.add_column('messages', sa.Column('ai_tier', sa.String(length=16), nullable=True))
+
+def downgrade():
+    op.drop_column('messages', 'ai_tier')
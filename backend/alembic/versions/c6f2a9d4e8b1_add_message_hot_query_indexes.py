@@ -0,0 +1,58 @@
+"""add_message_hot_query_indexes
+
+Revision ID: c6f2a9d4e8b1
+Revises: b8e1f4a6d2c9
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic
+revision = 'c6f2a9d4e8b1'
+down_revision = 'b8e1f4a6d2c9'
+branch_labels = None
+depends_on = None
+
+def _unresponded():
+    # Matches how SQLAlchemy renders ``is_responded == False`` on each dialect,
+    # so the planner can prove a query implies the index predicate
+    if op.get_bind().dialect.name == 'postgresql':
+        return sa.text('is_responded = false')
+    return sa.text('is_responded = 0')
+
+def upgrade():
+    columns = {column['name'] for column in sa.inspect(op.get_bind()).get_columns('messages')}
+
+    # Unresponded messages are a small, hot slice; a partial index stays small
+    op.drop_index('ix_messages_is_responded_timestamp_id', table_name='messages')
+    op.create_index(
+        'ix_messages_unresponded_timestamp_id', 'messages', ['timestamp', 'id'],
+        postgresql_where=_unresponded(), sqlite_where=_unresponded()
+    )
+
+    # Per-user listings, on databases whose messages are owned by users (app.models)
+    if 'user_id' in columns:
+        op.create_index(
+            'ix_messages_user_id_timestamp_id', 'messages', ['user_id', 'timestamp', 'id'],
+            # Lets filtered counts and listings be answered from the index on Postgres
+            postgresql_include=['is_responded', 'category']
+        )
+        op.create_index(
+            'ix_messages_user_id_unresponded_timestamp_id', 'messages', ['user_id', 'timestamp', 'id'],
+            postgresql_where=_unresponded(), sqlite_where=_unresponded()
+        )
+    if 'user_id' in columns and 'contact_id' in columns:
+        op.create_index(
+            'ix_messages_user_id_contact_id_timestamp_id', 'messages', ['user_id', 'contact_id', 'timestamp', 'id']
+        )
+
+def downgrade():
+    columns = {column['name'] for column in sa.inspect(op.get_bind()).get_columns('messages')}
+    if 'user_id' in columns and 'contact_id' in columns:
+        op.drop_index('ix_messages_user_id_contact_id_timestamp_id', table_name='messages')
+    if 'user_id' in columns:
+        op.drop_index('ix_messages_user_id_unresponded_timestamp_id', table_name='messages')
+        op.drop_index('ix_messages_user_id_timestamp_id', table_name='messages')
+    op.drop_index('ix_messages_unresponded_timestamp_id', table_name='messages')
+    op.create_index('ix_messages_is_responded_timestamp_id', 'messages', ['is_responded', 'timestamp', 'id'])
@@ -0,0 +1,56 @@
+"""add_message_chat_unique_constraint
+
+Revision ID: d5a7e3b9f2c8
+Revises: c3d8f1e6a2b5
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic
+revision = 'd5a7e3b9f2c8'
+down_revision = 'c3d8f1e6a2b5'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    columns = {column['name'] for column in sa.inspect(op.get_bind()).get_columns('messages')}
+
+    if 'user_id' in columns:
+        # Messages are owned by users (app.models); private chats are keyed by
+        # the peer, so only copies stored for the same owner are duplicates.
+        # The owner-scoped constraints of f5b2d8a4c7e3 are created right away.
+        op.execute(
+            "DELETE FROM messages WHERE id NOT IN "
+            "(SELECT MIN(id) FROM messages GROUP BY user_id, chat_id, telegram_message_id)"
+        )
+        with op.batch_alter_table('messages') as batch_op:
+            batch_op.create_unique_constraint(
+                'uq_messages_user_id_chat_id_telegram_message_id', ['user_id', 'chat_id', 'telegram_message_id']
+            )
+        op.create_index(
+            'uq_messages_ownerless_chat_id_telegram_message_id', 'messages', ['chat_id', 'telegram_message_id'],
+            unique=True, postgresql_where=sa.text('user_id IS NULL'), sqlite_where=sa.text('user_id IS NULL')
+        )
+        return
+
+    # Keep the first copy of any message stored more than once
+    op.execute(
+        "DELETE FROM messages WHERE id NOT IN "
+        "(SELECT MIN(id) FROM messages GROUP BY chat_id, telegram_message_id)"
+    )
+    with op.batch_alter_table('messages') as batch_op:
+        batch_op.create_unique_constraint(
+            'uq_messages_chat_id_telegram_message_id', ['chat_id', 'telegram_message_id']
+        )
+
+def downgrade():
+    inspector = sa.inspect(op.get_bind())
+    constraints = {constraint['name'] for constraint in inspector.get_unique_constraints('messages')}
+    if 'uq_messages_ownerless_chat_id_telegram_message_id' in {index['name'] for index in inspector.get_indexes('messages')}:
+        op.drop_index('uq_messages_ownerless_chat_id_telegram_message_id', table_name='messages')
+    with op.batch_alter_table('messages') as batch_op:
+        for name in ('uq_messages_chat_id_telegram_message_id', 'uq_messages_user_id_chat_id_telegram_message_id'):
+            if name in constraints:
+                batch_op.drop_constraint(name, type_='unique')
@@ -0,0 +1,216 @@
+"""unify_message_contact_schema
+
+Revision ID: d9b3e7a1c5f4
+Revises: c6f2a9d4e8b1
+Create Date: 2026-10-17
+
+"""
+from contextlib import contextmanager
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic
+revision = 'd9b3e7a1c5f4'
+down_revision = 'c6f2a9d4e8b1'
+branch_labels = None
+depends_on = None
+
+# Rows updated per statement by the data migration; each batch commits on its own
+BATCH_SIZE = 5000
+
+def _new_columns():
+    """Columns app.models had and app.db.models lacked; all nullable, so adding them doesn't rewrite the table."""
+    # SQLite can't add a column with a non-constant default
+    created_at = {'server_default': sa.func.now()} if op.get_bind().dialect.name == 'postgresql' else {}
+    return {
+        'messages': [
+            sa.Column('user_id', sa.Integer(), nullable=True),
+            sa.Column('contact_id', sa.Integer(), nullable=True),
+            sa.Column('is_from_user', sa.Boolean(), nullable=True),
+            sa.Column('response_text', sa.Text(), nullable=True),
+            sa.Column('response_timestamp', sa.DateTime(), nullable=True),
+            sa.Column('ai_category', sa.String(), nullable=True),
+            sa.Column('ai_confidence', sa.Float(), nullable=True),
+            sa.Column('ai_reasoning', sa.Text(), nullable=True),
+            sa.Column('ai_categorized_at', sa.DateTime(), nullable=True),
+            sa.Column('ai_tier', sa.String(length=16), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True, **created_at),
+        ],
+        'contacts': [
+            sa.Column('user_id', sa.Integer(), nullable=True),
+        ],
+        'users': [
+            sa.Column('created_at', sa.DateTime(), nullable=True, **created_at),
+        ],
+    }
+
+# Which of those columns this revision added, so the downgrade leaves the ones
+# databases created from app.models already had
+ADDED_COLUMNS_TABLE = 'unify_schema_added_columns'
+
+added_columns = sa.table(
+    ADDED_COLUMNS_TABLE, sa.column('table_name', sa.String), sa.column('column_name', sa.String)
+)
+
+FOREIGN_KEYS = [
+    ('fk_messages_user_id_users', 'messages', 'user_id', 'users'),
+    ('fk_messages_contact_id_contacts', 'messages', 'contact_id', 'contacts'),
+    ('fk_contacts_user_id_users', 'contacts', 'user_id', 'users'),
+]
+
+def _unresponded():
+    if op.get_bind().dialect.name == 'postgresql':
+        return sa.text('is_responded = false')
+    return sa.text('is_responded = 0')
+
+def _indexes():
+    return [
+        ('ix_messages_contact_id_timestamp_id', 'messages', ['contact_id', 'timestamp', 'id'], {}),
+        ('ix_messages_user_id_timestamp_id', 'messages', ['user_id', 'timestamp', 'id'],
+         {'postgresql_include': ['is_responded', 'category']}),
+        ('ix_messages_user_id_unresponded_timestamp_id', 'messages', ['user_id', 'timestamp', 'id'],
+         {'postgresql_where': _unresponded(), 'sqlite_where': _unresponded()}),
+        ('ix_messages_user_id_contact_id_timestamp_id', 'messages', ['user_id', 'contact_id', 'timestamp', 'id'], {}),
+        ('ix_contacts_user_id', 'contacts', ['user_id'], {}),
+    ]
+
+@contextmanager
+def _keeping_sqlite_triggers(table):
+    """
+    Re-create a table's triggers after SQLite batch mode rebuilt it.
+
+    Batch mode copies the table and drops the original, and its triggers with
+    it, among them the ones keeping message_fts (a4d9e2f7c1b8) in step.
+    """
+    bind = op.get_bind()
+    if bind.dialect.name != 'sqlite':
+        yield
+        return
+    query = sa.text("SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND tbl_name = :table")
+    triggers = bind.execute(query, {'table': table}).all()
+    yield
+    remaining = {name for name, _ in bind.execute(query, {'table': table})}
+    for name, sql in triggers:
+        if name not in remaining:
+            op.execute(sql)
+    # Index what was written while the triggers were missing
+    if table == 'messages' and sa.inspect(bind).has_table('message_fts'):
+        op.execute("INSERT INTO message_fts(message_fts) VALUES ('rebuild')")
+
+# Each statement fills one id range of rows that are still unset
+BACKFILLS = [
+    # Senders become integer contact references
+    ('messages', sa.text(
+        'UPDATE messages SET contact_id = '
+        '(SELECT contacts.id FROM contacts WHERE contacts.telegram_id = messages.sender_id) '
+        'WHERE messages.id BETWEEN :low AND :high AND messages.contact_id IS NULL'
+    )),
+    # Messages imported by a user's history backfill belong to that user; a
+    # dialog several users backfilled (the same peer) can't be attributed
+    ('messages', sa.text(
+        'UPDATE messages SET user_id = '
+        '(SELECT MIN(backfill_checkpoints.user_id) FROM backfill_checkpoints '
+        'WHERE backfill_checkpoints.dialog_id = messages.chat_id '
+        'HAVING COUNT(DISTINCT backfill_checkpoints.user_id) = 1) '
+        'WHERE messages.id BETWEEN :low AND :high AND messages.user_id IS NULL'
+    )),
+    # Contacts belong to the user whose messages they sent, if all of them
+    # belong to that one user
+    ('contacts', sa.text(
+        'UPDATE contacts SET user_id = '
+        '(SELECT MIN(messages.user_id) FROM messages WHERE messages.contact_id = contacts.id '
+        'HAVING COUNT(DISTINCT messages.user_id) = 1 AND COUNT(messages.user_id) = COUNT(*)) '
+        'WHERE contacts.id BETWEEN :low AND :high AND contacts.user_id IS NULL'
+    )),
+]
+
+def _backfill(table, statement):
+    """Run an UPDATE over a table in id ranges, committing after each one."""
+    if op.get_context().as_sql:
+        # Offline scripts can't read the id range; update the whole table at once
+        op.execute(statement.bindparams(low=0, high=2 ** 31 - 1))
+        return
+    bind = op.get_bind()
+    low, high = bind.execute(sa.text(f'SELECT MIN(id), MAX(id) FROM {table}')).one()
+    if low is None:
+        return
+    # In autocommit mode each range is its own short transaction, so row locks
+    # are held for one batch rather than for the whole table
+    with op.get_context().autocommit_block():
+        for start in range(low, high + 1, BATCH_SIZE):
+            bind.execute(statement, {'low': start, 'high': start + BATCH_SIZE - 1})
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    postgresql = bind.dialect.name == 'postgresql'
+
+    # Databases created from app.models already have some of these
+    added = []
+    for table, columns in _new_columns().items():
+        existing = {column['name'] for column in inspector.get_columns(table)}
+        for column in columns:
+            if column.name not in existing:
+                op.add_column(table, column)
+                added.append({'table_name': table, 'column_name': column.name})
+    # Recorded in the same transaction as the columns, before anything below commits
+    if not inspector.has_table(ADDED_COLUMNS_TABLE):
+        op.create_table(
+            ADDED_COLUMNS_TABLE,
+            sa.Column('table_name', sa.String(length=64), primary_key=True),
+            sa.Column('column_name', sa.String(length=64), primary_key=True),
+        )
+    if added:
+        op.bulk_insert(added_columns, added)
+
+    if postgresql:
+        # NOT VALID skips checking existing rows under the ALTER's exclusive lock;
+        # VALIDATE, once that lock is released, checks them without blocking writes
+        existing_fks = {
+            table: {fk['name'] for fk in inspector.get_foreign_keys(table)} for table in ('messages', 'contacts')
+        }
+        added = []
+        for name, table, column, referred in FOREIGN_KEYS:
+            if name not in existing_fks[table]:
+                op.execute(
+                    f'ALTER TABLE {table} ADD CONSTRAINT {name} '
+                    f'FOREIGN KEY ({column}) REFERENCES {referred} (id) NOT VALID'
+                )
+                added.append((name, table))
+        with op.get_context().autocommit_block():
+            for name, table in added:
+                op.execute(f'ALTER TABLE {table} VALIDATE CONSTRAINT {name}')
+
+    # Built before the backfill, which looks messages up by contact_id
+    existing_indexes = {
+        table: {index['name'] for index in inspector.get_indexes(table)} for table in ('messages', 'contacts')
+    }
+    with op.get_context().autocommit_block():
+        for name, table, columns, kwargs in _indexes():
+            if name not in existing_indexes[table]:
+                op.create_index(name, table, columns, postgresql_concurrently=True, **kwargs)
+
+    for table, statement in BACKFILLS:
+        _backfill(table, statement)
+
+def downgrade():
+    bind = op.get_bind()
+    postgresql = bind.dialect.name == 'postgresql'
+    for name, table, _, _ in _indexes():
+        op.drop_index(name, table_name=table)
+    if postgresql:
+        for name, table, _, _ in FOREIGN_KEYS:
+            op.drop_constraint(name, table, type_='foreignkey')
+
+    # Databases upgraded before the added columns were recorded keep them all,
+    # as there is no telling which ones they had before
+    added = {}
+    if sa.inspect(bind).has_table(ADDED_COLUMNS_TABLE):
+        for table, column in bind.execute(sa.select(added_columns.c.table_name, added_columns.c.column_name)):
+            added.setdefault(table, []).append(column)
+        op.drop_table(ADDED_COLUMNS_TABLE)
+    for table, columns in added.items():
+        with _keeping_sqlite_triggers(table), op.batch_alter_table(table) as batch_op:
+            for column in columns:
+                batch_op.drop_column(column)
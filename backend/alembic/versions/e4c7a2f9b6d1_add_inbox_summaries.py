@@ -0,0 +1,59 @@
+"""add_inbox_summaries
+
+Revision ID: e4c7a2f9b6d1
+Revises: d9b3e7a1c5f4
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic
+revision = 'e4c7a2f9b6d1'
+down_revision = 'd9b3e7a1c5f4'
+branch_labels = None
+depends_on = None
+
+# Same as app.services.inbox_summary.rebuild
+UNRESPONDED = 'FROM messages WHERE user_id IS NOT NULL AND is_responded = {false}'
+
+def upgrade():
+    op.create_table(
+        'inbox_summaries',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('unresponded_count', sa.Integer(), nullable=False),
+        sa.Column('oldest_unresponded_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('user_id')
+    )
+    op.create_table(
+        'inbox_counts',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('dimension', sa.String(length=16), nullable=False),
+        sa.Column('value', sa.String(length=255), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('user_id', 'dimension', 'value', name='uq_inbox_counts_user_id_dimension_value')
+    )
+    op.create_index(op.f('ix_inbox_counts_id'), 'inbox_counts', ['id'], unique=False)
+
+    # Initial summaries; kept current by the application from here on
+    unresponded = UNRESPONDED.format(false='false' if op.get_bind().dialect.name == 'postgresql' else '0')
+    op.execute(
+        'INSERT INTO inbox_summaries (user_id, unresponded_count, oldest_unresponded_at) '
+        f'SELECT user_id, COUNT(*), MIN(timestamp) {unresponded} GROUP BY user_id'
+    )
+    for dimension, column in (('category', 'category'), ('ai_category', 'ai_category'), ('contact', 'contact_id')):
+        op.execute(
+            'INSERT INTO inbox_counts (user_id, dimension, value, count) '
+            f"SELECT user_id, '{dimension}', COALESCE(CAST({column} AS VARCHAR), ''), COUNT(*) "
+            f'{unresponded} GROUP BY user_id, {column}'
+        )
+
+def downgrade():
+    op.drop_index(op.f('ix_inbox_counts_id'), table_name='inbox_counts')
+    op.drop_table('inbox_counts')
+    op.drop_table('inbox_summaries')
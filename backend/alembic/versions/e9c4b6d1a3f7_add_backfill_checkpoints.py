@@ -0,0 +1,36 @@
+"""add_backfill_checkpoints
+
+Revision ID: e9c4b6d1a3f7
+Revises: d5a7e3b9f2c8
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic
+revision = 'e9c4b6d1a3f7'
+down_revision = 'd5a7e3b9f2c8'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        'backfill_checkpoints',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('dialog_id', sa.BigInteger(), nullable=False),
+        sa.Column('oldest_message_id', sa.BigInteger(), nullable=True),
+        sa.Column('seen_reply', sa.Boolean(), nullable=True),
+        sa.Column('message_count', sa.Integer(), nullable=True),
+        sa.Column('completed', sa.Boolean(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('user_id', 'dialog_id', name='uq_backfill_checkpoints_user_id_dialog_id')
+    )
+    op.create_index(op.f('ix_backfill_checkpoints_id'), 'backfill_checkpoints', ['id'], unique=False)
+
+def downgrade():
+    op.drop_index(op.f('ix_backfill_checkpoints_id'), table_name='backfill_checkpoints')
+    op.drop_table('backfill_checkpoints')
@@ -0,0 +1,31 @@
+"""add_message_keyset_indexes
+
+Revision ID: f2a8c5e1d7b3
+Revises: e9c4b6d1a3f7
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic
+revision = 'f2a8c5e1d7b3'
+down_revision = 'e9c4b6d1a3f7'
+branch_labels = None
+depends_on = None
+
+# Index name -> columns; each serves a keyset-paginated message listing
+INDEXES = {
+    'ix_messages_timestamp_id': ['timestamp', 'id'],
+    'ix_messages_is_responded_timestamp_id': ['is_responded', 'timestamp', 'id'],
+    'ix_messages_category_timestamp_id': ['category', 'timestamp', 'id'],
+    'ix_messages_sender_id_timestamp_id': ['sender_id', 'timestamp', 'id'],
+}
+
+def upgrade():
+    for name, columns in INDEXES.items():
+        op.create_index(name, 'messages', columns, unique=False)
+
+def downgrade():
+    for name in INDEXES:
+        op.drop_index(name, table_name='messages')
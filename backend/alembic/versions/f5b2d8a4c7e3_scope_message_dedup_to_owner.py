@@ -0,0 +1,70 @@
+"""scope_message_dedup_to_owner
+
+Revision ID: f5b2d8a4c7e3
+Revises: e4c7a2f9b6d1
+Create Date: 2026-10-17
+
+"""
+from contextlib import contextmanager
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic
+revision = 'f5b2d8a4c7e3'
+down_revision = 'e4c7a2f9b6d1'
+branch_labels = None
+depends_on = None
+
+@contextmanager
+def _keeping_sqlite_triggers(table):
+    """
+    Re-create a table's triggers after SQLite batch mode rebuilt it.
+
+    Batch mode copies the table and drops the original, and its triggers with
+    it, among them the ones keeping message_fts (a4d9e2f7c1b8) in step.
+    """
+    bind = op.get_bind()
+    if bind.dialect.name != 'sqlite':
+        yield
+        return
+    query = sa.text("SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND tbl_name = :table")
+    triggers = bind.execute(query, {'table': table}).all()
+    yield
+    remaining = {name for name, _ in bind.execute(query, {'table': table})}
+    for name, sql in triggers:
+        if name not in remaining:
+            op.execute(sql)
+    # Index what was written while the triggers were missing
+    if table == 'messages' and sa.inspect(bind).has_table('message_fts'):
+        op.execute("INSERT INTO message_fts(message_fts) VALUES ('rebuild')")
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    constraints = {constraint['name'] for constraint in inspector.get_unique_constraints('messages')}
+    indexes = {index['name'] for index in inspector.get_indexes('messages')}
+
+    # (chat_id, telegram_message_id) repeats across accounts talking to the
+    # same peer; messages are unique per owner instead
+    with _keeping_sqlite_triggers('messages'), op.batch_alter_table('messages') as batch_op:
+        if 'uq_messages_chat_id_telegram_message_id' in constraints:
+            batch_op.drop_constraint('uq_messages_chat_id_telegram_message_id', type_='unique')
+        if 'uq_messages_user_id_chat_id_telegram_message_id' not in constraints:
+            batch_op.create_unique_constraint(
+                'uq_messages_user_id_chat_id_telegram_message_id', ['user_id', 'chat_id', 'telegram_message_id']
+            )
+    # NULL owners never conflict in the constraint above
+    if 'uq_messages_ownerless_chat_id_telegram_message_id' not in indexes:
+        op.create_index(
+            'uq_messages_ownerless_chat_id_telegram_message_id', 'messages', ['chat_id', 'telegram_message_id'],
+            unique=True, postgresql_where=sa.text('user_id IS NULL'), sqlite_where=sa.text('user_id IS NULL')
+        )
+
+def downgrade():
+    # Fails if two owners stored the same (chat_id, telegram_message_id)
+    op.drop_index('uq_messages_ownerless_chat_id_telegram_message_id', table_name='messages')
+    with _keeping_sqlite_triggers('messages'), op.batch_alter_table('messages') as batch_op:
+        batch_op.drop_constraint('uq_messages_user_id_chat_id_telegram_message_id', type_='unique')
+        batch_op.create_unique_constraint(
+            'uq_messages_chat_id_telegram_message_id', ['chat_id', 'telegram_message_id']
+        )
@@ -1,3 +1,4 @@
+import logging
 from datetime import timedelta
 from typing import Any, Dict
 
@@ -10,6 +11,11 @@ from app.api import deps
 from app.core import security
 from app.core.config import settings
 from app.services.telegram_client import start_telegram_auth, confirm_telegram_auth
+from app.services.history_backfill import history_backfill
+from app.services.account_listeners import account_listeners
+
+# Set up logger
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
@@ -68,7 +74,7 @@ def start_telegram_authentication(
         )
 
 @router.post("/telegram-auth-confirm", response_model=schemas.TelegramAuthConfirm)
-def confirm_telegram_authentication(
+async def confirm_telegram_authentication(
     *,
     db: Session = Depends(deps.get_db),
     current_user: models.User = Depends(deps.get_current_user),
@@ -78,7 +84,7 @@ def confirm_telegram_authentication(
     Confirm Telegram authentication with verification code
     """
     try:
-        session_string = confirm_telegram_auth(
+        session_string = await confirm_telegram_auth(
             auth_id=auth_data.auth_id, 
             code=auth_data.code
         )
@@ -90,6 +96,16 @@ def confirm_telegram_authentication(
             session=session_string
         )
         
+        # Import the account's existing history in the background, and store
+        # new messages as they arrive
+        history_backfill.start(user.id, session_string)
+        if settings.TELEGRAM_LISTEN_ACCOUNTS:
+            try:
+                await account_listeners.attach(user.id, session_string)
+            except Exception as e:
+                # The account is connected; listening starts again on the next startup
+                logger.error(f"Could not listen for messages of user {user.id}: {str(e)}")
+        
         return {
             "status": "success",
             "message": "Telegram authentication successful"
@@ -101,7 +117,7 @@ def confirm_telegram_authentication(
         )
 
 @router.post("/reset-telegram", response_model=schemas.Msg)
-def reset_telegram_session(
+async def reset_telegram_session(
     *,
     db: Session = Depends(deps.get_db),
     current_user: models.User = Depends(deps.get_current_user),
@@ -110,4 +126,5 @@ def reset_telegram_session(
     Reset Telegram session for current user
     """
     crud.user.update_telegram_session(db=db, db_obj=current_user, session=None)
+    await account_listeners.detach(current_user.id)
     return {"message": "Telegram session reset successfully"} 
\ No newline at end of file
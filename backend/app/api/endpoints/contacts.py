@@ -1,9 +1,10 @@
-from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Any, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
 
 from app.db.database import get_db
-from app.schemas.contact import Contact, ContactCreate, ContactUpdate, ContactWithMessages
+from app.schemas.contact import Contact, ContactCreate, ContactSyncResult, ContactUpdate, ContactWithMessages
 from app.schemas.message import Message
 from app.services.contact_service import (
     get_contacts,
@@ -11,24 +12,43 @@ from app.services.contact_service import (
     create_contact,
     update_contact,
     get_contact_messages,
+    get_contact_messages_page,
+    get_contacts_page,
 )
-from app.services.user_service import get_current_user
+from app.services.pagination import InvalidCursor
+from app.services.user_service import get_current_user, get_user_telegram_session
 from app.schemas.user import User
 
 router = APIRouter()
 
+# Response header carrying the cursor of the next page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
 @router.get("/", response_model=List[Contact])
 def read_contacts(
+    response: Response,
     db: Session = Depends(get_db),
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     current_user: User = Depends(get_current_user),
 ) -> Any:
     """
-    Retrieve all contacts.
+    Retrieve the current user's contacts.
+    
+    Pages are cursor-based: pass the ``X-Next-Cursor`` response header as
+    ``cursor`` to get the next page. ``skip`` falls back to offset paging.
     """
-    contacts = get_contacts(db, skip=skip, limit=limit)
-    return contacts
+    if skip and not cursor:
+        return get_contacts(db, user_id=current_user.id, skip=skip, limit=limit)
+    
+    try:
+        page = get_contacts_page(db, user_id=current_user.id, cursor=cursor, limit=limit)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if page.next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
+    return page.items
 
 @router.post("/", response_model=Contact)
 def create_new_contact(
@@ -39,9 +59,23 @@ def create_new_contact(
     """
     Create a new contact.
     """
-    contact = create_contact(db, contact_in=contact_in)
+    contact = create_contact(db, contact_in=contact_in, user_id=current_user.id)
     return contact
 
+@router.post("/sync", response_model=ContactSyncResult)
+async def sync_contacts(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+) -> Any:
+    """
+    Update contacts from the user's Telegram dialogs, writing only the ones that changed.
+    """
+    from app.services.contact_sync import contact_sync
+    session_string = get_user_telegram_session(db, current_user.id)
+    if not session_string:
+        raise HTTPException(status_code=400, detail="Telegram account not connected")
+    return await contact_sync.sync_session(session_string, current_user.id)
+
 @router.get("/{contact_id}", response_model=Contact)
 def read_contact_by_id(
     contact_id: int,
@@ -51,7 +85,7 @@ def read_contact_by_id(
     """
     Retrieve a specific contact by ID.
     """
-    contact = get_contact_by_id(db, contact_id=contact_id)
+    contact = get_contact_by_id(db, user_id=current_user.id, contact_id=contact_id)
     if contact is None:
         raise HTTPException(status_code=404, detail="Contact not found")
     return contact
@@ -66,7 +100,7 @@ def update_contact_by_id(
     """
     Update a contact.
     """
-    contact = get_contact_by_id(db, contact_id=contact_id)
+    contact = get_contact_by_id(db, user_id=current_user.id, contact_id=contact_id)
     if contact is None:
         raise HTTPException(status_code=404, detail="Contact not found")
     contact = update_contact(db, db_obj=contact, obj_in=contact_in)
@@ -75,20 +109,32 @@ def update_contact_by_id(
 @router.get("/{contact_id}/messages", response_model=List[Message])
 def read_contact_messages(
     contact_id: int,
+    response: Response,
     db: Session = Depends(get_db),
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     current_user: User = Depends(get_current_user),
 ) -> Any:
     """
-    Retrieve all messages for a specific contact.
+    Retrieve all messages for a specific contact, newest first.
+    
+    Pages are cursor-based like contacts; ``skip`` falls back to offset paging.
     """
-    contact = get_contact_by_id(db, contact_id=contact_id)
+    contact = get_contact_by_id(db, user_id=current_user.id, contact_id=contact_id)
     if contact is None:
         raise HTTPException(status_code=404, detail="Contact not found")
     
-    messages = get_contact_messages(db, contact_id=contact_id, skip=skip, limit=limit)
-    return messages
+    if skip and not cursor:
+        return get_contact_messages(db, contact_id=contact_id, skip=skip, limit=limit)
+    
+    try:
+        page = get_contact_messages_page(db, contact_id=contact_id, cursor=cursor, limit=limit)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if page.next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
+    return page.items
 
 @router.get("/{contact_id}/with-messages", response_model=ContactWithMessages)
 def read_contact_with_messages(
@@ -101,15 +147,13 @@ def read_contact_with_messages(
     """
     Retrieve a contact with its messages.
     """
-    contact = get_contact_by_id(db, contact_id=contact_id)
+    contact = get_contact_by_id(db, user_id=current_user.id, contact_id=contact_id)
     if contact is None:
         raise HTTPException(status_code=404, detail="Contact not found")
     
     messages = get_contact_messages(db, contact_id=contact_id, skip=skip, limit=limit)
     
-    # Convert database model to Pydantic schema
-    from app.schemas.contact import ContactWithMessages
-    result = ContactWithMessages.from_orm(contact)
-    result.messages = messages
-    
-    return result 
\ No newline at end of file
+    # Attach the page as the loaded relationship, so serializing the contact
+    # doesn't lazy-load its whole history
+    set_committed_value(contact, "messages", messages)
+    return ContactWithMessages.from_orm(contact) 
\ No newline at end of file
@@ -1,79 +1,183 @@
 from typing import Any, List, Optional
 from datetime import datetime
 
-from fastapi import APIRouter, Depends, HTTPException, Query, Path, Body, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Path, Body, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload
 
 from app import crud, models, schemas
 from app.api import deps
+from app.db.database import get_async_db
+from app.schemas.message import BackfillStatus, InboxSummary, MessageCategorizationSummary, MessageIngestionStats, MessageSearchHit, MessageWithContact
+from app.services.inbox_summary import get_inbox_summary, get_unresponded_count
+from app.services.message_listing import count_cache, list_user_messages
+from app.services.pagination import InvalidCursor, Page
 
 router = APIRouter()
 
-@router.get("", response_model=List[schemas.Message])
+# Response header carrying the number of messages matching a listing
+TOTAL_COUNT_HEADER = "X-Total-Count"
+
+# Response header carrying the cursor of the next page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+@router.get("", response_model=List[MessageWithContact])
 def list_messages(
+    response: Response,
     db: Session = Depends(deps.get_db),
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     contact_id: Optional[int] = None,
     category: Optional[str] = None,
     is_responded: Optional[bool] = None,
     search: Optional[str] = None,
+    with_contact: bool = False,
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
-    Retrieve messages with optional filtering
-    """
-    messages = crud.message.get_multi_by_user(
-        db=db,
-        user_id=current_user.id,
-        skip=skip,
-        limit=limit,
-        contact_id=contact_id,
-        category=category,
-        is_responded=is_responded,
-        search=search
-    )
+    Retrieve messages with optional filtering, and their senders if ``with_contact``.
     
-    # Get total count for pagination headers
-    total = crud.message.get_count_by_user(
-        db=db,
-        user_id=current_user.id,
-        contact_id=contact_id,
-        category=category,
-        is_responded=is_responded,
-        search=search
-    )
+    Pages are cursor-based: pass the ``X-Next-Cursor`` response header as
+    ``cursor`` to get the next page. ``skip`` falls back to offset paging.
+    """
+    try:
+        page, total = list_user_messages(
+            db=db,
+            user_id=current_user.id,
+            skip=skip,
+            limit=limit,
+            cursor=cursor,
+            contact_id=contact_id,
+            category=category,
+            is_responded=is_responded,
+            search=search,
+            with_contact=with_contact
+        )
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    # Return messages with pagination headers
-    return messages
+    return _page_response(response, page, total, with_contact)
 
-@router.get("/unresponded", response_model=List[schemas.Message])
+@router.get("/unresponded", response_model=List[MessageWithContact])
 def list_unresponded_messages(
+    response: Response,
     db: Session = Depends(deps.get_db),
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
+    with_contact: bool = False,
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
-    Retrieve unresponded messages
-    """
-    messages = crud.message.get_multi_by_user(
-        db=db,
-        user_id=current_user.id,
-        skip=skip,
-        limit=limit,
-        is_responded=False
-    )
+    Retrieve unresponded messages, and their senders if ``with_contact``.
     
-    # Get total count for pagination headers
-    total = crud.message.get_count_by_user(
-        db=db,
-        user_id=current_user.id,
-        is_responded=False
-    )
+    Pages are cursor-based, as for the message listing.
+    """
+    try:
+        page, total = list_user_messages(
+            db=db,
+            user_id=current_user.id,
+            skip=skip,
+            limit=limit,
+            cursor=cursor,
+            is_responded=False,
+            with_contact=with_contact,
+            total=get_unresponded_count(db, current_user.id)
+        )
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    # Return messages with pagination headers
-    return messages
+    return _page_response(response, page, total, with_contact)
+
+@router.get("/inbox", response_model=InboxSummary)
+def get_inbox(
+    db: Session = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Get unresponded message counts by category, AI category and contact, and the oldest unresponded message time
+    """
+    return get_inbox_summary(db, current_user.id)
+
+def _page_response(response: Response, page: Page, total: int, with_contact: bool) -> List[Any]:
+    # Total count and next cursor for pagination headers
+    response.headers[TOTAL_COUNT_HEADER] = str(total)
+    if page.next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
+    return _serialize(page.items, with_contact)
+
+def _serialize(messages: List[Any], with_contact: bool) -> List[Any]:
+    # Without contacts, serialize through the plain schema so the unloaded
+    # relationship is never read
+    if with_contact:
+        return messages
+    return [schemas.Message.from_orm(message) for message in messages]
+
+@router.get("/search", response_model=List[MessageSearchHit])
+def search_user_messages(
+    db: Session = Depends(deps.get_db),
+    q: str = Query(..., min_length=1),
+    skip: int = 0,
+    limit: int = Query(20, ge=1, le=100),
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Search messages by text, best matches first, with highlighted snippets
+    """
+    from app.services.message_search import search_messages
+    return search_messages(db, user_id=current_user.id, search=q, skip=skip, limit=limit)
+
+@router.post("/categorize", response_model=MessageCategorizationSummary)
+async def categorize_uncategorized(
+    db: AsyncSession = Depends(get_async_db),
+    limit: Optional[int] = Query(None, ge=1),
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Categorize all of the user's messages that have no AI category yet
+    """
+    from app.services.ai_batch import categorize_uncategorized_messages
+    return await categorize_uncategorized_messages(db, user_id=current_user.id, limit=limit)
+
+@router.get("/ingestion/stats", response_model=MessageIngestionStats)
+def get_ingestion_stats(
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Get queue depth, throughput and backpressure of real-time message ingestion
+    """
+    from app.services.message_ingestion import message_ingestor
+    return message_ingestor.stats()
+
+@router.post("/backfill", response_model=BackfillStatus, status_code=status.HTTP_202_ACCEPTED)
+async def start_backfill(
+    db: Session = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Import the user's Telegram message history in the background, resuming any earlier import
+    """
+    from app.services.history_backfill import backfill_status, history_backfill
+    if not current_user.telegram_session:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Telegram account not connected"
+        )
+    history_backfill.start(current_user.id, current_user.telegram_session)
+    return backfill_status(db, current_user.id)
+
+@router.get("/backfill/status", response_model=BackfillStatus)
+def get_backfill_status(
+    db: Session = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Get progress of the user's Telegram history import
+    """
+    from app.services.history_backfill import backfill_status
+    return backfill_status(db, current_user.id)
 
 @router.get("/{message_id}", response_model=schemas.Message)
 def get_message(
@@ -121,12 +225,13 @@ def update_message(
             detail="Not enough permissions"
         )
     message = crud.message.update(db=db, db_obj=message, obj_in=message_in)
+    count_cache.invalidate(current_user.id)
     return message
 
 @router.post("/{message_id}/respond", response_model=schemas.Message)
 async def respond_to_message(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(get_async_db),
     message_id: int = Path(...),
     response_data: schemas.MessageResponse,
     current_user: models.User = Depends(deps.get_current_active_user),
@@ -134,7 +239,12 @@ async def respond_to_message(
     """
     Respond to a message via Telegram
     """
-    message = crud.message.get(db=db, id=message_id)
+    # The contact is needed for its Telegram id; load it in the same query
+    message = (await db.scalars(
+        select(models.Message)
+        .options(joinedload(models.Message.contact))
+        .where(models.Message.id == message_id)
+    )).first()
     if not message:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -163,9 +273,12 @@ async def respond_to_message(
         )
         
         # Update message in database
-        message = crud.message.mark_as_responded(
-            db=db, message=message, response_text=response_data.response_text
-        )
+        message.is_responded = True
+        message.response_text = response_data.response_text
+        message.response_timestamp = datetime.now()
+        await db.commit()
+        await db.refresh(message)
+        count_cache.invalidate(current_user.id)
         
         return message
     except Exception as e:
@@ -177,14 +290,14 @@ async def respond_to_message(
 @router.post("/{message_id}/categorize", response_model=schemas.Message)
 async def categorize_message(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(get_async_db),
     message_id: int = Path(...),
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
     Categorize a message using AI
     """
-    message = crud.message.get(db=db, id=message_id)
+    message = await db.get(models.Message, message_id)
     if not message:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -197,18 +310,18 @@ async def categorize_message(
         )
     
     try:
-        from app.services.ai_categorization import ai_categorization
-        categorization = await ai_categorization.categorize_message(message.message_text)
+        from app.services.cascade_categorization import cascade_categorizer
+        categorization = await cascade_categorizer.categorize_message(message.message_text)
         
         # Update message with categorization
         message.ai_category = categorization["category"]
         message.ai_confidence = categorization["confidence"]
         message.ai_reasoning = categorization["reasoning"]
         message.ai_categorized_at = datetime.now()
+        message.ai_tier = categorization["tier"]
         
-        db.add(message)
-        db.commit()
-        db.refresh(message)
+        await db.commit()
+        await db.refresh(message)
         
         return message
     except Exception as e:
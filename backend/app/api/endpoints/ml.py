@@ -1,15 +1,26 @@
 from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException, Body
+from fastapi import APIRouter, Depends, HTTPException, Body, status
 from sqlalchemy.orm import Session
 
 from app.db.database import get_db
-from app.schemas.ml import MLPrediction, MLFeedback, MLStats
+from app.schemas.ml import (
+    MLPrediction,
+    MLBatchPrediction,
+    MLBatchPredictionRequest,
+    MLFeedback,
+    MLStats,
+    MLTrainingJob,
+    AICacheStats,
+)
 from app.services.ml_service import (
     categorize_message,
+    categorize_messages,
     add_training_feedback,
     get_ml_stats,
-    retrain_model,
 )
+from app.services.ml_jobs import training_jobs
+from app.services.ai_categorization import PROMPT_VERSION
+from app.services.categorization_cache import categorization_cache
 from app.services.user_service import get_current_user
 from app.schemas.user import User
 
@@ -27,6 +38,20 @@ def predict_category(
     prediction = categorize_message(db, message_id)
     return prediction
 
+@router.post("/predict/batch", response_model=MLBatchPrediction)
+def predict_categories(
+    request: MLBatchPredictionRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+) -> Any:
+    """
+    Predict categories for many messages in one model call.
+    """
+    predictions = categorize_messages(db, request.message_ids)
+    found_ids = {prediction.message_id for prediction in predictions}
+    missing_ids = [message_id for message_id in dict.fromkeys(request.message_ids) if message_id not in found_ids]
+    return MLBatchPrediction(predictions=predictions, missing_ids=missing_ids)
+
 @router.post("/feedback", response_model=MLFeedback)
 def submit_feedback(
     message_id: int,
@@ -51,13 +76,45 @@ def get_stats(
     stats = get_ml_stats(db)
     return stats
 
-@router.post("/retrain")
-def trigger_retraining(
-    db: Session = Depends(get_db),
+@router.post("/retrain", response_model=MLTrainingJob, status_code=status.HTTP_202_ACCEPTED)
+async def trigger_retraining(
+    current_user: User = Depends(get_current_user),
+) -> Any:
+    """
+    Trigger model retraining in the background.
+    
+    Returns immediately with the job to poll; if a retraining job is
+    already pending, that job is returned instead of starting another.
+    """
+    return training_jobs.submit()
+
+@router.get("/jobs", response_model=List[MLTrainingJob])
+def list_training_jobs(
+    current_user: User = Depends(get_current_user),
+) -> Any:
+    """
+    List recent retraining jobs.
+    """
+    return training_jobs.list()
+
+@router.get("/jobs/{job_id}", response_model=MLTrainingJob)
+def get_training_job(
+    job_id: str,
+    current_user: User = Depends(get_current_user),
+) -> Any:
+    """
+    Get status, progress and metrics of a retraining job.
+    """
+    job = training_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Training job not found")
+    return job
+
+@router.get("/ai-cache", response_model=AICacheStats)
+def get_ai_cache_stats(
     current_user: User = Depends(get_current_user),
 ) -> Any:
     """
-    Trigger model retraining.
+    Get hit/miss statistics of the AI categorization cache.
     """
-    retrain_model(db)
-    return {"message": "Model retraining started"} 
\ No newline at end of file
+    return {**categorization_cache.stats(), "prompt_version": PROMPT_VERSION}
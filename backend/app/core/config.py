@@ -13,6 +13,12 @@ class Settings(BaseSettings):
     # Security
     SECRET_KEY: str = secrets.token_urlsafe(32)
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 7  # 7 days
+    AUTH_USER_CACHE_TTL: float = 60.0  # seconds an authenticated user is reused; 0 disables
+    AUTH_CACHE_MAX_ENTRIES: int = 10000  # Cached tokens and users each
+    SESSION_ENCRYPTION_KEY: Optional[str] = None  # Fernet key for stored Telegram sessions
+    SESSION_ENCRYPTION_OLD_KEYS: str = ""  # Comma-separated retired keys, still accepted until sessions are re-encrypted
+    SESSION_CACHE_SIZE: int = 1024  # Decrypted sessions kept in memory
+    SESSION_CACHE_TTL: float = 300.0  # seconds
     
     # CORS
     CORS_ORIGINS: List[AnyHttpUrl] = []
@@ -27,6 +33,17 @@ class Settings(BaseSettings):
     
     # Database
     DATABASE_URL: str = "sqlite:///./app.db"
+    ASYNC_DATABASE_URL: Optional[str] = None  # Derived from DATABASE_URL (asyncpg/aiosqlite) if unset
+    DB_POOL_SIZE: int = 10  # Persistent connections per engine (ignored for SQLite)
+    DB_MAX_OVERFLOW: int = 20  # Extra connections allowed under load
+    DB_POOL_RECYCLE: int = 1800  # seconds before a connection is replaced
+    DB_POOL_TIMEOUT: float = 30.0  # seconds to wait for a free connection
+    MESSAGE_COUNT_CACHE_TTL: float = 30.0  # seconds a message listing's total is reused; 0 disables
+    SEARCH_BACKEND: str = "auto"  # "auto" (full-text index when available) or "like"
+    
+    @property
+    def SQLALCHEMY_DATABASE_URI(self) -> str:
+        return self.DATABASE_URL
     
     # Telegram
     TELEGRAM_API_ID: Optional[int] = None
@@ -35,9 +52,24 @@ class Settings(BaseSettings):
     TELEGRAM_PHONE: Optional[str] = None
     TELEGRAM_AUTO_START: bool = False
     TELEGRAM_SESSION_NAME: str = "telegram_crm"
-    
+    TELEGRAM_POOL_MAX_CONNECTIONS: int = 100
+    TELEGRAM_POOL_IDLE_TIMEOUT: float = 600.0  # seconds
+    TELEGRAM_POOL_PING_INTERVAL: float = 60.0  # seconds
+    TELEGRAM_SCAN_CONCURRENCY: int = 8  # Dialogs scanned at once for unresponded messages
+    TELEGRAM_LISTEN_ACCOUNTS: bool = True  # Store incoming messages of connected accounts as they arrive
+    BACKFILL_BATCH_SIZE: int = 2000  # Messages committed per history backfill batch
+    BACKFILL_CONCURRENCY: int = 4  # Dialogs imported at once per account
+    CONTACT_SYNC_BATCH_SIZE: int = 500  # Dialogs diffed against stored contacts per query
+    INGEST_BATCH_SIZE: int = 500  # Messages written per ingestion batch
+    INGEST_FLUSH_INTERVAL: float = 0.2  # seconds before a partial batch is written
+    INGEST_MAX_QUEUE_SIZE: int = 10000  # Queued messages before event handlers wait
+
     # ML
     ML_MODEL_PATH: str = "./ml_models"
+    ML_TRAINING_WORKERS: int = 1  # Processes used for background retraining
+    ML_MODEL_TYPE: str = "random_forest"  # "random_forest" or "online"
+    ML_ONLINE_SAVE_EVERY: int = 50  # Persist the online model every N feedback updates
+    ML_CONSOLIDATION_INTERVAL: float = 6 * 60 * 60  # seconds between full refits in online mode; 0 disables
     
     # AI Categorization
     AI_PROVIDER: str = "openai"  # "openai" or "anthropic"
@@ -45,6 +77,21 @@ class Settings(BaseSettings):
     OPENAI_MODEL: str = "gpt-3.5-turbo"
     ANTHROPIC_API_KEY: Optional[str] = None
     ANTHROPIC_MODEL: str = "claude-3-haiku-20240307"
+    AI_MAX_CONCURRENCY: int = 8  # Concurrent provider requests
+    AI_MAX_RETRIES: int = 5  # Attempts per request on 429/5xx/connection errors
+    AI_REQUEST_TIMEOUT: float = 60.0  # seconds
+    OPENAI_REQUESTS_PER_SECOND: float = 5.0
+    ANTHROPIC_REQUESTS_PER_SECOND: float = 5.0
+    AI_PROMPT_BATCH_SIZE: int = 1  # Messages packed into one LLM request when categorizing in bulk
+    AI_CACHE_ENABLED: bool = True
+    AI_CACHE_BACKEND: str = "memory"  # "memory" or "database" (adds a shared tier)
+    AI_CACHE_MAX_ENTRIES: int = 10000
+    AI_CACHE_TTL: float = 7 * 24 * 60 * 60  # seconds
+    AI_CASCADE_ENABLED: bool = True  # Try the local model before the LLM
+    AI_CASCADE_THRESHOLD: float = 0.75  # Local confidence needed to skip the LLM
+    
+    # Monitoring
+    METRICS_ENABLED: bool = True  # Record latencies and serve them at /metrics (Prometheus format)
     
     class Config:
         case_sensitive = True
@@ -1,5 +1,5 @@
 from datetime import datetime
-from app.services.ai_categorization import ai_categorization
+from app.services.cascade_categorization import cascade_categorizer
 
 # Inside the create method of MessageCRUD class:
 async def create(self, db: Session, *, obj_in: MessageCreate, user_id: int) -> Message:
@@ -13,13 +13,14 @@ async def create(self, db: Session, *, obj_in: MessageCreate, user_id: int) -> M
     
     # Now perform AI categorization asynchronously
     try:
-        categorization = await ai_categorization.categorize_message(db_obj.message_text)
+        categorization = await cascade_categorizer.categorize_message(db_obj.message_text)
         
         # Update the message with AI categorization
         db_obj.ai_category = categorization["category"]
         db_obj.ai_confidence = categorization["confidence"]
         db_obj.ai_reasoning = categorization["reasoning"]
         db_obj.ai_categorized_at = datetime.now()
+        db_obj.ai_tier = categorization["tier"]
         
         db.add(db_obj)
         db.commit()
@@ -1,15 +1,76 @@
+from typing import AsyncIterator, Dict, Optional
+
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
 from app.core.config import settings
 
+def async_database_url(url: str) -> str:
+    """
+    Async driver URL for a database URL.
+    
+    Postgres URLs use asyncpg and SQLite URLs use aiosqlite; URLs that
+    already name a driver other than the default sync ones are kept.
+    """
+    scheme, sep, rest = url.partition("://")
+    if scheme in ("postgresql", "postgres", "postgresql+psycopg2"):
+        return f"postgresql+asyncpg{sep}{rest}"
+    if scheme in ("sqlite", "sqlite+pysqlite"):
+        return f"sqlite+aiosqlite{sep}{rest}"
+    return url
+
+def pool_options(url: str) -> Dict:
+    """Connection pool settings for an engine; SQLite keeps SQLAlchemy's defaults."""
+    if url.startswith("sqlite"):
+        return {}
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+    }
+
 # Create database engine
-engine = create_engine(settings.SQLALCHEMY_DATABASE_URI, pool_pre_ping=True)
+engine = create_engine(
+    settings.SQLALCHEMY_DATABASE_URI,
+    pool_pre_ping=True,
+    **pool_options(settings.SQLALCHEMY_DATABASE_URI)
+)
 
 # Create session factory for database connections
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine and session factory, created on first use so sync-only
+# deployments don't need an async driver installed
+_async_engine: Optional[AsyncEngine] = None
+_async_session_factory: Optional[async_sessionmaker] = None
+
+def get_async_engine() -> AsyncEngine:
+    """Get the shared async engine, creating it on first use."""
+    global _async_engine
+    if _async_engine is None:
+        url = settings.ASYNC_DATABASE_URL or async_database_url(settings.SQLALCHEMY_DATABASE_URI)
+        _async_engine = create_async_engine(url, pool_pre_ping=True, **pool_options(url))
+    return _async_engine
+
+def AsyncSessionLocal() -> AsyncSession:
+    """Create an async session bound to the shared async engine."""
+    global _async_session_factory
+    if _async_session_factory is None:
+        # Objects stay usable after commit without an implicit (blocking) refresh
+        _async_session_factory = async_sessionmaker(get_async_engine(), autoflush=False, expire_on_commit=False)
+    return _async_session_factory()
+
+async def dispose_async_engine() -> None:
+    """Close the async engine's pooled connections."""
+    global _async_engine, _async_session_factory
+    if _async_engine is not None:
+        await _async_engine.dispose()
+    _async_engine = None
+    _async_session_factory = None
+
 # Base class for SQLAlchemy models
 Base = declarative_base()
 
@@ -29,4 +90,19 @@ def get_db():
         db.rollback()
         raise
     finally:
-        db.close() 
\ No newline at end of file
+        db.close()
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    """
+    Dependency function that yields an async SQLAlchemy session.
+    
+    Queries run without blocking the event loop, so async endpoints can
+    use it without stalling concurrent requests.
+    """
+    async with AsyncSessionLocal() as db:
+        try:
+            yield db
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
@@ -1,5 +1,5 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text, JSON, BigInteger
-from sqlalchemy.sql import func
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text, JSON, BigInteger, LargeBinary, Float, UniqueConstraint, Index
+from sqlalchemy.sql import func, text
 from sqlalchemy.orm import relationship
 
 from app.db.database import Base
@@ -9,28 +9,72 @@ class Message(Base):
     Model for storing Telegram messages.
     
     This table stores all messages that need to be tracked by the CRM system.
+    Messages belong to a user (the account they were received on) and link
+    to their sender through an integer ``contact_id`` foreign key;
+    ``sender_id`` keeps the raw Telegram id.
     """
     __tablename__ = "messages"
     
     id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"))  # None for messages of the global bot client
+    contact_id = Column(Integer, ForeignKey("contacts.id"))
     telegram_message_id = Column(BigInteger, nullable=False)
     chat_id = Column(BigInteger, nullable=False)
     sender_id = Column(BigInteger, nullable=False)
     message_text = Column(Text)
     timestamp = Column(DateTime, nullable=False)
+    is_from_user = Column(Boolean, default=False)  # From CRM user to contact
     is_read = Column(Boolean, default=False)
     is_responded = Column(Boolean, default=False)
+    response_text = Column(Text)
+    response_timestamp = Column(DateTime)
     category = Column(String(50), index=True)
     priority = Column(Integer, default=0)
     scheduled_call_time = Column(DateTime)
     action_notes = Column(Text)
     media_info = Column(JSON)
+    ai_category = Column(String)
+    ai_confidence = Column(Float)
+    ai_reasoning = Column(Text)
+    ai_categorized_at = Column(DateTime)
+    ai_tier = Column(String(16))  # "local" or "llm": which classifier answered
+    created_at = Column(DateTime, server_default=func.now())
     
     # Relationships
-    contact = relationship("Contact", back_populates="messages", foreign_keys=[sender_id], 
-                          primaryjoin="Message.sender_id == Contact.telegram_id")
+    contact = relationship("Contact", back_populates="messages")
+    user = relationship("User")
     
     __table_args__ = (
+        # Telegram message ids are only unique within a chat of one account:
+        # private chats are keyed by the peer, so two users talking to the same
+        # peer can see the same (chat_id, telegram_message_id)
+        UniqueConstraint(
+            "user_id", "chat_id", "telegram_message_id", name="uq_messages_user_id_chat_id_telegram_message_id"
+        ),
+        # Messages of the global bot client have no owner (and NULLs never conflict)
+        Index(
+            "uq_messages_ownerless_chat_id_telegram_message_id", "chat_id", "telegram_message_id", unique=True,
+            postgresql_where=text("user_id IS NULL"), sqlite_where=text("user_id IS NULL")
+        ),
+        # Keyset pagination: each listing's filter, then its (timestamp, id) sort key
+        Index("ix_messages_timestamp_id", "timestamp", "id"),
+        Index(
+            "ix_messages_unresponded_timestamp_id", "timestamp", "id",
+            postgresql_where=text("is_responded = false"), sqlite_where=text("is_responded = 0")
+        ),
+        Index("ix_messages_category_timestamp_id", "category", "timestamp", "id"),
+        Index("ix_messages_sender_id_timestamp_id", "sender_id", "timestamp", "id"),
+        Index("ix_messages_contact_id_timestamp_id", "contact_id", "timestamp", "id"),
+        # Per-user listings
+        Index(
+            "ix_messages_user_id_timestamp_id", "user_id", "timestamp", "id",
+            postgresql_include=["is_responded", "category"]
+        ),
+        Index(
+            "ix_messages_user_id_unresponded_timestamp_id", "user_id", "timestamp", "id",
+            postgresql_where=text("is_responded = false"), sqlite_where=text("is_responded = 0")
+        ),
+        Index("ix_messages_user_id_contact_id_timestamp_id", "user_id", "contact_id", "timestamp", "id"),
         {"sqlite_autoincrement": True},
     )
 
@@ -43,21 +87,31 @@ class Contact(Base):
     __tablename__ = "contacts"
     
     id = Column(Integer, primary_key=True, index=True)
-    telegram_id = Column(BigInteger, nullable=False, unique=True)
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
+    telegram_id = Column(BigInteger, nullable=False)
     display_name = Column(String(255))
     username = Column(String(255))
     phone_number = Column(String(50))
     first_name = Column(String(255))
     last_name = Column(String(255))
     additional_info = Column(JSON)
+    last_message_time = Column(DateTime)
+    sync_hash = Column(String(32))  # Fingerprint of the fields last written by contact sync
     created_at = Column(DateTime, server_default=func.now())
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
     
     # Relationships
-    messages = relationship("Message", back_populates="contact",
-                           primaryjoin="Contact.telegram_id == Message.sender_id")
+    messages = relationship("Message", back_populates="contact")
+    user = relationship("User")
     
     __table_args__ = (
+        # Each account keeps its own contact for a peer, as it does its messages
+        UniqueConstraint("user_id", "telegram_id", name="uq_contacts_user_id_telegram_id"),
+        # Contacts of the global bot client have no owner (and NULLs never conflict)
+        Index(
+            "uq_contacts_ownerless_telegram_id", "telegram_id", unique=True,
+            postgresql_where=text("user_id IS NULL"), sqlite_where=text("user_id IS NULL")
+        ),
         {"sqlite_autoincrement": True},
     )
 
@@ -83,12 +137,17 @@ class MLTrainingData(Base):
     Model for storing ML training data.
     
     This table stores features and labels for training the ML model.
+    Metadata features are also kept as a packed float32 vector tagged with
+    the feature-schema version that produced it, so retraining can reuse
+    them until the extractor changes.
     """
     __tablename__ = "ml_training_data"
     
     id = Column(Integer, primary_key=True, index=True)
     message_id = Column(Integer, ForeignKey("messages.id"))
     features = Column(JSON, nullable=False)
+    feature_vector = Column(LargeBinary)
+    feature_version = Column(Integer)
     label = Column(String(50), nullable=False)
     feedback_source = Column(String(50), default="user")
     created_at = Column(DateTime, server_default=func.now())
@@ -114,7 +173,83 @@ class User(Base):
     is_active = Column(Boolean, default=True)
     is_superuser = Column(Boolean, default=False)
     telegram_session = Column(Text)
+    created_at = Column(DateTime, server_default=func.now())
+    
+    __table_args__ = (
+        {"sqlite_autoincrement": True},
+    )
+
+class AICategorizationCache(Base):
+    """
+    Model for the shared tier of the LLM categorization cache.
+    
+    This table stores categorization results keyed by a hash of the
+    normalized message text, provider, model and prompt version.
+    """
+    __tablename__ = "ai_categorization_cache"
+    
+    key = Column(String(255), primary_key=True)
+    prompt_version = Column(String(32), nullable=False, index=True)
+    category = Column(String(50), nullable=False)
+    confidence = Column(Float, nullable=False)
+    reasoning = Column(Text)
+    created_at = Column(DateTime, server_default=func.now())
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+class BackfillCheckpoint(Base):
+    """
+    Model for history backfill progress.
+    
+    One row per user and dialog; records how far back the import has got
+    so an interrupted backfill resumes where it stopped.
+    """
+    __tablename__ = "backfill_checkpoints"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    dialog_id = Column(BigInteger, nullable=False)
+    oldest_message_id = Column(BigInteger)  # Messages below this id are not imported yet
+    seen_reply = Column(Boolean, default=False)  # An outgoing message was passed, so older ones are answered
+    message_count = Column(Integer, default=0)
+    completed = Column(Boolean, default=False)
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+    
+    __table_args__ = (
+        UniqueConstraint("user_id", "dialog_id", name="uq_backfill_checkpoints_user_id_dialog_id"),
+        {"sqlite_autoincrement": True},
+    )
+
+class InboxSummary(Base):
+    """
+    Model for a user's unresponded-inbox totals.
+    
+    One row per user, kept current as messages are stored, answered and
+    categorized (see app.services.inbox_summary), so dashboards read it
+    instead of scanning messages.
+    """
+    __tablename__ = "inbox_summaries"
+    
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    unresponded_count = Column(Integer, nullable=False, default=0)
+    oldest_unresponded_at = Column(DateTime)
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+class InboxCount(Base):
+    """
+    Model for a user's unresponded-message counts per category, AI category and contact.
+    
+    ``dimension`` is "category", "ai_category" or "contact"; ``value`` is the
+    category name or contact id, "" for messages without one.
+    """
+    __tablename__ = "inbox_counts"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    dimension = Column(String(16), nullable=False)
+    value = Column(String(255), nullable=False)
+    count = Column(Integer, nullable=False, default=0)
     
     __table_args__ = (
+        UniqueConstraint("user_id", "dimension", "value", name="uq_inbox_counts_user_id_dimension_value"),
         {"sqlite_autoincrement": True},
-    ) 
\ No newline at end of file
+    )
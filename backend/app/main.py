@@ -16,6 +16,8 @@ if settings.BACKEND_CORS_ORIGINS:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        # Lets browser clients read pagination headers
+        expose_headers=["X-Next-Cursor", "X-Total-Count"],
     )
 
 # Include API router
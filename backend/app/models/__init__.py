@@ -0,0 +1,5 @@
+from app.models.contact import Contact
+from app.models.message import Message
+from app.models.user import User
+
+__all__ = ["Contact", "Message", "User"]
@@ -1,25 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Text
-from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+# Contacts share one schema with the rest of the app; see app.db.models
+from app.db.models import Contact
 
-from app.db.base_class import Base
-
-class Contact(Base):
-    __tablename__ = "contacts"
-    
-    id = Column(Integer, primary_key=True, index=True)
-    telegram_id = Column(Integer, unique=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"))
-    username = Column(String, nullable=True)
-    display_name = Column(String)
-    first_name = Column(String, nullable=True)
-    last_name = Column(String, nullable=True)
-    phone_number = Column(String, nullable=True)
-    additional_info = Column(Text, nullable=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
-    last_message_time = Column(DateTime(timezone=True), nullable=True)
-    
-    # Relationships
-    messages = relationship("Message", back_populates="contact")
-    user = relationship("User") 
\ No newline at end of file
+__all__ = ["Contact"]
@@ -1,15 +1,4 @@
-from sqlalchemy import Boolean, Column, Integer, String, DateTime
-from sqlalchemy.sql import func
+# Users share one schema with the rest of the app; see app.db.models
+from app.db.models import User
 
-from app.db.base_class import Base
-
-class User(Base):
-    __tablename__ = "users"
-    
-    id = Column(Integer, primary_key=True, index=True)
-    email = Column(String, unique=True, index=True, nullable=False)
-    hashed_password = Column(String, nullable=False)
-    is_active = Column(Boolean, default=True)
-    is_superuser = Column(Boolean, default=False)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    telegram_session = Column(String, nullable=True) 
\ No newline at end of file
+__all__ = ["User"]
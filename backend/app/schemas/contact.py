@@ -37,6 +37,15 @@ class Contact(ContactInDBBase):
 class ContactInDB(ContactInDBBase):
     pass
 
+# Result of syncing contacts from Telegram
+class ContactSyncResult(BaseModel):
+    dialogs: int
+    changed: int
+
 # Contact with messages
 class ContactWithMessages(Contact):
-    messages: List["Message"] = [] 
\ No newline at end of file
+    messages: List["Message"] = []
+
+from app.schemas.message import Message  # noqa: E402
+
+ContactWithMessages.update_forward_refs(Message=Message)
@@ -12,6 +12,7 @@ class MessageBase(BaseModel):
     ai_category: Optional[str] = None
     ai_confidence: Optional[float] = None
     ai_reasoning: Optional[str] = None
+    ai_tier: Optional[str] = None
 
 # Properties to receive via API on creation
 class MessageCreate(MessageBase):
@@ -46,4 +47,57 @@ class Message(MessageInDBBase):
 
 # Properties stored in DB
 class MessageInDB(MessageInDBBase):
-    pass 
\ No newline at end of file
+    pass
+
+# Sender details included with listed messages
+class MessageContact(BaseModel):
+    id: int
+    telegram_id: int
+    display_name: Optional[str] = None
+    username: Optional[str] = None
+
+    class Config:
+        orm_mode = True
+
+# Message with its sender, when the listing loads contacts
+class MessageWithContact(Message):
+    contact: Optional[MessageContact] = None
+
+class MessageIngestionStats(BaseModel):
+    queue_depth: int
+    max_queue_size: int
+    received: int
+    written: int
+    failed: int
+    batches: int
+    blocked_submits: int
+    blocked_seconds: float
+    last_batch_size: int
+    last_flush_ms: float
+    avg_flush_ms: float
+
+class BackfillStatus(BaseModel):
+    running: bool
+    dialogs: int
+    completed_dialogs: int
+    messages: int
+
+class InboxSummary(BaseModel):
+    unresponded_count: int
+    oldest_unresponded_at: Optional[datetime] = None
+    # Messages without a category count under ""
+    by_category: Dict[str, int] = {}
+    by_ai_category: Dict[str, int] = {}
+    by_contact: Dict[int, int] = {}
+
+# Result of categorizing a user's uncategorized messages in bulk
+class MessageCategorizationSummary(BaseModel):
+    categorized: int
+    failed: int
+    local: int = 0
+    llm: int = 0
+
+class MessageSearchHit(BaseModel):
+    message: Message
+    rank: float  # Higher is a better match
+    snippet: str  # Matched terms wrapped in <mark></mark>
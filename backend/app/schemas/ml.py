@@ -1,4 +1,4 @@
-from typing import Dict, Optional
+from typing import Any, Dict, List, Optional
 from datetime import datetime
 from pydantic import BaseModel
 
@@ -15,6 +15,25 @@ class MLPrediction(BaseModel):
     confidence_scores: Dict[str, float]
 
 
+class MLBatchPredictionRequest(BaseModel):
+    """
+    Schema for a batch prediction request.
+    
+    Lists the messages to categorize in a single model call.
+    """
+    message_ids: List[int]
+
+
+class MLBatchPrediction(BaseModel):
+    """
+    Schema for batch prediction results.
+    
+    Contains one prediction per found message and the IDs that were not found.
+    """
+    predictions: List[MLPrediction]
+    missing_ids: List[int] = []
+
+
 class MLFeedback(BaseModel):
     """
     Schema for ML feedback submission.
@@ -41,4 +60,46 @@ class MLStats(BaseModel):
     category_distribution: Dict[str, int]
     recent_feedback_count: int
     model_exists: bool
-    last_trained: Optional[datetime] = None 
\ No newline at end of file
+    last_trained: Optional[datetime] = None
+    model_loaded_at: Optional[datetime] = None
+    model_load_time_ms: Optional[float] = None
+    model_memory_bytes: Optional[int] = None
+    model_type: str = "random_forest"
+    online_updates: Optional[int] = None 
+
+
+class MLTrainingJob(BaseModel):
+    """
+    Schema for a background retraining job.
+    
+    Reports the job's status, progress and, once finished, the trained
+    model version and its metrics.
+    """
+    id: str
+    status: str
+    stage: str
+    progress: float
+    version: Optional[str] = None
+    metrics: Dict[str, Any] = {}
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    
+    class Config:
+        orm_mode = True
+
+
+class AICacheStats(BaseModel):
+    """
+    Schema for LLM categorization cache statistics.
+    
+    Hit counts are per process; ``shared_tier`` is set when results are
+    also stored in the database.
+    """
+    hits: int
+    misses: int
+    hit_rate: float
+    entries: int
+    shared_tier: bool
+    prompt_version: str
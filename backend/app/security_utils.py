@@ -0,0 +1,124 @@
+from collections import OrderedDict
+from cryptography.fernet import Fernet, InvalidToken, MultiFernet
+import hashlib
+import os
+import base64
+import binascii
+import threading
+import time
+
+class DecryptedSessionCache:
+    """
+    Bounded, TTL-evicting cache of decrypted sessions.
+
+    Keyed by a SHA-256 digest of the ciphertext, so plaintext sessions are
+    never used as keys. Plaintexts are held in bytearrays that are zeroed
+    when evicted, expired or cleared (copies already handed out as ``str``
+    can't be wiped).
+    """
+
+    def __init__(self, max_entries=1024, ttl=300.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def digest(encrypted_session):
+        return hashlib.sha256(encrypted_session.encode()).digest()
+
+    def get(self, encrypted_session):
+        key = self.digest(encrypted_session)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= time.monotonic():
+                self._evict(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1].decode()
+
+    def set(self, encrypted_session, session_string):
+        if self.max_entries <= 0 or self.ttl <= 0:
+            return
+        key = self.digest(encrypted_session)
+        with self._lock:
+            if key in self._entries:
+                self._evict(key)
+            self._entries[key] = (time.monotonic() + self.ttl, bytearray(session_string.encode()))
+            while len(self._entries) > self.max_entries:
+                self._evict(next(iter(self._entries)))
+
+    def clear(self):
+        with self._lock:
+            for key in list(self._entries):
+                self._evict(key)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _evict(self, key):
+        _, plaintext = self._entries.pop(key)
+        plaintext[:] = bytes(len(plaintext))
+
+class SessionEncryptor:
+    def __init__(self, key=None, old_keys=(), cache_size=1024, cache_ttl=300.0):
+        # Generate or use provided key
+        if key:
+            self.key = key
+        else:
+            self.key = os.environ.get('SESSION_ENCRYPTION_KEY') or Fernet.generate_key()
+        # Encrypts with the current key; retired keys still decrypt until rotation is done
+        self.primary = Fernet(self.key)
+        self.cipher = MultiFernet([self.primary] + [Fernet(old_key) for old_key in old_keys if old_key])
+        self.cache = DecryptedSessionCache(max_entries=cache_size, ttl=cache_ttl)
+
+    @staticmethod
+    def is_encrypted(stored_session):
+        """Whether a stored session is a ciphertext of this class rather than a plaintext session string"""
+        try:
+            token = base64.urlsafe_b64decode(stored_session)
+            # Fernet tokens are base64 too, and start with version byte 0x80
+            return base64.urlsafe_b64decode(token)[:1] == b'\x80'
+        except (binascii.Error, ValueError):
+            return False
+
+    def encrypt_session(self, session_string):
+        """Encrypt a session string"""
+        if not session_string:
+            return None
+        encrypted = self.primary.encrypt(session_string.encode())
+        return base64.urlsafe_b64encode(encrypted).decode()
+
+    def decrypt_session(self, encrypted_session):
+        """Decrypt a session string, reusing recent results"""
+        if not encrypted_session:
+            return None
+        session_string = self.cache.get(encrypted_session)
+        if session_string is None:
+            decoded = base64.urlsafe_b64decode(encrypted_session)
+            session_string = self.cipher.decrypt(decoded).decode()
+            self.cache.set(encrypted_session, session_string)
+        return session_string
+
+    def rotate_session(self, encrypted_session):
+        """
+        Re-encrypt a session under the current key.
+
+        Returns the new ciphertext, or None if the session already uses the
+        current key (or is empty).
+        """
+        if not encrypted_session:
+            return None
+        decoded = base64.urlsafe_b64decode(encrypted_session)
+        try:
+            self.primary.decrypt(decoded)
+            return None
+        except InvalidToken:
+            pass
+        return base64.urlsafe_b64encode(self.cipher.rotate(decoded)).decode()
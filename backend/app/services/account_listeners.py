@@ -0,0 +1,119 @@
+import asyncio
+import logging
+from typing import Callable, Dict
+
+from telethon import TelegramClient, events
+
+from app.db import models
+from app.services.message_ingestion import message_ingestor
+from app.services.telegram_pool import _default_client_factory
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+class AccountListeners:
+    """
+    Streams the incoming messages of connected Telegram accounts into the database.
+
+    Each account gets a client of its own that stays connected for as long
+    as the account is, so Telegram keeps pushing its updates; pooled clients
+    are disconnected when idle and can't be relied on to listen. Every
+    incoming message is submitted to the ingestor with its owner, so it
+    shows up in that user's listings, inbox summary and search.
+    """
+
+    def __init__(
+        self,
+        ingestor=None,
+        client_factory: Callable[[str], TelegramClient] = _default_client_factory,
+        session_factory=None,
+    ):
+        self.ingestor = ingestor or message_ingestor
+        self.client_factory = client_factory
+        self._session_factory = session_factory
+        self._clients: Dict[int, TelegramClient] = {}
+        self._lock = asyncio.Lock()
+
+    @property
+    def session_factory(self):
+        if self._session_factory is None:
+            from app.db.database import SessionLocal
+            self._session_factory = SessionLocal
+        return self._session_factory
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+    async def start(self) -> None:
+        """Listen on every account that has a stored Telegram session."""
+        sessions = await asyncio.to_thread(self._load_sessions)
+        for user_id, session_string in sessions.items():
+            try:
+                await self.attach(user_id, session_string)
+            except Exception as e:
+                logger.error(f"Could not listen for messages of user {user_id}: {str(e)}")
+
+    async def attach(self, user_id: int, session_string: str) -> None:
+        """
+        Start listening on a user's account, replacing any earlier client of that user.
+
+        Args:
+            user_id: Owner of the account
+            session_string: Decrypted Telegram session string
+        """
+        client = self.client_factory(session_string)
+        try:
+            await client.connect()
+        except Exception:
+            await self._disconnect(client)
+            raise
+        client.add_event_handler(self._handler(user_id), events.NewMessage(incoming=True))
+        async with self._lock:
+            previous = self._clients.pop(user_id, None)
+            self._clients[user_id] = client
+        if previous is not None:
+            await self._disconnect(previous)
+        logger.info(f"Listening for messages of user {user_id}")
+
+    async def detach(self, user_id: int) -> None:
+        """Stop listening on a user's account (e.g. after the session is reset)."""
+        async with self._lock:
+            client = self._clients.pop(user_id, None)
+        if client is not None:
+            await self._disconnect(client)
+
+    async def close(self) -> None:
+        """Disconnect every account's client."""
+        async with self._lock:
+            clients = list(self._clients.values())
+            self._clients.clear()
+        for client in clients:
+            await self._disconnect(client)
+
+    def _handler(self, user_id: int):
+        async def handle(event) -> None:
+            if event.message.out:
+                return
+            await self.ingestor.submit(event.message, user_id=user_id)
+        return handle
+
+    def _load_sessions(self) -> Dict[int, str]:
+        db = self.session_factory()
+        try:
+            return dict(
+                db.query(models.User.id, models.User.telegram_session).filter(
+                    models.User.telegram_session.isnot(None)
+                )
+            )
+        finally:
+            db.close()
+
+    @staticmethod
+    async def _disconnect(client: TelegramClient) -> None:
+        try:
+            await client.disconnect()
+        except Exception as e:
+            logger.warning(f"Error disconnecting Telegram client: {str(e)}")
+
+# Create a singleton instance
+account_listeners = AccountListeners()
@@ -0,0 +1,137 @@
+import argparse
+import asyncio
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app import models
+from app.services.ai_categorization import ai_categorization
+from app.services.cascade_categorization import cascade_categorizer, LOCAL_TIER, LLM_TIER
+from app.services.inbox_summary import apply_changes, inbox_entry
+from app.services.message_listing import count_cache
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+# Messages loaded, categorized and committed per round
+CATEGORIZE_BATCH_SIZE = 200
+
+async def categorize_uncategorized_messages(
+    db: AsyncSession,
+    user_id: int,
+    limit: Optional[int] = None,
+    batch_size: int = CATEGORIZE_BATCH_SIZE,
+) -> Dict[str, int]:
+    """
+    Categorize every message of a user that has no AI category yet.
+
+    Messages are processed in batches: each batch is scored by the local
+    model, the low-confidence rest is categorized concurrently through the
+    shared AI client (bounded concurrency, per-provider rate limits,
+    retries), and results are written back with one bulk update and commit.
+    Database work goes through the async session, so other requests keep
+    being served while a batch is loaded or written.
+
+    Args:
+        db: Async database session
+        user_id: Owner of the messages
+        limit: Optional maximum number of messages to categorize
+        batch_size: Messages per batch
+
+    Returns:
+        Dict with ``categorized`` and ``failed`` counts, and how many
+        messages each tier (``local``, ``llm``) answered
+    """
+    categorized = 0
+    failed = 0
+    tiers = {LOCAL_TIER: 0, LLM_TIER: 0}
+    last_id = 0
+
+    while limit is None or categorized + failed < limit:
+        size = batch_size if limit is None else min(batch_size, limit - categorized - failed)
+
+        # Keyset on id so failed rows (left uncategorized) are not re-fetched
+        batch = (await db.execute(
+            select(
+                models.Message.id, models.Message.message_text, models.Message.is_responded,
+                models.Message.category, models.Message.contact_id, models.Message.timestamp
+            )
+            .where(
+                models.Message.user_id == user_id,
+                models.Message.ai_category.is_(None),
+                models.Message.id > last_id,
+            )
+            .order_by(models.Message.id)
+            .limit(size)
+        )).all()
+        if not batch:
+            break
+        last_id = batch[-1].id
+
+        results = await cascade_categorizer.categorize_messages([row.message_text for row in batch])
+
+        now = datetime.now()
+        updates = []
+        moved, placed = [], []
+        for row, result in zip(batch, results):
+            # Leave messages whose provider call failed for a later run
+            if result.get("error"):
+                failed += 1
+                continue
+            updates.append({
+                "id": row.id,
+                "ai_category": result["category"],
+                "ai_confidence": result["confidence"],
+                "ai_reasoning": result["reasoning"],
+                "ai_categorized_at": now,
+                "ai_tier": result["tier"],
+            })
+            tiers[result["tier"]] += 1
+            # Unresponded ones move to the new AI category in the inbox summary
+            values = {**row._asdict(), "user_id": user_id, "ai_category": None}
+            moved.append(inbox_entry(values))
+            placed.append(inbox_entry({**values, "ai_category": result["category"]}))
+
+        if updates:
+            await db.run_sync(_write_results, updates, moved, placed)
+            await db.commit()
+            count_cache.invalidate(user_id)
+        categorized += len(updates)
+        logger.info(f"Categorized {categorized} messages for user {user_id} ({failed} failed)")
+
+    return {"categorized": categorized, "failed": failed, **tiers}
+
+def _write_results(db: Session, updates: List[Dict], moved: List, placed: List) -> None:
+    db.bulk_update_mappings(models.Message, updates)
+    apply_changes(db.connection(), moved, placed)
+
+async def _main() -> None:
+    from app.db.database import AsyncSessionLocal, dispose_async_engine
+
+    parser = argparse.ArgumentParser(description="Categorize all uncategorized messages of a user")
+    parser.add_argument("--user-id", type=int, required=True)
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--batch-size", type=int, default=CATEGORIZE_BATCH_SIZE)
+    args = parser.parse_args()
+
+    db = AsyncSessionLocal()
+    try:
+        result = await categorize_uncategorized_messages(
+            db, user_id=args.user_id, limit=args.limit, batch_size=args.batch_size
+        )
+        print(
+            f"Categorized {result['categorized']} messages "
+            f"({result['local']} local, {result['llm']} by the LLM), {result['failed']} failed"
+        )
+    finally:
+        await db.close()
+        await ai_categorization.close()
+        await dispose_async_engine()
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_main())
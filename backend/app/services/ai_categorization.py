@@ -1,17 +1,140 @@
 import os
+import asyncio
 import logging
-from typing import Dict, Optional, Literal, Union
+import random
+from typing import Dict, List, Optional, Literal, Union
 import aiohttp
 import json
 from datetime import datetime
 
 from app.core.config import settings
+from app.core.metrics import ai_request_errors, ai_request_latency, ai_tokens
+from app.services.rate_limiter import TokenBucket
+from app.services.categorization_cache import categorization_cache, prompt_version
 
 # Set up logger
 logger = logging.getLogger(__name__)
 
 CategoryType = Literal["not_important", "followup_required", "unsure_ask_user"]
 
+# System prompt shared by both providers
+SYSTEM_PROMPT = """
+You are a message categorization assistant. Your task is to categorize incoming messages into one of three categories:
+1. not_important - Message is routine, doesn't require attention or response
+2. followup_required - Message needs a response or action
+3. unsure_ask_user - You're not confident about categorization, need human judgment
+
+Respond with a JSON object containing:
+- category: one of the three categories above
+- confidence: a score between 0 and 1 indicating your confidence
+- reasoning: brief explanation for your categorization
+"""
+
+# System prompt for categorizing several messages in one request
+BATCH_SYSTEM_PROMPT = """
+You are a message categorization assistant. Your task is to categorize each incoming message into one of three categories:
+1. not_important - Message is routine, doesn't require attention or response
+2. followup_required - Message needs a response or action
+3. unsure_ask_user - You're not confident about categorization, need human judgment
+
+You will receive a JSON array of messages, each with an "index" and a "text".
+Categorize every message independently and respond with a JSON object containing
+"results": an array with one entry per message, each containing:
+- index: the index of the message
+- category: one of the three categories above
+- confidence: a score between 0 and 1 indicating your confidence
+- reasoning: brief explanation for your categorization
+"""
+
+CATEGORIES = ("not_important", "followup_required", "unsure_ask_user")
+
+# Part of every cache key, so editing either prompt invalidates cached results
+PROMPT_VERSION = prompt_version(SYSTEM_PROMPT + BATCH_SYSTEM_PROMPT)
+
+# Output token budget per message in a batched request
+BATCH_TOKENS_PER_MESSAGE = 150
+
+# HTTP statuses worth retrying: rate limited, overloaded or transient server errors
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504, 529}
+
+# Display names used in error messages
+PROVIDER_NAMES = {"openai": "OpenAI", "anthropic": "Anthropic"}
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header given in seconds."""
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+def _extract_json(content: str):
+    """Parse the outermost JSON object in a model response."""
+    json_start = content.find('{')
+    json_end = content.rfind('}') + 1
+    if json_start == -1 or json_end == 0:
+        raise ValueError(f"No JSON found in response: {content}")
+    return json.loads(content[json_start:json_end])
+
+def _validate_item(item) -> Dict:
+    """Check one categorization against the expected format and categories."""
+    if not isinstance(item, dict) or not {"category", "confidence", "reasoning"} <= item.keys():
+        raise ValueError("Invalid response format")
+    if item["category"] not in CATEGORIES:
+        raise ValueError(f"Invalid category: {item['category']}")
+    confidence = float(item["confidence"])
+    if not 0.0 <= confidence <= 1.0:
+        raise ValueError(f"Invalid confidence: {item['confidence']}")
+    return {"category": item["category"], "confidence": confidence, "reasoning": str(item["reasoning"])}
+
+class BatchParseError(ValueError):
+    """Batched response that doesn't match the requested messages."""
+
+def parse_batch_response(content: str, count: int) -> List[Dict]:
+    """
+    Parse a batched categorization response.
+    
+    Args:
+        content: Raw model output
+        count: Number of messages in the request
+        
+    Returns:
+        List[Dict]: One validated categorization per message, in index order
+        
+    Raises:
+        BatchParseError: If the output is not valid JSON, an item is
+            invalid, or any index is missing
+    """
+    try:
+        data = _extract_json(content)
+        items = data.get("results") if isinstance(data, dict) else None
+        if not isinstance(items, list):
+            raise ValueError("Response has no results array")
+        
+        results: Dict[int, Dict] = {}
+        for item in items:
+            index = item.get("index") if isinstance(item, dict) else None
+            if not isinstance(index, int) or not 0 <= index < count:
+                raise ValueError(f"Invalid index: {index}")
+            results[index] = _validate_item(item)
+    except (ValueError, TypeError) as e:
+        raise BatchParseError(f"Failed to parse batched response: {str(e)}")
+    
+    if len(results) != count:
+        raise BatchParseError(f"Expected {count} results, got {len(results)}")
+    return [results[i] for i in range(count)]
+
+class ProviderHTTPError(ValueError):
+    """Non-200 response from an AI provider."""
+    
+    def __init__(self, provider: str, status: int, body: str, retry_after: Optional[float] = None):
+        super().__init__(f"{provider} API error: {status} - {body}")
+        self.status = status
+        self.retry_after = retry_after
+    
+    @property
+    def retryable(self) -> bool:
+        return self.status in RETRYABLE_STATUSES
+
 class AICategorization:
     """Service for AI-based message categorization using OpenAI or Anthropic."""
     
@@ -32,6 +155,194 @@ class AICategorization:
         
         if self.provider == "anthropic" and not self.anthropic_api_key:
             logger.error("Anthropic API key not configured")
+        
+        # One pooled HTTP session for the app's lifetime, created on first use
+        self._session: Optional[aiohttp.ClientSession] = None
+        
+        # Bounds concurrent provider requests across all callers
+        self._semaphore = asyncio.Semaphore(settings.AI_MAX_CONCURRENCY)
+        
+        # In-flight provider calls by cache key, so concurrent duplicates share one request
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        
+        # Per-provider request rate limits
+        self._rate_limiters = {
+            "openai": TokenBucket(settings.OPENAI_REQUESTS_PER_SECOND, settings.OPENAI_REQUESTS_PER_SECOND),
+            "anthropic": TokenBucket(settings.ANTHROPIC_REQUESTS_PER_SECOND, settings.ANTHROPIC_REQUESTS_PER_SECOND),
+        }
+    
+    async def get_session(self) -> aiohttp.ClientSession:
+        """Get the shared HTTP session, creating it on first use."""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=settings.AI_MAX_CONCURRENCY),
+                timeout=aiohttp.ClientTimeout(total=settings.AI_REQUEST_TIMEOUT),
+            )
+        return self._session
+    
+    async def close(self) -> None:
+        """Close the shared HTTP session."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+    
+    async def categorize_messages(self, message_texts: List[str]) -> List[Dict]:
+        """
+        Categorize many messages concurrently.
+        
+        Requests share one HTTP session and are bounded by the configured
+        concurrency and per-provider rate limit. With ``AI_PROMPT_BATCH_SIZE``
+        above 1, uncached messages are packed that many to a request.
+        
+        Returns:
+            List[Dict]: One categorization per input, in the same order
+        """
+        if settings.AI_PROMPT_BATCH_SIZE <= 1:
+            return await asyncio.gather(*(self.categorize_message(text) for text in message_texts))
+        
+        results: List[Optional[Dict]] = [None] * len(message_texts)
+        # Positions of each distinct uncached text, keyed by cache key
+        pending: Dict[str, List[int]] = {}
+        for i, text in enumerate(message_texts):
+            if not text:
+                results[i] = await self.categorize_message(text)
+                continue
+            key = categorization_cache.make_key(text, self.provider, self.model, PROMPT_VERSION)
+            if key in pending:
+                pending[key].append(i)
+                continue
+            cached = await categorization_cache.get(key) if settings.AI_CACHE_ENABLED else None
+            if cached is not None:
+                results[i] = {**cached, "cached": True, "timestamp": datetime.now().isoformat()}
+            else:
+                pending[key] = [i]
+        
+        keys = list(pending)
+        size = settings.AI_PROMPT_BATCH_SIZE
+        chunks = [keys[start:start + size] for start in range(0, len(keys), size)]
+        chunk_results = await asyncio.gather(*(
+            self._categorize_chunk([message_texts[pending[key][0]] for key in chunk])
+            for chunk in chunks
+        ))
+        
+        for chunk, categorizations in zip(chunks, chunk_results):
+            for key, result in zip(chunk, categorizations):
+                if settings.AI_CACHE_ENABLED and not result.get("error"):
+                    value = {field: result[field] for field in ("category", "confidence", "reasoning")}
+                    await categorization_cache.set(key, value, PROMPT_VERSION)
+                for i in pending[key]:
+                    results[i] = dict(result)
+        return results
+    
+    async def _categorize_chunk(self, message_texts: List[str]) -> List[Dict]:
+        """
+        Categorize messages with one batched request.
+        
+        If the output can't be parsed or validated, the chunk is split in
+        half and each half retried; a single message falls back to the
+        one-message prompt. Request failures mark every message as failed.
+        """
+        if len(message_texts) == 1:
+            return [await self.categorize_message(message_texts[0])]
+        
+        try:
+            categorizations = await self._categorize_batch(message_texts)
+        except BatchParseError as e:
+            mid = len(message_texts) // 2
+            logger.warning(f"Invalid batched response for {len(message_texts)} messages, splitting: {str(e)}")
+            first, second = await asyncio.gather(
+                self._categorize_chunk(message_texts[:mid]),
+                self._categorize_chunk(message_texts[mid:]),
+            )
+            return first + second
+        except Exception as e:
+            logger.error(f"Error in batched AI categorization: {str(e)}")
+            return [self._error_result(e) for _ in message_texts]
+        
+        timestamp = datetime.now().isoformat()
+        return [{**categorization, "timestamp": timestamp} for categorization in categorizations]
+    
+    async def _categorize_batch(self, message_texts: List[str]) -> List[Dict]:
+        """Send several messages in one request and parse the indexed results."""
+        content = json.dumps([{"index": i, "text": text} for i, text in enumerate(message_texts)])
+        output = await self._complete(
+            BATCH_SYSTEM_PROMPT,
+            content,
+            max_tokens=BATCH_TOKENS_PER_MESSAGE * len(message_texts) + 200,
+        )
+        return parse_batch_response(output, len(message_texts))
+    
+    @staticmethod
+    def _error_result(error: Exception) -> Dict:
+        return {
+            "category": "unsure_ask_user",
+            "confidence": 0.0,
+            "reasoning": f"Error occurred during categorization: {str(error)}",
+            "timestamp": datetime.now().isoformat(),
+            "error": True
+        }
+    
+    async def _post_json(self, provider: str, url: str, headers: Dict, payload: Dict) -> Dict:
+        """
+        POST a JSON request to a provider with rate limiting and retries.
+        
+        Retries with exponential backoff and jitter on 429/5xx responses and
+        connection errors, honouring ``Retry-After`` when present.
+        """
+        session = await self.get_session()
+        limiter = self._rate_limiters[provider]
+        attempt = 0
+        
+        while True:
+            attempt += 1
+            try:
+                async with self._semaphore:
+                    await limiter.acquire()
+                    # Timed after the rate limiter, so waits for tokens don't count as provider latency
+                    with ai_request_latency.labels(provider).time():
+                        async with session.post(url, headers=headers, json=payload) as response:
+                            if response.status != 200:
+                                error_text = await response.text()
+                                raise ProviderHTTPError(
+                                    PROVIDER_NAMES[provider],
+                                    response.status,
+                                    error_text,
+                                    retry_after=_parse_retry_after(response.headers.get("Retry-After")),
+                                )
+                            data = await response.json()
+                self._record_usage(provider, data.get("usage") or {})
+                return data
+            except ProviderHTTPError as e:
+                ai_request_errors.labels(provider, f"http_{e.status}").inc()
+                if not e.retryable or attempt >= settings.AI_MAX_RETRIES:
+                    raise
+                if e.status == 429:
+                    limiter.drain()
+                delay = e.retry_after or self._backoff(attempt)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                ai_request_errors.labels(provider, type(e).__name__).inc()
+                if attempt >= settings.AI_MAX_RETRIES:
+                    raise
+                delay = self._backoff(attempt)
+            
+            logger.warning(f"{provider} request failed (attempt {attempt}), retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+    
+    @staticmethod
+    def _record_usage(provider: str, usage: Dict) -> None:
+        """Count the tokens a provider reports for one request."""
+        # OpenAI reports prompt/completion tokens, Anthropic input/output tokens
+        prompt = usage.get("prompt_tokens", usage.get("input_tokens"))
+        completion = usage.get("completion_tokens", usage.get("output_tokens"))
+        if prompt:
+            ai_tokens.labels(provider, "prompt").inc(prompt)
+        if completion:
+            ai_tokens.labels(provider, "completion").inc(completion)
+    
+    @staticmethod
+    def _backoff(attempt: int) -> float:
+        """Exponential backoff with full jitter."""
+        return random.uniform(0, min(30.0, 0.5 * 2 ** attempt))
     
     async def categorize_message(self, message_text: str) -> Dict:
         """
@@ -59,10 +370,10 @@ class AICategorization:
             }
         
         try:
-            if self.provider == "openai":
-                result = await self._categorize_with_openai(message_text)
-            else:  # anthropic
-                result = await self._categorize_with_anthropic(message_text)
+            if settings.AI_CACHE_ENABLED:
+                result = await self._categorize_cached(message_text)
+            else:
+                result = await self._categorize_uncached(message_text)
                 
             # Add timestamp
             result["timestamp"] = datetime.now().isoformat()
@@ -71,135 +382,157 @@ class AICategorization:
         except Exception as e:
             logger.error(f"Error categorizing message: {str(e)}")
             # Return default category when AI fails
-            return {
-                "category": "unsure_ask_user",
-                "confidence": 0.0,
-                "reasoning": f"Error occurred during categorization: {str(e)}",
-                "timestamp": datetime.now().isoformat()
+            return self._error_result(e)
+    
+    @property
+    def model(self) -> str:
+        """Model name of the active provider."""
+        return self.openai_model if self.provider == "openai" else self.anthropic_model
+    
+    async def _categorize_uncached(self, message_text: str) -> Dict:
+        """Categorize a message with the active provider."""
+        if self.provider == "openai":
+            return await self._categorize_with_openai(message_text)
+        return await self._categorize_with_anthropic(message_text)
+    
+    async def _categorize_cached(self, message_text: str) -> Dict:
+        """
+        Categorize a message, reusing results for identical (normalized) text.
+        
+        Checks the categorization cache first; concurrent requests for the
+        same key wait for a single provider call. Failures are not cached.
+        """
+        key = categorization_cache.make_key(message_text, self.provider, self.model, PROMPT_VERSION)
+        cached = await categorization_cache.get(key)
+        if cached is not None:
+            return {**cached, "cached": True}
+        
+        pending = self._in_flight.get(key)
+        if pending is not None:
+            return dict(await asyncio.shield(pending))
+        
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            result = await self._categorize_uncached(message_text)
+            value = {
+                "category": result["category"],
+                "confidence": result["confidence"],
+                "reasoning": result["reasoning"],
             }
+            await categorization_cache.set(key, value, PROMPT_VERSION)
+            future.set_result(value)
+            return result
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Avoid "exception was never retrieved" warnings when nobody was waiting
+            future.exception()
+            raise
+        finally:
+            del self._in_flight[key]
     
-    async def _categorize_with_openai(self, message_text: str) -> Dict:
-        """Categorize a message using OpenAI's API."""
+    async def _complete(self, system: str, content: str, max_tokens: int = 1000) -> str:
+        """Send one prompt to the active provider and return the raw output text."""
+        if self.provider == "openai":
+            return await self._complete_with_openai(system, content, max_tokens)
+        return await self._complete_with_anthropic(system, content, max_tokens)
+    
+    async def _complete_with_openai(self, system: str, content: str, max_tokens: int = 1000) -> str:
+        """Send one prompt to OpenAI's API in JSON mode."""
         if not self.openai_api_key:
             raise ValueError("OpenAI API key not configured")
         
-        async with aiohttp.ClientSession() as session:
-            headers = {
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {self.openai_api_key}"
-            }
+        headers = {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {self.openai_api_key}"
+        }
+        
+        payload = {
+            "model": self.openai_model,
+            "messages": [
+                {"role": "system", "content": system},
+                {"role": "user", "content": content}
+            ],
+            "response_format": {"type": "json_object"},
+            "max_tokens": max_tokens
+        }
+        
+        data = await self._post_json(
+            "openai",
+            "https://api.openai.com/v1/chat/completions",
+            headers,
+            payload
+        )
+        return data["choices"][0]["message"]["content"]
+    
+    async def _complete_with_anthropic(self, system: str, content: str, max_tokens: int = 1000) -> str:
+        """Send one prompt to Anthropic's API."""
+        if not self.anthropic_api_key:
+            raise ValueError("Anthropic API key not configured")
+        
+        headers = {
+            "Content-Type": "application/json",
+            "x-api-key": self.anthropic_api_key,
+            "anthropic-version": "2023-06-01"
+        }
+        
+        payload = {
+            "model": self.anthropic_model,
+            "system": system,
+            "messages": [
+                {"role": "user", "content": content}
+            ],
+            "max_tokens": max_tokens
+        }
+        
+        data = await self._post_json(
+            "anthropic",
+            "https://api.anthropic.com/v1/messages",
+            headers,
+            payload
+        )
+        return data["content"][0]["text"]
+    
+    async def _categorize_with_openai(self, message_text: str) -> Dict:
+        """Categorize a message using OpenAI's API."""
+        content = await self._complete_with_openai(SYSTEM_PROMPT, message_text)
+        
+        try:
+            result = json.loads(content)
+            # Validate response format
+            if "category" not in result or "confidence" not in result or "reasoning" not in result:
+                raise ValueError("Invalid response format from OpenAI")
             
-            payload = {
-                "model": self.openai_model,
-                "messages": [
-                    {"role": "system", "content": """
-                    You are a message categorization assistant. Your task is to categorize incoming messages into one of three categories:
-                    1. not_important - Message is routine, doesn't require attention or response
-                    2. followup_required - Message needs a response or action
-                    3. unsure_ask_user - You're not confident about categorization, need human judgment
-                    
-                    Respond with a JSON object containing:
-                    - category: one of the three categories above
-                    - confidence: a score between 0 and 1 indicating your confidence
-                    - reasoning: brief explanation for your categorization
-                    """},
-                    {"role": "user", "content": message_text}
-                ],
-                "response_format": {"type": "json_object"}
-            }
+            # Validate category
+            if result["category"] not in CATEGORIES:
+                raise ValueError(f"Invalid category: {result['category']}")
             
-            async with session.post(
-                "https://api.openai.com/v1/chat/completions",
-                headers=headers,
-                json=payload
-            ) as response:
-                if response.status != 200:
-                    error_text = await response.text()
-                    raise ValueError(f"OpenAI API error: {response.status} - {error_text}")
-                
-                data = await response.json()
-                content = data["choices"][0]["message"]["content"]
-                
-                try:
-                    result = json.loads(content)
-                    # Validate response format
-                    if "category" not in result or "confidence" not in result or "reasoning" not in result:
-                        raise ValueError("Invalid response format from OpenAI")
-                    
-                    # Validate category
-                    if result["category"] not in ["not_important", "followup_required", "unsure_ask_user"]:
-                        raise ValueError(f"Invalid category: {result['category']}")
-                    
-                    return result
-                except json.JSONDecodeError:
-                    raise ValueError(f"Failed to parse JSON response from OpenAI: {content}")
+            return result
+        except json.JSONDecodeError:
+            raise ValueError(f"Failed to parse JSON response from OpenAI: {content}")
     
     async def _categorize_with_anthropic(self, message_text: str) -> Dict:
         """Categorize a message using Anthropic's API."""
-        if not self.anthropic_api_key:
-            raise ValueError("Anthropic API key not configured")
+        content = await self._complete_with_anthropic(SYSTEM_PROMPT, message_text)
         
-        async with aiohttp.ClientSession() as session:
-            headers = {
-                "Content-Type": "application/json",
-                "x-api-key": self.anthropic_api_key,
-                "anthropic-version": "2023-06-01"
-            }
-            
-            system_prompt = """
-            You are a message categorization assistant. Your task is to categorize incoming messages into one of three categories:
-            1. not_important - Message is routine, doesn't require attention or response
-            2. followup_required - Message needs a response or action
-            3. unsure_ask_user - You're not confident about categorization, need human judgment
+        try:
+            # Extract JSON from the response
+            result = _extract_json(content)
             
-            Respond with a JSON object containing:
-            - category: one of the three categories above
-            - confidence: a score between 0 and 1 indicating your confidence
-            - reasoning: brief explanation for your categorization
-            """
+            # Validate response format
+            if "category" not in result or "confidence" not in result or "reasoning" not in result:
+                raise ValueError("Invalid response format from Anthropic")
             
-            payload = {
-                "model": self.anthropic_model,
-                "system": system_prompt,
-                "messages": [
-                    {"role": "user", "content": message_text}
-                ],
-                "max_tokens": 1000
-            }
+            # Validate category
+            if result["category"] not in CATEGORIES:
+                raise ValueError(f"Invalid category: {result['category']}")
             
-            async with session.post(
-                "https://api.anthropic.com/v1/messages",
-                headers=headers,
-                json=payload
-            ) as response:
-                if response.status != 200:
-                    error_text = await response.text()
-                    raise ValueError(f"Anthropic API error: {response.status} - {error_text}")
-                
-                data = await response.json()
-                content = data["content"][0]["text"]
-                
-                try:
-                    # Extract JSON from the response
-                    json_start = content.find('{')
-                    json_end = content.rfind('}') + 1
-                    if json_start == -1 or json_end == 0:
-                        raise ValueError(f"No JSON found in response: {content}")
-                    
-                    json_str = content[json_start:json_end]
-                    result = json.loads(json_str)
-                    
-                    # Validate response format
-                    if "category" not in result or "confidence" not in result or "reasoning" not in result:
-                        raise ValueError("Invalid response format from Anthropic")
-                    
-                    # Validate category
-                    if result["category"] not in ["not_important", "followup_required", "unsure_ask_user"]:
-                        raise ValueError(f"Invalid category: {result['category']}")
-                    
-                    return result
-                except (json.JSONDecodeError, ValueError) as e:
-                    raise ValueError(f"Failed to parse response from Anthropic: {str(e)} - {content}")
+            return result
+        except (json.JSONDecodeError, ValueError) as e:
+            raise ValueError(f"Failed to parse response from Anthropic: {str(e)} - {content}")
 
 # Create a singleton instance
 ai_categorization = AICategorization() 
\ No newline at end of file
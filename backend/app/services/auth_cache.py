@@ -0,0 +1,203 @@
+import logging
+import threading
+from abc import ABC, abstractmethod
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from jose import jwt
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from app.core.config import settings
+from app.core.security import ALGORITHM
+from app.db import models
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+class TokenCache:
+    """
+    Memoizes JWT verification.
+
+    A token that verified once keeps its payload until the token's ``exp``,
+    so repeat requests skip the signature check. Failed verifications are
+    not cached.
+    """
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def decode(self, token: str) -> Dict[str, Any]:
+        """
+        Verify a token and return its payload.
+
+        Raises:
+            JWTError: If the token is invalid or expired
+        """
+        with self._lock:
+            payload = self._entries.get(token)
+            if payload is not None:
+                if payload.get("exp", 0) > time.time():
+                    self._entries.move_to_end(token)
+                    return payload
+                del self._entries[token]
+
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[ALGORITHM])
+        if "exp" in payload:
+            with self._lock:
+                self._entries[token] = payload
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return payload
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+class AuthCacheBackend(ABC):
+    """
+    Shared tier of the user cache, e.g. one store for every worker process.
+
+    Values are plain dicts of user column values.
+    """
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """The value stored under ``key``, or None if missing or expired."""
+
+    @abstractmethod
+    def set(self, key: str, value: Dict[str, Any], ttl: float) -> None:
+        """Store a value for ``ttl`` seconds."""
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Remove a value, if present."""
+
+class MemoryAuthCacheBackend(AuthCacheBackend):
+    """In-process stand-in for a shared backend."""
+
+    def __init__(self):
+        self._entries: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            self._entries.pop(key, None)
+            return None
+        return entry[1]
+
+    def set(self, key: str, value: Dict[str, Any], ttl: float) -> None:
+        self._entries[key] = (time.monotonic() + ttl, value)
+
+    def delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+class UserCache:
+    """
+    Short-lived cache of authenticated users.
+
+    The local tier is keyed by user id and token ``exp``; an entry lives for
+    ``ttl`` seconds or until the token expires, whichever comes first. An
+    optional shared tier (keyed by user id) is consulted on local misses.
+    Users are cached as column values and attached to the request's session
+    with ``merge(load=False)``, which issues no SQL, so endpoints get a normal
+    session-bound user they can modify.
+
+    Every flushed change to a user (new Telegram session, deactivation, ...)
+    invalidates that user in this process and in the shared tier. Bulk
+    updates bypass the ORM events, so their callers must :meth:`invalidate`
+    the users they change. Other processes' local tiers may serve the old
+    values for up to ``ttl``.
+    """
+
+    def __init__(self, ttl: float = 60.0, max_entries: int = 10000, shared: Optional[AuthCacheBackend] = None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.shared = shared
+        self._entries: "OrderedDict[Tuple[int, int], Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, db: Session, user_id: int, exp: int) -> Optional[models.User]:
+        """Get a cached user attached to ``db``, or None."""
+        if self.ttl <= 0:
+            return None
+
+        values = None
+        with self._lock:
+            entry = self._entries.get((user_id, exp))
+            if entry is not None:
+                if entry[0] > time.monotonic():
+                    self._entries.move_to_end((user_id, exp))
+                    values = entry[1]
+                else:
+                    del self._entries[(user_id, exp)]
+
+        if values is None and self.shared is not None:
+            try:
+                values = self.shared.get(self._shared_key(user_id))
+            except Exception as e:
+                logger.warning(f"Shared auth cache read failed: {str(e)}")
+            if values is not None:
+                self._store_local(user_id, exp, values)
+
+        if values is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+
+        user = models.User(**values)
+        make_transient_to_detached(user)
+        return db.merge(user, load=False)
+
+    def set(self, user: models.User, exp: int) -> None:
+        """Cache a user loaded for a token expiring at ``exp``."""
+        if self.ttl <= 0:
+            return
+        values = {column.key: getattr(user, column.key) for column in inspect(models.User).column_attrs}
+        self._store_local(user.id, exp, values)
+        if self.shared is not None:
+            try:
+                self.shared.set(self._shared_key(user.id), values, self.ttl)
+            except Exception as e:
+                logger.warning(f"Shared auth cache write failed: {str(e)}")
+
+    def invalidate(self, user_id: int) -> None:
+        """Forget a user in every tier."""
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == user_id]:
+                del self._entries[key]
+        if self.shared is not None:
+            try:
+                self.shared.delete(self._shared_key(user_id))
+            except Exception as e:
+                logger.warning(f"Shared auth cache delete failed: {str(e)}")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def _store_local(self, user_id: int, exp: int, values: Dict[str, Any]) -> None:
+        expires = min(time.monotonic() + self.ttl, time.monotonic() + (exp - time.time()))
+        with self._lock:
+            self._entries[(user_id, exp)] = (expires, values)
+            self._entries.move_to_end((user_id, exp))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    @staticmethod
+    def _shared_key(user_id: int) -> str:
+        return f"auth:user:{user_id}"
+
+# Create singleton instances
+token_cache = TokenCache(max_entries=settings.AUTH_CACHE_MAX_ENTRIES)
+user_cache = UserCache(ttl=settings.AUTH_USER_CACHE_TTL, max_entries=settings.AUTH_CACHE_MAX_ENTRIES)
+
+@event.listens_for(models.User, "after_update")
+@event.listens_for(models.User, "after_delete")
+def _invalidate_user(mapper, connection, target) -> None:
+    user_cache.invalidate(target.id)
@@ -0,0 +1,160 @@
+import asyncio
+import logging
+from collections import Counter
+from datetime import datetime
+from typing import Dict, FrozenSet, Iterable, List, Optional
+
+from app.core.config import settings
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+# Tiers that can answer a categorization request
+LOCAL_TIER = "local"
+LLM_TIER = "llm"
+
+# Category that always goes to the LLM, whatever the local confidence
+UNSURE_CATEGORY = "unsure_ask_user"
+
+class CascadeCategorizer:
+    """
+    Local-first message categorizer.
+
+    Messages are scored by the local model first; only those whose local
+    confidence is below ``threshold`` (or that come out as
+    ``unsure_ask_user``) are sent to the LLM. Every result records the tier
+    that answered in ``tier``. If the local model is not trained yet, every
+    message goes to the LLM; if an LLM call fails, the local prediction is
+    used when there is one.
+
+    The local model predicts the labels users trained it on, which need not
+    be the LLM's categories. Only local predictions that are one of the
+    LLM's ``categories`` can answer; any other label is escalated (and never
+    used as a fallback), so ``ai_category`` holds a single taxonomy.
+    """
+
+    def __init__(
+        self,
+        local=None,
+        remote=None,
+        threshold: Optional[float] = None,
+        enabled: Optional[bool] = None,
+        categories: Optional[Iterable[str]] = None,
+    ):
+        self._local = local
+        self._remote = remote
+        self._categories = frozenset(categories) if categories is not None else None
+        self.threshold = settings.AI_CASCADE_THRESHOLD if threshold is None else threshold
+        self.enabled = settings.AI_CASCADE_ENABLED if enabled is None else enabled
+        self.counts: Counter = Counter()
+
+    @property
+    def local(self):
+        if self._local is None:
+            from app.services.ml_engine import ml_engine
+            self._local = ml_engine
+        return self._local
+
+    @property
+    def remote(self):
+        if self._remote is None:
+            from app.services.ai_categorization import ai_categorization
+            self._remote = ai_categorization
+        return self._remote
+
+    @property
+    def categories(self) -> FrozenSet[str]:
+        """The LLM's categories; local predictions outside them are escalated."""
+        if self._categories is None:
+            from app.services.ai_categorization import CATEGORIES
+            self._categories = frozenset(CATEGORIES)
+        return self._categories
+
+    async def categorize_message(self, message_text: str) -> Dict:
+        """
+        Categorize one message, escalating to the LLM only when needed.
+
+        Returns:
+            Dict: The same fields as ``AICategorization.categorize_message``
+            plus ``tier`` ("local" or "llm")
+        """
+        return (await self.categorize_messages([message_text]))[0]
+
+    async def categorize_messages(self, message_texts: List[str]) -> List[Dict]:
+        """
+        Categorize many messages, scoring them locally in one batch.
+
+        Returns:
+            List[Dict]: One categorization per input, in the same order
+        """
+        results: List[Optional[Dict]] = [None] * len(message_texts)
+        local_predictions: List[Optional[Dict]] = [None] * len(message_texts)
+
+        if self.enabled and message_texts:
+            local_predictions = await self._predict_local(message_texts)
+
+        escalate = []
+        for i, prediction in enumerate(local_predictions):
+            # Empty messages are answered by the LLM client without a request
+            if prediction is not None and message_texts[i] and self._is_confident(prediction):
+                results[i] = self._local_result(prediction)
+            else:
+                escalate.append(i)
+
+        if escalate:
+            remote_results = await self.remote.categorize_messages([message_texts[i] for i in escalate])
+            for i, result in zip(escalate, remote_results):
+                if result.get("error") and self._is_llm_category(local_predictions[i]):
+                    # Provider failed; a low-confidence local answer beats none
+                    results[i] = self._local_result(local_predictions[i])
+                    results[i]["escalation_failed"] = True
+                else:
+                    results[i] = {**result, "tier": LLM_TIER}
+
+        self.counts.update(result["tier"] for result in results)
+        return results
+
+    def stats(self) -> Dict:
+        total = sum(self.counts.values())
+        return {
+            "enabled": self.enabled,
+            "threshold": self.threshold,
+            "local": self.counts[LOCAL_TIER],
+            "llm": self.counts[LLM_TIER],
+            "local_rate": self.counts[LOCAL_TIER] / total if total else 0.0,
+        }
+
+    def _is_confident(self, prediction: Dict) -> bool:
+        return (
+            self._is_llm_category(prediction)
+            and prediction["confidence"] >= self.threshold
+            and prediction["predicted_category"] != UNSURE_CATEGORY
+        )
+
+    def _is_llm_category(self, prediction: Optional[Dict]) -> bool:
+        return prediction is not None and prediction["predicted_category"] in self.categories
+
+    async def _predict_local(self, message_texts: List[str]) -> List[Optional[Dict]]:
+        """Local predictions, or all None if the local model can't answer."""
+        try:
+            # Model inference is CPU-bound; keep it off the event loop
+            return await asyncio.to_thread(
+                self.local.predict_categories,
+                [text or "" for text in message_texts]
+            )
+        except Exception as e:
+            logger.warning(f"Local categorization unavailable, using the LLM: {str(e)}")
+            return [None] * len(message_texts)
+
+    @staticmethod
+    def _local_result(prediction: Dict) -> Dict:
+        return {
+            "category": prediction["predicted_category"],
+            "confidence": prediction["confidence"],
+            "reasoning": "Local model prediction",
+            "timestamp": datetime.now().isoformat(),
+            "tier": LOCAL_TIER,
+        }
+
+# Create a singleton instance
+cascade_categorizer = CascadeCategorizer()
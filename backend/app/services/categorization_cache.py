@@ -0,0 +1,193 @@
+import asyncio
+import hashlib
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Tuple
+
+from app.core.config import settings
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+
+def normalize_text(text: str) -> str:
+    """Normalize message text so trivially different copies share a cache entry."""
+    return _WHITESPACE.sub(" ", text.strip().lower())
+
+def prompt_version(prompt: str) -> str:
+    """Short fingerprint of a prompt; changes whenever the prompt text changes."""
+    return hashlib.sha256(prompt.encode()).hexdigest()[:12]
+
+class SQLCacheBackend:
+    """
+    Shared cache tier stored in the ``ai_categorization_cache`` table.
+
+    Works on SQLite and Postgres. Methods are blocking; the cache calls them
+    from a worker thread.
+    """
+
+    def __init__(self, session_factory=None):
+        if session_factory is None:
+            from app.db.database import SessionLocal
+            session_factory = SessionLocal
+        self.session_factory = session_factory
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        from app.db.models import AICategorizationCache
+
+        db = self.session_factory()
+        try:
+            row = db.query(AICategorizationCache).filter(
+                AICategorizationCache.key == key,
+                AICategorizationCache.expires_at > datetime.utcnow()
+            ).first()
+            if row is None:
+                return None
+            return {"category": row.category, "confidence": row.confidence, "reasoning": row.reasoning}
+        finally:
+            db.close()
+
+    def set(self, key: str, value: Dict[str, Any], version: str, ttl: float) -> None:
+        from app.db.models import AICategorizationCache
+
+        db = self.session_factory()
+        try:
+            db.merge(AICategorizationCache(
+                key=key,
+                prompt_version=version,
+                category=value["category"],
+                confidence=value["confidence"],
+                reasoning=value["reasoning"],
+                expires_at=datetime.utcnow() + timedelta(seconds=ttl),
+            ))
+            db.commit()
+        finally:
+            db.close()
+
+    def purge(self, keep_version: Optional[str] = None) -> int:
+        """Delete expired entries and entries from other prompt versions."""
+        from app.db.models import AICategorizationCache
+
+        db = self.session_factory()
+        try:
+            query = db.query(AICategorizationCache)
+            if keep_version is None:
+                deleted = query.delete(synchronize_session=False)
+            else:
+                deleted = query.filter(
+                    (AICategorizationCache.prompt_version != keep_version)
+                    | (AICategorizationCache.expires_at <= datetime.utcnow())
+                ).delete(synchronize_session=False)
+            db.commit()
+            return deleted
+        finally:
+            db.close()
+
+class CategorizationCache:
+    """
+    Content-addressed cache of LLM categorization results.
+
+    Entries are keyed by a hash of the normalized message text plus the
+    provider, model and prompt version, so repeated messages ("ok",
+    "thanks", forwarded broadcasts) are only sent to the provider once per
+    prompt. Lookups hit an in-process LRU first and then the optional
+    shared tier; entries expire after ``ttl`` seconds.
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl: float = 7 * 24 * 3600, backend: Optional[SQLCacheBackend] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.backend = backend
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(text: str, provider: str, model: str, version: str) -> str:
+        text_hash = hashlib.sha256(normalize_text(text).encode()).hexdigest()
+        return f"{provider}:{model}:{version}:{text_hash}"
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Look up a cached result, checking the local LRU before the shared tier."""
+        value = self._get_local(key)
+        if value is None and self.backend is not None:
+            try:
+                value = await asyncio.to_thread(self.backend.get, key)
+            except Exception as e:
+                logger.warning(f"Categorization cache lookup failed: {str(e)}")
+            if value is not None:
+                self._set_local(key, value)
+
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def set(self, key: str, value: Dict[str, Any], version: str) -> None:
+        self._set_local(key, value)
+        if self.backend is not None:
+            try:
+                await asyncio.to_thread(self.backend.set, key, value, version, self.ttl)
+            except Exception as e:
+                logger.warning(f"Categorization cache write failed: {str(e)}")
+
+    def invalidate(self, keep_version: Optional[str] = None) -> None:
+        """
+        Drop cached results.
+
+        Args:
+            keep_version: If given, only entries from other prompt versions
+                are removed from the shared tier
+        """
+        with self._lock:
+            if keep_version is None:
+                self._entries.clear()
+            else:
+                marker = f":{keep_version}:"
+                for key in [key for key in self._entries if marker not in key]:
+                    del self._entries[key]
+        if self.backend is not None:
+            self.backend.purge(keep_version)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self._entries),
+            "shared_tier": self.backend is not None,
+        }
+
+    def _get_local(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def _set_local(self, key: str, value: Dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+# Create a singleton instance
+categorization_cache = CategorizationCache(
+    max_entries=settings.AI_CACHE_MAX_ENTRIES,
+    ttl=settings.AI_CACHE_TTL,
+    backend=SQLCacheBackend() if settings.AI_CACHE_BACKEND == "database" else None,
+)
@@ -1,61 +1,141 @@
-from typing import List, Optional
+from typing import Any, Dict, Iterable, List, Optional
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.db import models
 from app.schemas.contact import ContactCreate, ContactUpdate
+from app.services.message_ingestion import chunk_rows, contact_key, dialect_insert, owner_groups
+from app.services.message_service import MESSAGE_KEY
+from app.services.pagination import Page, keyset, make_page
 
-def get_contacts(db: Session, skip: int = 0, limit: int = 100) -> List[models.Contact]:
+# Contacts have no timestamp of their own; list them in creation order
+CONTACT_KEY = (models.Contact.id,)
+
+def get_contacts(db: Session, user_id: int, skip: int = 0, limit: int = 100) -> List[models.Contact]:
     """
-    Get all contacts.
+    Get all contacts of a user.
     
     Args:
         db: Database session
+        user_id: Owner of the contacts
         skip: Number of records to skip
         limit: Maximum number of records to return
         
     Returns:
         List of contacts
     """
-    return db.query(models.Contact).offset(skip).limit(limit).all()
+    return db.scalars(_contacts_query(user_id, skip, limit)).all()
+
+async def get_contacts_async(db: AsyncSession, user_id: int, skip: int = 0, limit: int = 100) -> List[models.Contact]:
+    """Async version of :func:`get_contacts`."""
+    return (await db.scalars(_contacts_query(user_id, skip, limit))).all()
 
-def get_contact_by_id(db: Session, contact_id: int) -> Optional[models.Contact]:
+def get_contacts_page(db: Session, user_id: int, cursor: Optional[str] = None, limit: int = 100) -> Page:
     """
-    Get a specific contact by ID.
+    Get a page of a user's contacts starting after a cursor.
     
     Args:
         db: Database session
+        user_id: Owner of the contacts
+        cursor: ``next_cursor`` of the previous page, or None for the first page
+        limit: Maximum number of records to return
+        
+    Returns:
+        Page of contacts and the cursor of the next page
+        
+    Raises:
+        InvalidCursor: If the cursor can't be decoded
+    """
+    query = keyset(_user_contacts(user_id), CONTACT_KEY, cursor, limit, descending=False)
+    return make_page(db.scalars(query).all(), CONTACT_KEY, limit)
+
+async def get_contacts_page_async(
+    db: AsyncSession, user_id: int, cursor: Optional[str] = None, limit: int = 100
+) -> Page:
+    """Async version of :func:`get_contacts_page`."""
+    query = keyset(_user_contacts(user_id), CONTACT_KEY, cursor, limit, descending=False)
+    return make_page((await db.scalars(query)).all(), CONTACT_KEY, limit)
+
+def _contacts_query(user_id: int, skip: int, limit: int):
+    return _user_contacts(user_id).order_by(*CONTACT_KEY).offset(skip).limit(limit)
+
+def _user_contacts(user_id: int):
+    return select(models.Contact).where(models.Contact.user_id == user_id)
+
+def get_contact_by_id(db: Session, user_id: int, contact_id: int) -> Optional[models.Contact]:
+    """
+    Get a specific contact of a user by ID.
+    
+    Args:
+        db: Database session
+        user_id: Owner of the contact
         contact_id: Contact ID
         
     Returns:
-        Contact object or None if not found
+        Contact object or None if the user has no such contact
     """
-    return db.query(models.Contact).filter(models.Contact.id == contact_id).first()
+    return db.scalars(_by_id_query(user_id, contact_id)).first()
+
+async def get_contact_by_id_async(db: AsyncSession, user_id: int, contact_id: int) -> Optional[models.Contact]:
+    """Async version of :func:`get_contact_by_id`."""
+    return (await db.scalars(_by_id_query(user_id, contact_id))).first()
 
-def get_contact_by_telegram_id(db: Session, telegram_id: int) -> Optional[models.Contact]:
+def _by_id_query(user_id: int, contact_id: int):
+    return _user_contacts(user_id).where(models.Contact.id == contact_id)
+
+def get_contact_by_telegram_id(db: Session, user_id: int, telegram_id: int) -> Optional[models.Contact]:
     """
-    Get a specific contact by Telegram ID.
+    Get a specific contact of a user by Telegram ID.
     
     Args:
         db: Database session
+        user_id: Owner of the contact
         telegram_id: Telegram user ID
         
     Returns:
         Contact object or None if not found
     """
-    return db.query(models.Contact).filter(models.Contact.telegram_id == telegram_id).first()
+    return db.scalars(_by_telegram_id_query(user_id, telegram_id)).first()
+
+async def get_contact_by_telegram_id_async(
+    db: AsyncSession, user_id: int, telegram_id: int
+) -> Optional[models.Contact]:
+    """Async version of :func:`get_contact_by_telegram_id`."""
+    return (await db.scalars(_by_telegram_id_query(user_id, telegram_id))).first()
 
-def create_contact(db: Session, contact_in: ContactCreate) -> models.Contact:
+def _by_telegram_id_query(user_id: int, telegram_id: int):
+    return _user_contacts(user_id).where(models.Contact.telegram_id == telegram_id)
+
+def create_contact(db: Session, contact_in: ContactCreate, user_id: int) -> models.Contact:
     """
     Create a new contact.
     
     Args:
         db: Database session
         contact_in: Contact creation data
+        user_id: Owner of the contact
         
     Returns:
         Created contact object
     """
-    db_contact = models.Contact(
+    db_contact = _new_contact(contact_in, user_id)
+    db.add(db_contact)
+    db.commit()
+    db.refresh(db_contact)
+    return db_contact
+
+async def create_contact_async(db: AsyncSession, contact_in: ContactCreate, user_id: int) -> models.Contact:
+    """Async version of :func:`create_contact`."""
+    db_contact = _new_contact(contact_in, user_id)
+    db.add(db_contact)
+    await db.commit()
+    await db.refresh(db_contact)
+    return db_contact
+
+def _new_contact(contact_in: ContactCreate, user_id: int) -> models.Contact:
+    return models.Contact(
+        user_id=user_id,
         telegram_id=contact_in.telegram_id,
         display_name=contact_in.display_name,
         username=contact_in.username,
@@ -64,10 +144,6 @@ def create_contact(db: Session, contact_in: ContactCreate) -> models.Contact:
         last_name=contact_in.last_name,
         additional_info=contact_in.additional_info,
     )
-    db.add(db_contact)
-    db.commit()
-    db.refresh(db_contact)
-    return db_contact
 
 def update_contact(db: Session, db_obj: models.Contact, obj_in: ContactUpdate) -> models.Contact:
     """
@@ -90,10 +166,95 @@ def update_contact(db: Session, db_obj: models.Contact, obj_in: ContactUpdate) -
     db.refresh(db_obj)
     return db_obj
 
+async def update_contact_async(db: AsyncSession, db_obj: models.Contact, obj_in: ContactUpdate) -> models.Contact:
+    """Async version of :func:`update_contact`."""
+    update_data = obj_in.dict(exclude_unset=True)
+    
+    for field in update_data:
+        setattr(db_obj, field, update_data[field])
+    
+    await db.commit()
+    await db.refresh(db_obj)
+    return db_obj
+
+def get_contact_sync_hashes(db: Session, user_id: int, telegram_ids: Iterable[int]) -> Dict[int, Optional[str]]:
+    """
+    Get the stored sync fingerprints of a user's contacts.
+    
+    Args:
+        db: Database session
+        user_id: Owner of the contacts
+        telegram_ids: Telegram user IDs
+        
+    Returns:
+        Fingerprint by Telegram ID, for the contacts that exist
+    """
+    rows = db.execute(
+        select(models.Contact.telegram_id, models.Contact.sync_hash).where(
+            models.Contact.user_id == user_id,
+            models.Contact.telegram_id.in_(list(telegram_ids))
+        )
+    )
+    return {telegram_id: sync_hash for telegram_id, sync_hash in rows}
+
+def bulk_upsert_contacts(db: Session, rows: List[Dict[str, Any]]) -> int:
+    """
+    Insert or overwrite contacts in bulk, keyed by owner and Telegram ID.
+    
+    Unlike the ingestion upsert, every given field is written as is, so
+    callers should pass only rows that changed.
+    
+    Args:
+        db: Database session
+        rows: Contact rows with the same keys, including ``user_id``, at most
+            one per owner and ``telegram_id``
+        
+    Returns:
+        Number of rows written
+    """
+    if not rows:
+        return 0
+    
+    insert = dialect_insert(db)
+    try:
+        if insert is None:
+            existing = {
+                (owner, telegram_id): contact_id
+                for owner, telegram_id, contact_id in db.execute(
+                    select(models.Contact.user_id, models.Contact.telegram_id, models.Contact.id).where(
+                        models.Contact.telegram_id.in_([row["telegram_id"] for row in rows])
+                    )
+                )
+            }
+            db.bulk_insert_mappings(models.Contact, [row for row in rows if contact_key(row) not in existing])
+            db.bulk_update_mappings(models.Contact, [
+                {**row, "id": existing[contact_key(row)]} for row in rows if contact_key(row) in existing
+            ])
+        else:
+            for group, conflict in owner_groups(rows, models.Contact, [models.Contact.telegram_id]):
+                for chunk in chunk_rows(db, group):
+                    stmt = insert(models.Contact).values(chunk)
+                    stmt = stmt.on_conflict_do_update(
+                        **conflict,
+                        set_={
+                            **{field: stmt.excluded[field] for field in chunk[0] if field not in ("user_id", "telegram_id")},
+                            "updated_at": func.now(),
+                        },
+                    )
+                    db.execute(stmt)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return len(rows)
+
 def get_contact_messages(db: Session, contact_id: int, skip: int = 0, limit: int = 100) -> List[models.Message]:
     """
     Get messages for a specific contact.
     
+    The contact is resolved inside the query, so this costs one round trip
+    and doesn't load the contact; an unknown contact has no messages.
+    
     Args:
         db: Database session
         contact_id: Contact ID
@@ -103,10 +264,41 @@ def get_contact_messages(db: Session, contact_id: int, skip: int = 0, limit: int
     Returns:
         List of messages for the contact
     """
-    contact = get_contact_by_id(db, contact_id)
-    if not contact:
-        return []
+    return db.scalars(_contact_messages_query(contact_id, skip, limit)).all()
+
+async def get_contact_messages_async(db: AsyncSession, contact_id: int, skip: int = 0, limit: int = 100) -> List[models.Message]:
+    """Async version of :func:`get_contact_messages`."""
+    return (await db.scalars(_contact_messages_query(contact_id, skip, limit))).all()
+
+def get_contact_messages_page(db: Session, contact_id: int, cursor: Optional[str] = None, limit: int = 100) -> Page:
+    """
+    Get a page of a contact's messages, newest first, starting after a cursor.
     
-    return db.query(models.Message).filter(
-        models.Message.sender_id == contact.telegram_id
-    ).order_by(models.Message.timestamp.desc()).offset(skip).limit(limit).all() 
\ No newline at end of file
+    Args:
+        db: Database session
+        contact_id: Contact ID
+        cursor: ``next_cursor`` of the previous page, or None for the first page
+        limit: Maximum number of records to return
+        
+    Returns:
+        Page of messages and the cursor of the next page
+        
+    Raises:
+        InvalidCursor: If the cursor can't be decoded
+    """
+    query = keyset(_contact_messages(contact_id), MESSAGE_KEY, cursor, limit)
+    return make_page(db.scalars(query).all(), MESSAGE_KEY, limit)
+
+async def get_contact_messages_page_async(
+    db: AsyncSession, contact_id: int, cursor: Optional[str] = None, limit: int = 100
+) -> Page:
+    """Async version of :func:`get_contact_messages_page`."""
+    query = keyset(_contact_messages(contact_id), MESSAGE_KEY, cursor, limit)
+    return make_page((await db.scalars(query)).all(), MESSAGE_KEY, limit)
+
+def _contact_messages_query(contact_id: int, skip: int, limit: int):
+    order = [column.desc() for column in MESSAGE_KEY]
+    return _contact_messages(contact_id).order_by(*order).offset(skip).limit(limit)
+
+def _contact_messages(contact_id: int):
+    return select(models.Message).where(models.Message.contact_id == contact_id)
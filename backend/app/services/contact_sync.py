@@ -0,0 +1,97 @@
+import asyncio
+import hashlib
+import json
+import logging
+from typing import Any, Dict, List
+
+from app.core.config import settings
+from app.services.contact_service import bulk_upsert_contacts, get_contact_sync_hashes
+from app.services.message_ingestion import CONTACT_FIELDS, contact_row
+from app.services.telegram_pool import telegram_pool
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+# Fields a sync writes, and so fingerprints
+SYNC_FIELDS = CONTACT_FIELDS + ("last_message_time",)
+
+def contact_fingerprint(row: Dict[str, Any]) -> str:
+    """Hash of the synced fields of a contact row."""
+    payload = json.dumps([row.get(field) for field in SYNC_FIELDS], default=str)
+    return hashlib.md5(payload.encode()).hexdigest()
+
+def dialog_contact_row(dialog) -> Dict[str, Any]:
+    """Contact row, with its fingerprint, for a one-to-one Telegram dialog."""
+    row = contact_row(dialog.entity)
+    row["last_message_time"] = dialog.date.replace(tzinfo=None) if dialog.date else None
+    row["sync_hash"] = contact_fingerprint(row)
+    return row
+
+class ContactSync:
+    """
+    Keeps the contacts table in step with an account's Telegram dialogs.
+
+    Dialogs are streamed with ``iter_dialogs`` and handled ``batch_size`` at
+    a time: each batch's stored fingerprints are read in one query and only
+    contacts whose fingerprint differs are upserted, so database writes are
+    proportional to what changed rather than to the number of dialogs.
+    """
+
+    def __init__(self, batch_size: int = 500, session_factory=None):
+        self.batch_size = batch_size
+        self._session_factory = session_factory
+
+    @property
+    def session_factory(self):
+        if self._session_factory is None:
+            from app.db.database import SessionLocal
+            self._session_factory = SessionLocal
+        return self._session_factory
+
+    async def sync_session(self, session_string: str, user_id: int) -> Dict[str, int]:
+        """Sync the contacts of the account behind a session string."""
+        async with telegram_pool.client(session_string) as client:
+            return await self.run(client, user_id)
+
+    async def run(self, client, user_id: int) -> Dict[str, int]:
+        """
+        Sync contacts from a connected client.
+
+        Args:
+            client: Connected Telethon client
+            user_id: Owner of the account, and so of its contacts
+
+        Returns:
+            Dict with ``dialogs`` seen and ``changed`` contacts written
+        """
+        dialogs = 0
+        changed = 0
+        batch: List[Dict[str, Any]] = []
+
+        async for dialog in client.iter_dialogs():
+            # Groups and channels are not contacts
+            if not dialog.is_user:
+                continue
+            dialogs += 1
+            batch.append({**dialog_contact_row(dialog), "user_id": user_id})
+            if len(batch) >= self.batch_size:
+                changed += await asyncio.to_thread(self._write_changed, user_id, batch)
+                batch = []
+
+        if batch:
+            changed += await asyncio.to_thread(self._write_changed, user_id, batch)
+
+        logger.info(f"Contact sync: {changed} of {dialogs} contacts changed")
+        return {"dialogs": dialogs, "changed": changed}
+
+    def _write_changed(self, user_id: int, rows: List[Dict[str, Any]]) -> int:
+        db = self.session_factory()
+        try:
+            stored = get_contact_sync_hashes(db, user_id, (row["telegram_id"] for row in rows))
+            changed = [row for row in rows if stored.get(row["telegram_id"]) != row["sync_hash"]]
+            return bulk_upsert_contacts(db, changed)
+        finally:
+            db.close()
+
+# Create a singleton instance
+contact_sync = ContactSync(batch_size=settings.CONTACT_SYNC_BATCH_SIZE)
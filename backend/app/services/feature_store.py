@@ -0,0 +1,72 @@
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.db import models
+
+# Stored vectors are little-endian float32, which halves the size of the
+# float64 arrays the extractor produces and is plenty for these features
+_STORED_DTYPE = np.dtype("<f4")
+
+
+def pack_features(vector: Sequence[float]) -> bytes:
+    """
+    Pack a feature vector into a compact binary blob.
+    
+    Args:
+        vector: One row of metadata features
+        
+    Returns:
+        Packed float32 bytes
+    """
+    return np.asarray(vector, dtype=_STORED_DTYPE).tobytes()
+
+def unpack_features(blob: bytes) -> np.ndarray:
+    """
+    Unpack a blob written by ``pack_features``.
+    
+    Args:
+        blob: Packed float32 bytes
+        
+    Returns:
+        Feature vector as float64
+    """
+    return np.frombuffer(blob, dtype=_STORED_DTYPE).astype(float)
+
+def stored_vector(blob: Optional[bytes], version: Optional[int], current_version: int) -> Optional[np.ndarray]:
+    """
+    Get a stored vector if it was produced by the current extractor.
+    
+    Args:
+        blob: Packed vector, if any
+        version: Feature-schema version the vector was written with
+        current_version: Feature-schema version of the running extractor
+        
+    Returns:
+        The unpacked vector, or None if it is missing or stale
+    """
+    if blob is None or version != current_version:
+        return None
+    return unpack_features(blob)
+
+def save_vectors(db: Session, vectors: Iterable[Tuple[int, Sequence[float]]], version: int) -> int:
+    """
+    Bulk-write recomputed vectors back to their training rows.
+    
+    Args:
+        db: Database session
+        vectors: Pairs of (MLTrainingData id, feature vector)
+        version: Feature-schema version the vectors were computed with
+        
+    Returns:
+        Number of rows updated
+    """
+    mappings: List[dict] = [
+        {"id": row_id, "feature_vector": pack_features(vector), "feature_version": version}
+        for row_id, vector in vectors
+    ]
+    if mappings:
+        db.bulk_update_mappings(models.MLTrainingData, mappings)
+        db.commit()
+    return len(mappings)
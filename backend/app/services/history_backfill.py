@@ -0,0 +1,297 @@
+import argparse
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from telethon.errors import FloodWaitError
+
+from app.core.config import settings
+from app.db import models
+from app.services.message_ingestion import contact_row, insert_messages, link_contacts, message_row, upsert_contacts
+from app.services.message_listing import count_cache
+from app.services.telegram_pool import telegram_pool
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+def load_checkpoints(db: Session, user_id: int) -> Dict[int, Dict[str, Any]]:
+    """Backfill progress of a user's dialogs, keyed by dialog id."""
+    rows = db.query(models.BackfillCheckpoint).filter(models.BackfillCheckpoint.user_id == user_id)
+    return {
+        row.dialog_id: {
+            "oldest_message_id": row.oldest_message_id,
+            "seen_reply": bool(row.seen_reply),
+            "message_count": row.message_count or 0,
+            "completed": bool(row.completed),
+        }
+        for row in rows
+    }
+
+def save_progress(db: Session, user_id: int, dialog_id: int, checkpoint: Dict[str, Any], batch: List) -> int:
+    """
+    Store a batch of history and the dialog's checkpoint in one transaction.
+
+    Args:
+        db: Database session
+        user_id: Owner of the account
+        dialog_id: Telegram dialog id
+        checkpoint: ``oldest_message_id``, ``seen_reply`` and ``completed`` after this batch
+        batch: (message row, contact row) pairs
+
+    Returns:
+        Number of new messages stored
+    """
+    contacts = {contact["telegram_id"]: {**contact, "user_id": user_id} for _, contact in batch if contact is not None}
+    rows = [row for row, _ in batch]
+    try:
+        upsert_contacts(db, list(contacts.values()))
+        link_contacts(db, rows, user_id=user_id)
+        inserted = insert_messages(db, rows)
+
+        row = db.query(models.BackfillCheckpoint).filter(
+            models.BackfillCheckpoint.user_id == user_id,
+            models.BackfillCheckpoint.dialog_id == dialog_id
+        ).first()
+        if row is None:
+            row = models.BackfillCheckpoint(user_id=user_id, dialog_id=dialog_id, message_count=0)
+            db.add(row)
+        row.oldest_message_id = checkpoint["oldest_message_id"]
+        row.seen_reply = checkpoint["seen_reply"]
+        row.completed = checkpoint["completed"]
+        row.message_count = (row.message_count or 0) + inserted
+
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    if inserted:
+        count_cache.invalidate(user_id)
+    return inserted
+
+def backfill_status(db: Session, user_id: int) -> Dict[str, Any]:
+    """
+    Summarize a user's backfill progress.
+
+    Returns:
+        Dict with dialog counts, imported messages and whether a backfill is running
+    """
+    dialogs, completed, messages = db.query(
+        func.count(models.BackfillCheckpoint.id),
+        func.count(models.BackfillCheckpoint.id).filter(models.BackfillCheckpoint.completed.is_(True)),
+        func.coalesce(func.sum(models.BackfillCheckpoint.message_count), 0),
+    ).filter(models.BackfillCheckpoint.user_id == user_id).one()
+    return {
+        "running": history_backfill.is_running(user_id),
+        "dialogs": dialogs,
+        "completed_dialogs": completed,
+        "messages": messages,
+    }
+
+class HistoryBackfill:
+    """
+    Imports the message history of a Telegram account.
+
+    Dialogs are walked newest to oldest with ``iter_messages``, several at
+    a time, and written in batches of ``batch_size`` messages. Each batch is
+    committed together with the dialog's checkpoint (the oldest imported
+    message id), so a crashed or interrupted backfill resumes from the last
+    committed batch and finished dialogs are skipped. The next page is
+    fetched while the previous batch is being written. FloodWait errors
+    that Telethon doesn't absorb itself pause the dialog and then resume
+    from its checkpoint.
+    """
+
+    def __init__(self, batch_size: int = 2000, concurrency: int = 4, session_factory=None):
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self._session_factory = session_factory
+        self._running: Dict[int, asyncio.Task] = {}
+
+    @property
+    def session_factory(self):
+        if self._session_factory is None:
+            from app.db.database import SessionLocal
+            self._session_factory = SessionLocal
+        return self._session_factory
+
+    def is_running(self, user_id: int) -> bool:
+        task = self._running.get(user_id)
+        return task is not None and not task.done()
+
+    def start(self, user_id: int, session_string: str) -> asyncio.Task:
+        """Backfill a user's account in the background, unless it is already running."""
+        if not self.is_running(user_id):
+            task = asyncio.create_task(self._run_session(user_id, session_string))
+            task.add_done_callback(self._log_result)
+            self._running[user_id] = task
+        return self._running[user_id]
+
+    async def shutdown(self) -> None:
+        """Cancel running backfills; they resume from their checkpoints next time."""
+        for task in self._running.values():
+            task.cancel()
+        await asyncio.gather(*self._running.values(), return_exceptions=True)
+        self._running.clear()
+
+    async def run(self, client, user_id: int) -> Dict[str, int]:
+        """
+        Backfill every dialog of a connected client.
+
+        Args:
+            client: Connected Telethon client
+            user_id: Owner of the account
+
+        Returns:
+            Dict with ``dialogs``, ``completed`` and ``messages`` (new this run) counts
+        """
+        checkpoints = await asyncio.to_thread(self._load_checkpoints, user_id)
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        # Broadcast channels are not conversations
+        dialogs = [dialog async for dialog in client.iter_dialogs() if dialog.is_user or dialog.is_group]
+        results = await asyncio.gather(
+            *(self._backfill_dialog(client, user_id, dialog, checkpoints.get(dialog.id), semaphore) for dialog in dialogs),
+            return_exceptions=True
+        )
+
+        imported = 0
+        completed = 0
+        for dialog, result in zip(dialogs, results):
+            if isinstance(result, Exception):
+                logger.error(f"Backfill of dialog {dialog.id} for user {user_id} failed: {str(result)}")
+                continue
+            imported += result
+            completed += 1
+        return {"dialogs": len(dialogs), "completed": completed, "messages": imported}
+
+    async def _run_session(self, user_id: int, session_string: str) -> Dict[str, int]:
+        async with telegram_pool.client(session_string) as client:
+            return await self.run(client, user_id)
+
+    async def _backfill_dialog(self, client, user_id: int, dialog, checkpoint: Optional[Dict[str, Any]], semaphore) -> int:
+        checkpoint = dict(checkpoint or {
+            "oldest_message_id": None,
+            "seen_reply": False,
+            "message_count": 0,
+            "completed": False,
+        })
+        if checkpoint["completed"]:
+            return 0
+
+        async with semaphore:
+            start_count = checkpoint["message_count"]
+            while True:
+                try:
+                    await self._walk(client, user_id, dialog, checkpoint)
+                    return checkpoint["message_count"] - start_count
+                except FloodWaitError as e:
+                    logger.warning(f"Flood wait of {e.seconds}s while backfilling dialog {dialog.id}")
+                    # Resume from the last committed batch
+                    committed = await asyncio.to_thread(self._load_checkpoints, user_id)
+                    checkpoint = dict(committed.get(dialog.id, {**checkpoint, "oldest_message_id": None}))
+                    await asyncio.sleep(e.seconds)
+
+    async def _walk(self, client, user_id: int, dialog, checkpoint: Dict[str, Any]) -> None:
+        """Import a dialog's history older than its checkpoint, updating the checkpoint."""
+        batch = []
+        writing: Optional[asyncio.Task] = None
+
+        async def flush(completed: bool) -> None:
+            nonlocal batch, writing
+            # One write in flight per dialog keeps checkpoints in order
+            if writing is not None:
+                await writing
+            checkpoint["completed"] = completed
+            writing = asyncio.create_task(self._save(user_id, dialog.id, dict(checkpoint), batch, checkpoint))
+            batch = []
+
+        try:
+            # offset_id is exclusive; wait_time=0 disables the default pause between pages
+            # and leaves throttling to Telegram's flood waits
+            async for message in client.iter_messages(
+                dialog.entity,
+                offset_id=checkpoint["oldest_message_id"] or 0,
+                wait_time=0
+            ):
+                checkpoint["oldest_message_id"] = message.id
+                if message.out:
+                    # Everything older than our reply has been answered
+                    checkpoint["seen_reply"] = True
+                    continue
+                if getattr(message, "action", None) is not None:
+                    # Service message (joins, pins, calls)
+                    continue
+
+                row = message_row(message)
+                row["is_responded"] = checkpoint["seen_reply"]
+                batch.append((row, contact_row(message.sender)))
+                if len(batch) >= self.batch_size:
+                    await flush(completed=False)
+
+            await flush(completed=True)
+        finally:
+            if writing is not None:
+                await writing
+
+    async def _save(self, user_id: int, dialog_id: int, snapshot: Dict[str, Any], batch: List, checkpoint: Dict[str, Any]) -> None:
+        inserted = await asyncio.to_thread(self._save_sync, user_id, dialog_id, snapshot, batch)
+        checkpoint["message_count"] += inserted
+
+    def _save_sync(self, user_id: int, dialog_id: int, snapshot: Dict[str, Any], batch: List) -> int:
+        db = self.session_factory()
+        try:
+            return save_progress(db, user_id, dialog_id, snapshot, batch)
+        finally:
+            db.close()
+
+    def _load_checkpoints(self, user_id: int) -> Dict[int, Dict[str, Any]]:
+        db = self.session_factory()
+        try:
+            return load_checkpoints(db, user_id)
+        finally:
+            db.close()
+
+    @staticmethod
+    def _log_result(task: asyncio.Task) -> None:
+        if task.cancelled():
+            return
+        if task.exception() is not None:
+            logger.error(f"History backfill failed: {str(task.exception())}")
+        else:
+            logger.info(f"History backfill finished: {task.result()}")
+
+async def _main() -> None:
+    parser = argparse.ArgumentParser(description="Import the Telegram message history of a user")
+    parser.add_argument("--user-id", type=int, required=True)
+    parser.add_argument("--batch-size", type=int, default=settings.BACKFILL_BATCH_SIZE)
+    parser.add_argument("--concurrency", type=int, default=settings.BACKFILL_CONCURRENCY)
+    args = parser.parse_args()
+
+    from app.db.database import SessionLocal
+    db = SessionLocal()
+    try:
+        user = db.query(models.User).filter(models.User.id == args.user_id).first()
+        session_string = user.telegram_session if user else None
+    finally:
+        db.close()
+    if not session_string:
+        raise SystemExit(f"User {args.user_id} has no Telegram session")
+
+    backfill = HistoryBackfill(batch_size=args.batch_size, concurrency=args.concurrency)
+    try:
+        result = await backfill._run_session(args.user_id, session_string)
+        print(f"Imported {result['messages']} messages from {result['completed']}/{result['dialogs']} dialogs")
+    finally:
+        await telegram_pool.close()
+
+# Create a singleton instance
+history_backfill = HistoryBackfill(
+    batch_size=settings.BACKFILL_BATCH_SIZE,
+    concurrency=settings.BACKFILL_CONCURRENCY,
+)
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_main())
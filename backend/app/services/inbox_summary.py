@@ -0,0 +1,334 @@
+import argparse
+import logging
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, Iterable, NamedTuple, Optional
+
+from sqlalchemy import String, case, cast, delete, event, func, insert, inspect, literal, select, update
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from app.db import models
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+# Message columns that decide whether, and under which keys, a message is counted
+TRACKED = ("user_id", "is_responded", "category", "ai_category", "contact_id", "timestamp")
+
+# inbox_counts dimensions and the message column each one groups by
+DIMENSIONS = {"category": "category", "ai_category": "ai_category", "contact": "contact_id"}
+
+class InboxEntry(NamedTuple):
+    """What one unresponded message adds to its owner's inbox summary."""
+    user_id: int
+    category: Optional[str]
+    ai_category: Optional[str]
+    contact_id: Optional[int]
+    timestamp: Optional[datetime]
+
+def inbox_entry(values: Dict[str, Any]) -> Optional[InboxEntry]:
+    """
+    The inbox entry of a message's column values.
+
+    Returns:
+        None unless the message has an owner and is unresponded
+    """
+    responded = values.get("is_responded")
+    if values.get("user_id") is None or responded is None or responded:
+        return None
+    return InboxEntry(
+        values["user_id"], values.get("category"), values.get("ai_category"),
+        values.get("contact_id"), values.get("timestamp")
+    )
+
+def apply_changes(connection: Connection, removed: Iterable[Optional[InboxEntry]], added: Iterable[Optional[InboxEntry]]) -> None:
+    """
+    Update inbox summaries for messages that left and joined inboxes.
+
+    Counters are adjusted in SQL (``count = count + delta``), so concurrent
+    writers don't lose each other's updates. The oldest unresponded
+    timestamp is lowered directly; when a message at or before it leaves,
+    it is re-read from the per-user unresponded index. Runs in the caller's
+    transaction and does not commit.
+
+    Args:
+        connection: Connection of the transaction that changed the messages
+        removed: Entries of messages that left an inbox (None entries are ignored)
+        added: Entries of messages that joined an inbox (None entries are ignored)
+    """
+    removed = Counter(entry for entry in removed if entry is not None)
+    added = Counter(entry for entry in added if entry is not None)
+    # A message that changed nothing the summary tracks
+    unchanged = removed & added
+    removed -= unchanged
+    added -= unchanged
+    if not removed and not added:
+        return
+
+    totals: Counter = Counter()
+    counts: Counter = Counter()
+    oldest: Dict[int, datetime] = {}
+    recheck: Dict[int, datetime] = {}
+    for entries, sign in ((added, 1), (removed, -1)):
+        for entry, n in entries.items():
+            totals[entry.user_id] += sign * n
+            for dimension, column in DIMENSIONS.items():
+                counts[(entry.user_id, dimension, _value(getattr(entry, column)))] += sign * n
+            if entry.timestamp is None:
+                continue
+            bounds = oldest if sign > 0 else recheck
+            if entry.user_id not in bounds or entry.timestamp < bounds[entry.user_id]:
+                bounds[entry.user_id] = entry.timestamp
+
+    _add_totals(connection, totals, oldest)
+    _add_counts(connection, counts)
+
+    for user_id, timestamp in recheck.items():
+        summary = models.InboxSummary.__table__
+        connection.execute(
+            update(summary)
+            .where(summary.c.user_id == user_id, summary.c.oldest_unresponded_at >= timestamp)
+            .values(oldest_unresponded_at=_oldest_unresponded(user_id))
+        )
+    if any(delta < 0 for delta in counts.values()):
+        # Buckets that emptied
+        connection.execute(
+            delete(models.InboxCount.__table__).where(
+                models.InboxCount.user_id.in_({user_id for user_id, _, _ in counts}),
+                models.InboxCount.count <= 0
+            )
+        )
+
+def get_inbox_summary(db: Session, user_id: int) -> Dict[str, Any]:
+    """
+    Get a user's unresponded-inbox summary.
+
+    Reads the maintained summary rows only, so the cost doesn't grow with
+    the number of messages.
+
+    Args:
+        db: Database session
+        user_id: Owner of the inbox
+
+    Returns:
+        Dict with ``unresponded_count``, ``oldest_unresponded_at`` and
+        counts ``by_category``, ``by_ai_category`` and ``by_contact``
+        (messages without a category count under "")
+    """
+    summary = db.get(models.InboxSummary, user_id)
+    result = {
+        "unresponded_count": summary.unresponded_count if summary else 0,
+        "oldest_unresponded_at": summary.oldest_unresponded_at if summary else None,
+        "by_category": {},
+        "by_ai_category": {},
+        "by_contact": {},
+    }
+    rows = db.execute(
+        select(models.InboxCount.dimension, models.InboxCount.value, models.InboxCount.count)
+        .where(models.InboxCount.user_id == user_id, models.InboxCount.count > 0)
+    )
+    for dimension, value, count in rows:
+        if dimension == "contact":
+            # Messages from senders without a contact are in the total only
+            if value:
+                result["by_contact"][int(value)] = count
+        else:
+            result[f"by_{dimension}"][value] = count
+    return result
+
+def get_unresponded_count(db: Session, user_id: int) -> int:
+    """Number of a user's unresponded messages, from the summary."""
+    count = db.scalar(select(models.InboxSummary.unresponded_count).where(models.InboxSummary.user_id == user_id))
+    return count or 0
+
+def rebuild(db: Session, user_id: Optional[int] = None) -> int:
+    """
+    Recompute inbox summaries from the messages table.
+
+    For repairing drift (e.g. messages changed by hand or by a data
+    migration). Summaries are replaced in one transaction; writes to the
+    same users' messages while it runs should be avoided.
+
+    Args:
+        db: Database session
+        user_id: Only rebuild this user's summary
+
+    Returns:
+        Number of users with unresponded messages
+    """
+    message = models.Message
+    scope = [message.user_id.isnot(None), message.is_responded == False]
+    summaries, counts = models.InboxSummary.__table__, models.InboxCount.__table__
+    if user_id is not None:
+        scope.append(message.user_id == user_id)
+        db.execute(delete(summaries).where(summaries.c.user_id == user_id))
+        db.execute(delete(counts).where(counts.c.user_id == user_id))
+    else:
+        db.execute(delete(summaries))
+        db.execute(delete(counts))
+
+    users = db.execute(
+        insert(summaries).from_select(
+            ["user_id", "unresponded_count", "oldest_unresponded_at"],
+            select(message.user_id, func.count(), func.min(message.timestamp)).where(*scope).group_by(message.user_id)
+        )
+    ).rowcount
+    for dimension, column in DIMENSIONS.items():
+        column = getattr(message, column)
+        db.execute(
+            insert(counts).from_select(
+                ["user_id", "dimension", "value", "count"],
+                select(message.user_id, literal(dimension), func.coalesce(cast(column, String), ""), func.count())
+                .where(*scope)
+                .group_by(message.user_id, column)
+            )
+        )
+    db.commit()
+    return users
+
+def _value(value: Any) -> str:
+    return "" if value is None else str(value)
+
+def _oldest_unresponded(user_id: int):
+    # Answered from ix_messages_user_id_unresponded_timestamp_id
+    return select(func.min(models.Message.timestamp)).where(
+        models.Message.user_id == user_id, models.Message.is_responded == False
+    ).scalar_subquery()
+
+def _dialect_insert(connection: Connection):
+    if connection.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        return dialect_insert
+    if connection.dialect.name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        return dialect_insert
+    return None
+
+def _add_totals(connection: Connection, totals: Counter, oldest: Dict[int, datetime]) -> None:
+    table = models.InboxSummary.__table__
+    rows = [
+        {"user_id": user_id, "unresponded_count": delta, "oldest_unresponded_at": oldest.get(user_id)}
+        for user_id, delta in totals.items()
+    ]
+    upsert = _dialect_insert(connection)
+    if upsert is None:
+        for row in rows:
+            result = connection.execute(
+                update(table).where(table.c.user_id == row["user_id"]).values(
+                    unresponded_count=table.c.unresponded_count + row["unresponded_count"],
+                    oldest_unresponded_at=_earliest(
+                        table.c.oldest_unresponded_at,
+                        literal(row["oldest_unresponded_at"], type_=table.c.oldest_unresponded_at.type)
+                    )
+                )
+            )
+            if result.rowcount == 0:
+                connection.execute(insert(table).values(**row))
+        return
+
+    stmt = upsert(table).values(rows)
+    connection.execute(stmt.on_conflict_do_update(
+        index_elements=[table.c.user_id],
+        set_={
+            "unresponded_count": table.c.unresponded_count + stmt.excluded.unresponded_count,
+            "oldest_unresponded_at": _earliest(table.c.oldest_unresponded_at, stmt.excluded.oldest_unresponded_at),
+            "updated_at": func.now(),
+        },
+    ))
+
+def _add_counts(connection: Connection, counts: Counter) -> None:
+    table = models.InboxCount.__table__
+    rows = [
+        {"user_id": user_id, "dimension": dimension, "value": value, "count": delta}
+        for (user_id, dimension, value), delta in counts.items() if delta
+    ]
+    if not rows:
+        return
+    upsert = _dialect_insert(connection)
+    if upsert is None:
+        for row in rows:
+            result = connection.execute(
+                update(table).where(
+                    table.c.user_id == row["user_id"], table.c.dimension == row["dimension"], table.c.value == row["value"]
+                ).values(count=table.c.count + row["count"])
+            )
+            if result.rowcount == 0:
+                connection.execute(insert(table).values(**row))
+        return
+
+    stmt = upsert(table).values(rows)
+    connection.execute(stmt.on_conflict_do_update(
+        index_elements=[table.c.user_id, table.c.dimension, table.c.value],
+        set_={"count": table.c.count + stmt.excluded.count},
+    ))
+
+def _earliest(current, candidate):
+    # NULL means "no unresponded message" on either side
+    return case(
+        (candidate.is_(None), current),
+        (current.is_(None), candidate),
+        (candidate < current, candidate),
+        else_=current,
+    )
+
+def _column_values(connection: Connection, target: models.Message) -> Dict[str, Any]:
+    state = inspect(target)
+    if all(key in state.dict for key in TRACKED):
+        return {key: state.dict[key] for key in TRACKED}
+    # Set from SQL expressions (e.g. a contact_id subquery) and not fetched back yet
+    columns = [getattr(models.Message.__table__.c, key) for key in TRACKED]
+    row = connection.execute(select(*columns).where(models.Message.__table__.c.id == target.id)).one()
+    return dict(row._mapping)
+
+def _previous_values(target: models.Message, current: Dict[str, Any]) -> Dict[str, Any]:
+    state = inspect(target)
+    previous = {}
+    for key in TRACKED:
+        history = state.attrs[key].history
+        if history.has_changes():
+            previous[key] = history.deleted[0] if history.deleted else None
+        else:
+            previous[key] = current[key]
+    return previous
+
+def _remember_replaced_value(target, value, oldvalue, initiator):
+    return value
+
+# Make ORM updates keep the value they replace, so the old entry is known
+for _key in TRACKED:
+    event.listen(getattr(models.Message, _key), "set", _remember_replaced_value, active_history=True, retval=True)
+
+@event.listens_for(models.Message, "after_insert")
+def _message_inserted(mapper, connection, target) -> None:
+    apply_changes(connection, [], [inbox_entry(_column_values(connection, target))])
+
+@event.listens_for(models.Message, "after_update")
+def _message_updated(mapper, connection, target) -> None:
+    state = inspect(target)
+    if not any(state.attrs[key].history.has_changes() for key in TRACKED):
+        return
+    current = _column_values(connection, target)
+    apply_changes(connection, [inbox_entry(_previous_values(target, current))], [inbox_entry(current)])
+
+@event.listens_for(models.Message, "after_delete")
+def _message_deleted(mapper, connection, target) -> None:
+    current = {key: inspect(target).dict.get(key) for key in TRACKED}
+    apply_changes(connection, [inbox_entry(_previous_values(target, current))], [])
+
+def _main() -> None:
+    parser = argparse.ArgumentParser(description="Rebuild unresponded-inbox summaries from the messages table")
+    parser.add_argument("--user-id", type=int, default=None)
+    args = parser.parse_args()
+
+    from app.db.database import SessionLocal
+    db = SessionLocal()
+    try:
+        users = rebuild(db, user_id=args.user_id)
+    finally:
+        db.close()
+    print(f"Rebuilt inbox summaries of {users} users")
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    _main()
@@ -0,0 +1,405 @@
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db import models
+from app.services.inbox_summary import TRACKED, apply_changes, inbox_entry
+from app.services.message_listing import count_cache
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+# Bound parameters per INSERT statement; SQLite builds before 3.32 allow 999
+MAX_BIND_PARAMS = {"sqlite": 900, "postgresql": 30000}
+
+# Queue marker telling the batch writer to finish
+_STOP = object()
+
+# Contact fields refreshed from the latest message's sender
+CONTACT_FIELDS = ("display_name", "username", "phone_number", "first_name", "last_name")
+
+def message_row(message) -> Dict[str, Any]:
+    """Convert a Telethon message into a ``messages`` row."""
+    timestamp = message.date.replace(tzinfo=None) if message.date else None
+    return {
+        "telegram_message_id": message.id,
+        "chat_id": message.chat_id,
+        # Channel posts have no sender; attribute them to the chat
+        "sender_id": message.sender_id or message.chat_id,
+        "message_text": message.message,
+        "timestamp": timestamp,
+        "media_info": {"type": type(message.media).__name__} if message.media else None,
+    }
+
+def contact_row(sender) -> Optional[Dict[str, Any]]:
+    """Convert a Telethon sender entity into a ``contacts`` row."""
+    if sender is None:
+        return None
+    first_name = getattr(sender, "first_name", None)
+    last_name = getattr(sender, "last_name", None)
+    username = getattr(sender, "username", None)
+    display_name = " ".join(part for part in (first_name, last_name) if part) or getattr(sender, "title", None) or username
+    return {
+        "telegram_id": sender.id,
+        "display_name": display_name,
+        "username": username,
+        "phone_number": getattr(sender, "phone", None),
+        "first_name": first_name,
+        "last_name": last_name,
+    }
+
+def dialect_insert(db: Session):
+    """The dialect's INSERT construct with ON CONFLICT support, if any."""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+        return insert
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+        return insert
+    return None
+
+def chunk_rows(db: Session, rows: List[Dict[str, Any]]):
+    """Split rows into multi-row INSERTs that fit the dialect's bind parameter limit."""
+    limit = MAX_BIND_PARAMS.get(db.get_bind().dialect.name, 900)
+    size = max(1, limit // max(1, len(rows[0])))
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+def owner_groups(rows: List[Dict[str, Any]], model, columns: List[Any]):
+    """
+    Split rows by whether they have an owner, with the ON CONFLICT target of each group.
+
+    Rows are unique per owner; ownerless rows, from the global bot client,
+    have a partial unique index of their own as NULL owners never conflict.
+
+    Yields:
+        (rows, ``on_conflict_*`` keyword arguments) for each non-empty group
+    """
+    owned = [row for row in rows if row.get("user_id") is not None]
+    ownerless = [row for row in rows if row.get("user_id") is None]
+    if owned:
+        yield owned, {"index_elements": [model.user_id, *columns]}
+    if ownerless:
+        yield ownerless, {"index_elements": list(columns), "index_where": model.user_id.is_(None)}
+
+def contact_key(row: Dict[str, Any]) -> Tuple[Optional[int], int]:
+    """The key a contact is stored under at most once: owner and Telegram user id."""
+    return row.get("user_id"), row["telegram_id"]
+
+def upsert_contacts(db: Session, rows: List[Dict[str, Any]]) -> None:
+    """
+    Insert new contacts and refresh changed fields of existing ones.
+
+    Fields missing from a row (None) keep their stored value. Does not commit.
+
+    Args:
+        db: Database session
+        rows: Contact rows, at most one per owner and ``telegram_id``
+    """
+    if not rows:
+        return
+
+    insert = dialect_insert(db)
+    if insert is None:
+        existing = set(
+            db.query(models.Contact.user_id, models.Contact.telegram_id).filter(
+                models.Contact.telegram_id.in_([row["telegram_id"] for row in rows])
+            )
+        )
+        db.bulk_insert_mappings(models.Contact, [row for row in rows if contact_key(row) not in existing])
+        return
+
+    for group, conflict in owner_groups(rows, models.Contact, [models.Contact.telegram_id]):
+        for chunk in chunk_rows(db, group):
+            stmt = insert(models.Contact).values(chunk)
+            update = {
+                field: func.coalesce(stmt.excluded[field], getattr(models.Contact, field))
+                for field in CONTACT_FIELDS
+            }
+            stmt = stmt.on_conflict_do_update(**conflict, set_={**update, "updated_at": func.now()})
+            db.execute(stmt)
+
+def link_contacts(db: Session, rows: List[Dict[str, Any]], user_id: Optional[int] = None) -> None:
+    """
+    Set ``contact_id`` (and ``user_id``, if given) on message rows.
+
+    Senders are resolved, with one query, to the contact of the message's
+    owner, so call this after :func:`upsert_contacts` has stored them.
+    Messages whose sender has no contact of that owner keep a null
+    ``contact_id``.
+
+    Args:
+        db: Database session
+        rows: Message rows, updated in place
+        user_id: Owner of the messages
+    """
+    if not rows:
+        return
+    if user_id is not None:
+        for row in rows:
+            row["user_id"] = user_id
+    owners = {row.get("user_id") for row in rows}
+    owner_filter = [models.Contact.user_id.in_(owners - {None})]
+    if None in owners:
+        owner_filter.append(models.Contact.user_id.is_(None))
+    contact_ids = {
+        (owner, telegram_id): contact_id
+        for owner, telegram_id, contact_id in db.query(
+            models.Contact.user_id, models.Contact.telegram_id, models.Contact.id
+        ).filter(
+            models.Contact.telegram_id.in_({row["sender_id"] for row in rows}),
+            or_(*owner_filter),
+        )
+    }
+    for row in rows:
+        row["contact_id"] = contact_ids.get((row.get("user_id"), row["sender_id"]))
+
+def message_key(row: Dict[str, Any]) -> Tuple[Optional[int], int, int]:
+    """The key a message is stored under at most once: owner, chat and Telegram message id."""
+    return row.get("user_id"), row["chat_id"], row["telegram_message_id"]
+
+def insert_messages(db: Session, rows: List[Dict[str, Any]]) -> int:
+    """
+    Insert messages, skipping ones their owner already has for the same chat.
+
+    Owned messages that were actually inserted are added to their users'
+    inbox summaries. Does not commit.
+
+    Args:
+        db: Database session
+        rows: Message rows
+
+    Returns:
+        Number of rows inserted
+    """
+    if not rows:
+        return 0
+
+    insert = dialect_insert(db)
+    if insert is None:
+        existing = set(
+            db.query(models.Message.user_id, models.Message.chat_id, models.Message.telegram_message_id).filter(
+                models.Message.telegram_message_id.in_([row["telegram_message_id"] for row in rows])
+            )
+        )
+        new_rows = [row for row in rows if message_key(row) not in existing]
+        db.bulk_insert_mappings(models.Message, new_rows)
+        # is_responded defaults to False
+        apply_changes(db.connection(), [], [inbox_entry({"is_responded": False, **row}) for row in new_rows])
+        return len(new_rows)
+
+    inbox_columns = [getattr(models.Message, key) for key in TRACKED]
+    inserted = 0
+    entries = []
+    key = [models.Message.chat_id, models.Message.telegram_message_id]
+    for group, conflict in owner_groups(rows, models.Message, key):
+        owned = group[0].get("user_id") is not None
+        for chunk in chunk_rows(db, group):
+            stmt = insert(models.Message).values(chunk).on_conflict_do_nothing(**conflict)
+            if owned:
+                # Only messages with an owner are in an inbox; others don't need to be read back
+                new_rows = db.execute(stmt.returning(*inbox_columns)).mappings().all()
+                entries.extend(inbox_entry(row) for row in new_rows)
+                inserted += len(new_rows)
+            else:
+                result = db.execute(stmt)
+                inserted += max(result.rowcount, 0)
+    apply_changes(db.connection(), [], entries)
+    return inserted
+
+def write_batch(db: Session, batch: List[Tuple[Dict[str, Any], Optional[Dict[str, Any]]]]) -> int:
+    """
+    Store a batch of ingested messages and their senders in one transaction.
+
+    Returns:
+        Number of new messages stored
+    """
+    # A sender is a contact of the message's owner; latest details win when
+    # a contact appears several times
+    contacts = {}
+    for row, contact in batch:
+        if contact is not None:
+            contact = {**contact, "user_id": row.get("user_id")}
+            contacts[contact_key(contact)] = contact
+    # Telegram can redeliver updates; keep one row per message
+    messages = {message_key(row): row for row, _ in batch}
+
+    try:
+        upsert_contacts(db, list(contacts.values()))
+        link_contacts(db, list(messages.values()))
+        inserted = insert_messages(db, list(messages.values()))
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    count_cache.invalidate_users(row.get("user_id") for row in messages.values())
+    return inserted
+
+class MessageIngestor:
+    """
+    Streams incoming Telegram messages into the database.
+
+    Event handlers put messages on a bounded queue and return immediately;
+    a single background task drains the queue in micro-batches, flushing
+    every ``batch_size`` messages or ``flush_interval`` seconds, and writes
+    each batch (contacts upserted, messages inserted) in one transaction on
+    a worker thread. When the queue is full, :meth:`submit` waits, which
+    pushes back on the event handlers; the time spent waiting is reported
+    by :meth:`stats`.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = 500,
+        flush_interval: float = 0.2,
+        max_queue_size: int = 10000,
+        writer: Optional[Callable[[List], int]] = None,
+    ):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_queue_size = max_queue_size
+        self._writer = writer or self._write
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+        # Metrics
+        self.received = 0
+        self.written = 0
+        self.failed = 0
+        self.batches = 0
+        self.blocked_submits = 0
+        self.blocked_seconds = 0.0
+        self.last_batch_size = 0
+        self.last_flush_seconds = 0.0
+        self.total_flush_seconds = 0.0
+
+    @property
+    def queue(self) -> asyncio.Queue:
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        return self._queue
+
+    def start(self) -> None:
+        """Start the background batch writer."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Flush queued messages and stop the batch writer."""
+        if self._task is None:
+            return
+        # Queued behind every pending message, so they are all written first
+        await self.queue.put(_STOP)
+        await self._task
+        self._task = None
+
+    async def submit(self, message, user_id: Optional[int] = None) -> None:
+        """
+        Queue a Telethon message for storage.
+
+        Waits while the queue is full. Messages of users' own accounts come
+        from :mod:`app.services.account_listeners`, with their owner.
+
+        Args:
+            message: Telethon message
+            user_id: Owner of the account that received it; None for the global bot client
+        """
+        row = message_row(message)
+        if user_id is not None:
+            row["user_id"] = user_id
+        item = (row, contact_row(getattr(message, "sender", None)))
+        self.received += 1
+        try:
+            self.queue.put_nowait(item)
+        except asyncio.QueueFull:
+            self.blocked_submits += 1
+            started = time.monotonic()
+            await self.queue.put(item)
+            self.blocked_seconds += time.monotonic() - started
+
+    async def handle_event(self, event) -> None:
+        """Telethon ``events.NewMessage`` handler of the global bot client, whose messages have no owner."""
+        if event.message.out:
+            return
+        await self.submit(event.message)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queue_depth": self.queue.qsize(),
+            "max_queue_size": self.max_queue_size,
+            "received": self.received,
+            "written": self.written,
+            "failed": self.failed,
+            "batches": self.batches,
+            "blocked_submits": self.blocked_submits,
+            "blocked_seconds": self.blocked_seconds,
+            "last_batch_size": self.last_batch_size,
+            "last_flush_ms": self.last_flush_seconds * 1000,
+            "avg_flush_ms": self.total_flush_seconds / self.batches * 1000 if self.batches else 0.0,
+        }
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            first = await self.queue.get()
+            if first is _STOP:
+                return
+            batch = [first]
+            deadline = loop.time() + self.flush_interval
+
+            # Collect until the batch is full or the flush interval has passed
+            while len(batch) < self.batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self.queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    try:
+                        item = await asyncio.wait_for(self.queue.get(), remaining)
+                    except asyncio.TimeoutError:
+                        break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            await self._flush(batch)
+
+    async def _flush(self, batch: List) -> None:
+        started = time.monotonic()
+        try:
+            inserted = await asyncio.to_thread(self._writer, batch)
+            self.written += inserted
+        except Exception as e:
+            self.failed += len(batch)
+            logger.error(f"Error storing {len(batch)} ingested messages: {str(e)}")
+
+        self.batches += 1
+        self.last_batch_size = len(batch)
+        self.last_flush_seconds = time.monotonic() - started
+        self.total_flush_seconds += self.last_flush_seconds
+
+    @staticmethod
+    def _write(batch: List) -> int:
+        from app.db.database import SessionLocal
+
+        db = SessionLocal()
+        try:
+            return write_batch(db, batch)
+        finally:
+            db.close()
+
+# Create a singleton instance
+message_ingestor = MessageIngestor(
+    batch_size=settings.INGEST_BATCH_SIZE,
+    flush_interval=settings.INGEST_FLUSH_INTERVAL,
+    max_queue_size=settings.INGEST_MAX_QUEUE_SIZE,
+)
@@ -0,0 +1,161 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Hashable, Iterable, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session, raiseload, selectinload
+
+from app import models
+from app.core.config import settings
+from app.services.message_search import search_backend
+from app.services.message_service import MESSAGE_KEY
+from app.services.pagination import Page, keyset, make_page
+
+class CountCache:
+    """
+    Short-lived cache of listing totals, keyed by user and filters.
+
+    While a total is cached, later pages of the same listing skip counting
+    altogether. Entries expire after ``ttl`` seconds and are dropped early
+    by :meth:`invalidate` when a user's messages change. Thread-safe: the
+    sync listing endpoints run in the threadpool.
+    """
+
+    def __init__(self, ttl: float = 30.0, max_entries: int = 10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[int, Hashable], Tuple[float, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: int, filters: Hashable) -> Optional[int]:
+        with self._lock:
+            entry = self._entries.get((user_id, filters))
+            if entry is None:
+                return None
+            expires, total = entry
+            if expires <= time.monotonic():
+                del self._entries[(user_id, filters)]
+                return None
+            return total
+
+    def set(self, user_id: int, filters: Hashable, total: int) -> None:
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries[(user_id, filters)] = (time.monotonic() + self.ttl, total)
+            self._entries.move_to_end((user_id, filters))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: int) -> None:
+        """Forget every cached total of a user."""
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == user_id]:
+                del self._entries[key]
+
+    def invalidate_users(self, user_ids: Iterable[Optional[int]]) -> None:
+        """Forget the cached totals of several users; None (ownerless) is ignored."""
+        for user_id in set(user_ids) - {None}:
+            self.invalidate(user_id)
+
+def _filtered(
+    db: Session,
+    user_id: int,
+    contact_id: Optional[int],
+    category: Optional[str],
+    is_responded: Optional[bool],
+    search: Optional[str],
+):
+    query = select(models.Message).where(models.Message.user_id == user_id)
+    if contact_id is not None:
+        query = query.where(models.Message.contact_id == contact_id)
+    if category:
+        query = query.where(models.Message.category == category)
+    if is_responded is not None:
+        query = query.where(models.Message.is_responded == is_responded)
+    if search:
+        query = search_backend(db).filter(query, models.Message, search)
+    return query
+
+def list_user_messages(
+    db: Session,
+    user_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    contact_id: Optional[int] = None,
+    category: Optional[str] = None,
+    is_responded: Optional[bool] = None,
+    search: Optional[str] = None,
+    with_contact: bool = False,
+    total: Optional[int] = None,
+) -> Tuple[Page, int]:
+    """
+    Get a page of a user's messages, newest first, and the total matching.
+
+    Pages are keyset-paginated on (timestamp, id): pass the previous page's
+    ``next_cursor`` as ``cursor`` and the cost of a page doesn't grow with
+    its depth. ``skip`` still offsets first pages for older clients.
+
+    The total comes from ``COUNT(*) OVER()`` on the first page's query, so
+    a page costs one query instead of a page query plus a count. Totals are
+    then cached briefly; while cached, pages are fetched without the window.
+
+    Args:
+        db: Database session
+        user_id: Owner of the messages
+        skip: Number of records to skip; ignored with ``cursor``
+        limit: Maximum number of records to return
+        cursor: ``next_cursor`` of the previous page, or None for the first page
+        contact_id: Optional contact filter
+        category: Optional category filter
+        is_responded: Optional responded status filter
+        search: Optional words of the message text, matched by the search backend
+        with_contact: Load each message's contact with one extra query for the
+            whole page; otherwise reading ``contact`` raises instead of
+            lazy-loading it row by row
+        total: Total already known (e.g. from the inbox summary); skips counting
+
+    Returns:
+        Tuple of (page of messages and the next page's cursor, total)
+
+    Raises:
+        InvalidCursor: If the cursor can't be decoded
+    """
+    filters = (contact_id, category, is_responded, search)
+    query = keyset(_filtered(db, user_id, *filters), MESSAGE_KEY, cursor, limit)
+    if skip and not cursor:
+        query = query.offset(skip)
+    query = query.options(
+        selectinload(models.Message.contact) if with_contact else raiseload(models.Message.contact)
+    )
+
+    if total is None:
+        total = count_cache.get(user_id, filters)
+    if total is not None:
+        return make_page(db.scalars(query).all(), MESSAGE_KEY, limit), total
+
+    if cursor:
+        # The window would only count rows after the cursor
+        rows = db.scalars(query).all()
+        total = _count(db, user_id, filters)
+    else:
+        windowed = db.execute(query.add_columns(func.count().over().label("total"))).all()
+        rows = [row[0] for row in windowed]
+        if windowed:
+            total = windowed[0].total
+        elif skip:
+            # Past the last row the window has nothing to report
+            total = _count(db, user_id, filters)
+        else:
+            total = 0
+
+    count_cache.set(user_id, filters, total)
+    return make_page(rows, MESSAGE_KEY, limit), total
+
+def _count(db: Session, user_id: int, filters: Tuple) -> int:
+    return db.scalar(select(func.count()).select_from(_filtered(db, user_id, *filters).subquery()))
+
+# Create a singleton instance
+count_cache = CountCache(ttl=settings.MESSAGE_COUNT_CACHE_TTL)
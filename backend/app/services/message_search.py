@@ -0,0 +1,206 @@
+import logging
+import re
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import column, func, literal, literal_column, select, table, text
+from sqlalchemy.orm import Session
+
+from app import models
+from app.core.config import settings
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+# Markers around matched terms in snippets
+MARK_START = "<mark>"
+MARK_END = "</mark>"
+
+# Approximate length of LIKE-fallback snippets, in characters
+SNIPPET_CHARS = 120
+
+def search_terms(search: str) -> List[str]:
+    """Split a search string into the words the full-text backends match."""
+    return re.findall(r"\w+", search)
+
+def escape_like(value: str) -> str:
+    """Escape ``LIKE`` wildcards (and the escape character) in a literal pattern part."""
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+class SearchBackend(ABC):
+    """
+    Full-text search over ``messages.message_text``.
+
+    :meth:`filter` restricts a message select to matches; :meth:`search`
+    additionally adds a ``rank`` (higher is better) and a highlighted
+    ``snippet`` column and orders by rank. Both take the mapped message
+    class, so they work for either model set.
+    """
+
+    name = "base"
+
+    @abstractmethod
+    def filter(self, query, model, search: str):
+        """Restrict a message select to messages matching ``search``."""
+
+    @abstractmethod
+    def search(self, query, model, search: str):
+        """Matching messages with ``rank`` and ``snippet`` columns, best first."""
+
+    def snippet(self, message_text: Optional[str], search: str, snippet: Optional[str]) -> str:
+        return snippet or ""
+
+class LikeSearchBackend(SearchBackend):
+    """Substring matching with ``LIKE``; scans every row, but works everywhere."""
+
+    name = "like"
+
+    def filter(self, query, model, search: str):
+        # % and _ in the search are literal characters, not wildcards
+        return query.where(model.message_text.ilike(f"%{escape_like(search)}%", escape="\\"))
+
+    def search(self, query, model, search: str):
+        return self.filter(query, model, search).add_columns(
+            literal(0.0).label("rank"), literal(None).label("snippet")
+        ).order_by(model.timestamp.desc(), model.id.desc())
+
+    def snippet(self, message_text: Optional[str], search: str, snippet: Optional[str]) -> str:
+        message_text = message_text or ""
+        start = message_text.lower().find(search.lower())
+        if start < 0:
+            return message_text[:SNIPPET_CHARS]
+        end = start + len(search)
+        context = max(0, (SNIPPET_CHARS - len(search)) // 2)
+        left = max(0, start - context)
+        right = min(len(message_text), end + context)
+        return (
+            ("…" if left else "")
+            + message_text[left:start] + MARK_START + message_text[start:end] + MARK_END + message_text[end:right]
+            + ("…" if right < len(message_text) else "")
+        )
+
+class SQLiteFTSBackend(SearchBackend):
+    """
+    SQLite FTS5 over the external-content ``message_fts`` table.
+
+    Words are matched as quoted tokens, the last one as a prefix so results
+    follow typing. Ranked by ``bm25``.
+    """
+
+    name = "sqlite_fts5"
+
+    fts = table("message_fts", column("rowid"))
+
+    def _match(self, search: str):
+        terms = ['"%s"' % term.replace('"', '""') for term in search_terms(search)]
+        terms[-1] += "*"
+        return literal_column("message_fts").op("MATCH")(" ".join(terms))
+
+    def filter(self, query, model, search: str):
+        if not search_terms(search):
+            return LikeSearchBackend().filter(query, model, search)
+        matches = select(self.fts.c.rowid).where(self._match(search))
+        return query.where(model.id.in_(matches))
+
+    def search(self, query, model, search: str):
+        if not search_terms(search):
+            return LikeSearchBackend().search(query, model, search)
+        # bm25 is lower for better matches
+        score = func.bm25(literal_column("message_fts"))
+        snippet = func.snippet(literal_column("message_fts"), 0, MARK_START, MARK_END, "…", 16)
+        return query.join(self.fts, self.fts.c.rowid == model.id).where(self._match(search)).add_columns(
+            (-score).label("rank"), snippet.label("snippet")
+        ).order_by(score, model.id.desc())
+
+class PostgresSearchBackend(SearchBackend):
+    """
+    Postgres full-text search on the trigger-maintained, GIN-indexed
+    ``messages.search_vector`` column. Uses the ``simple`` configuration,
+    since conversations mix languages; ranked by ``ts_rank_cd``.
+    """
+
+    name = "postgres_tsvector"
+
+    def _tsquery(self, search: str):
+        return func.websearch_to_tsquery("simple", search)
+
+    def filter(self, query, model, search: str):
+        return query.where(literal_column("messages.search_vector").op("@@")(self._tsquery(search)))
+
+    def search(self, query, model, search: str):
+        tsquery = self._tsquery(search)
+        rank = func.ts_rank_cd(literal_column("messages.search_vector"), tsquery)
+        snippet = func.ts_headline(
+            "simple", model.message_text, tsquery,
+            f"StartSel={MARK_START}, StopSel={MARK_END}, MaxWords=24, MinWords=8"
+        )
+        return self.filter(query, model, search).add_columns(
+            rank.label("rank"), snippet.label("snippet")
+        ).order_by(rank.desc(), model.id.desc())
+
+# Backend chosen for each engine, detected on first use
+_backends: Dict[Any, SearchBackend] = {}
+
+def search_backend(db: Session) -> SearchBackend:
+    """
+    The search backend for a session's database.
+
+    Full-text backends are used when their index exists (see the
+    ``add_message_search`` migration) and ``SEARCH_BACKEND`` allows it;
+    otherwise searches fall back to ``LIKE``.
+    """
+    bind = db.get_bind()
+    backend = _backends.get(bind)
+    if backend is None:
+        backend = _detect_backend(db, bind.dialect.name)
+        logger.info(f"Using {backend.name} message search")
+        _backends[bind] = backend
+    return backend
+
+def _detect_backend(db: Session, dialect: str) -> SearchBackend:
+    if settings.SEARCH_BACKEND == "like":
+        return LikeSearchBackend()
+    if dialect == "sqlite":
+        found = db.execute(text(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'message_fts'"
+        )).first()
+        if found:
+            return SQLiteFTSBackend()
+    elif dialect == "postgresql":
+        found = db.execute(text(
+            "SELECT 1 FROM information_schema.columns "
+            "WHERE table_name = 'messages' AND column_name = 'search_vector'"
+        )).first()
+        if found:
+            return PostgresSearchBackend()
+    return LikeSearchBackend()
+
+def search_messages(db: Session, user_id: int, search: str, skip: int = 0, limit: int = 20) -> List[Dict[str, Any]]:
+    """
+    Search a user's messages, best matches first.
+
+    Args:
+        db: Database session
+        user_id: Owner of the messages
+        search: Words to look for
+        skip: Number of results to skip
+        limit: Maximum number of results to return
+
+    Returns:
+        List of dicts with ``message``, ``rank`` and a highlighted ``snippet``
+    """
+    backend = search_backend(db)
+    query = backend.search(
+        select(models.Message).where(models.Message.user_id == user_id),
+        models.Message,
+        search,
+    ).offset(skip).limit(limit)
+
+    return [
+        {
+            "message": message,
+            "rank": rank,
+            "snippet": backend.snippet(message.message_text, search, snippet),
+        }
+        for message, rank, snippet in db.execute(query)
+    ]
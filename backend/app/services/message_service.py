@@ -1,10 +1,15 @@
 from typing import List, Optional, Dict, Any
 from datetime import datetime, timedelta
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.db import models
 from app.schemas.message import MessageCreate, MessageUpdate
 
+# Listing order, newest first; the id breaks timestamp ties
+MESSAGE_KEY = (models.Message.timestamp, models.Message.id)
+
 def get_messages(
     db: Session, 
     skip: int = 0, 
@@ -25,15 +30,33 @@ def get_messages(
     Returns:
         List of messages
     """
-    query = db.query(models.Message)
+    return db.scalars(_messages_query(skip, limit, category, is_responded)).all()
+
+async def get_messages_async(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 100,
+    category: Optional[str] = None,
+    is_responded: Optional[bool] = None,
+) -> List[models.Message]:
+    """Async version of :func:`get_messages`."""
+    return (await db.scalars(_messages_query(skip, limit, category, is_responded))).all()
+
+def _messages_query(skip: int, limit: int, category: Optional[str], is_responded: Optional[bool]):
+    # Same order as the keyset listings, so offsets are stable too
+    order = [column.desc() for column in MESSAGE_KEY]
+    return _filtered_messages(category, is_responded).order_by(*order).offset(skip).limit(limit)
+
+def _filtered_messages(category: Optional[str], is_responded: Optional[bool]):
+    query = select(models.Message)
     
     if category:
-        query = query.filter(models.Message.category == category)
+        query = query.where(models.Message.category == category)
     
     if is_responded is not None:
-        query = query.filter(models.Message.is_responded == is_responded)
+        query = query.where(models.Message.is_responded == is_responded)
     
-    return query.offset(skip).limit(limit).all()
+    return query
 
 def get_message_by_id(db: Session, message_id: int) -> Optional[models.Message]:
     """
@@ -46,20 +69,48 @@ def get_message_by_id(db: Session, message_id: int) -> Optional[models.Message]:
     Returns:
         Message object or None if not found
     """
-    return db.query(models.Message).filter(models.Message.id == message_id).first()
+    return db.get(models.Message, message_id)
 
-def create_message(db: Session, message_in: MessageCreate) -> models.Message:
+async def get_message_by_id_async(db: AsyncSession, message_id: int) -> Optional[models.Message]:
+    """Async version of :func:`get_message_by_id`."""
+    return await db.get(models.Message, message_id)
+
+def create_message(db: Session, message_in: MessageCreate, user_id: Optional[int] = None) -> models.Message:
     """
     Create a new message.
     
     Args:
         db: Database session
         message_in: Message creation data
+        user_id: Owner of the message; None for the global bot client
         
     Returns:
         Created message object
     """
-    db_message = models.Message(
+    db_message = _new_message(message_in, user_id)
+    db.add(db_message)
+    db.commit()
+    db.refresh(db_message)
+    return db_message
+
+async def create_message_async(
+    db: AsyncSession, message_in: MessageCreate, user_id: Optional[int] = None
+) -> models.Message:
+    """Async version of :func:`create_message`."""
+    db_message = _new_message(message_in, user_id)
+    db.add(db_message)
+    await db.commit()
+    await db.refresh(db_message)
+    return db_message
+
+def _new_message(message_in: MessageCreate, user_id: Optional[int]) -> models.Message:
+    return models.Message(
+        user_id=user_id,
+        # Linked to the owner's contact for the sender, if stored, as part of the INSERT
+        contact_id=select(models.Contact.id).where(
+            models.Contact.user_id == user_id,
+            models.Contact.telegram_id == message_in.sender_id
+        ).scalar_subquery(),
         telegram_message_id=message_in.telegram_message_id,
         chat_id=message_in.chat_id,
         sender_id=message_in.sender_id,
@@ -73,10 +124,6 @@ def create_message(db: Session, message_in: MessageCreate) -> models.Message:
         is_read=False,
         is_responded=False,
     )
-    db.add(db_message)
-    db.commit()
-    db.refresh(db_message)
-    return db_message
 
 def update_message(db: Session, db_obj: models.Message, obj_in: MessageUpdate) -> models.Message:
     """
@@ -99,6 +146,17 @@ def update_message(db: Session, db_obj: models.Message, obj_in: MessageUpdate) -
     db.refresh(db_obj)
     return db_obj
 
+async def update_message_async(db: AsyncSession, db_obj: models.Message, obj_in: MessageUpdate) -> models.Message:
+    """Async version of :func:`update_message`."""
+    update_data = obj_in.dict(exclude_unset=True)
+    
+    for field in update_data:
+        setattr(db_obj, field, update_data[field])
+    
+    await db.commit()
+    await db.refresh(db_obj)
+    return db_obj
+
 def get_unresponded_messages(db: Session, skip: int = 0, limit: int = 100, days_back: int = 7) -> List[models.Message]:
     """
     Get unresponded messages from the last N days.
@@ -112,9 +170,22 @@ def get_unresponded_messages(db: Session, skip: int = 0, limit: int = 100, days_
     Returns:
         List of unresponded messages
     """
+    return db.scalars(_unresponded_query(skip, limit, days_back)).all()
+
+async def get_unresponded_messages_async(
+    db: AsyncSession, skip: int = 0, limit: int = 100, days_back: int = 7
+) -> List[models.Message]:
+    """Async version of :func:`get_unresponded_messages`."""
+    return (await db.scalars(_unresponded_query(skip, limit, days_back))).all()
+
+def _unresponded_query(skip: int, limit: int, days_back: int):
+    order = [column.desc() for column in MESSAGE_KEY]
+    return _unresponded(days_back).order_by(*order).offset(skip).limit(limit)
+
+def _unresponded(days_back: int):
     cutoff_date = datetime.utcnow() - timedelta(days=days_back)
     
-    return db.query(models.Message).filter(
+    return select(models.Message).where(
         models.Message.is_responded == False,
         models.Message.timestamp >= cutoff_date
-    ).offset(skip).limit(limit).all() 
\ No newline at end of file
+    ) 
\ No newline at end of file
@@ -11,25 +11,41 @@ import datetime
 import logging
 
 from app.core.config import settings
+from app.services.online_learning import ONLINE_MODEL_TYPE, OnlineLearner, OnlineMessageClassifier
 
 # Set up logger
 logger = logging.getLogger(__name__)
 
 class MLEngine:
-    def __init__(self):
+    def __init__(self, model_type: Optional[str] = None):
+        self.model_type = model_type or settings.ML_MODEL_TYPE  # "random_forest" or "online"
         self.model_dir = settings.ML_MODEL_PATH
         self.model_path = os.path.join(self.model_dir, "message_classifier.joblib")
         self.vectorizer_path = os.path.join(self.model_dir, "vectorizer.joblib")
+        self.online_learner = OnlineLearner(
+            os.path.join(self.model_dir, "online_classifier.joblib"),
+            save_every=settings.ML_ONLINE_SAVE_EVERY,
+            use_metadata=False
+        )
         self.stats_path = os.path.join(self.model_dir, "training_stats.joblib")
         self.model = None
         self.vectorizer = None
         self.training_stats = {}
         self._load_model()
     
+    @property
+    def is_online(self) -> bool:
+        return self.model_type == ONLINE_MODEL_TYPE
+    
     def _load_model(self) -> None:
         """Load the model and vectorizer if they exist"""
         try:
-            if os.path.exists(self.model_path) and os.path.exists(self.vectorizer_path):
+            if self.is_online:
+                # The online model hashes text itself; there is no separate vectorizer
+                self.model = self.online_learner.get()
+                if os.path.exists(self.stats_path):
+                    self.training_stats = joblib.load(self.stats_path)
+            elif os.path.exists(self.model_path) and os.path.exists(self.vectorizer_path):
                 self.model = joblib.load(self.model_path)
                 self.vectorizer = joblib.load(self.vectorizer_path)
                 if os.path.exists(self.stats_path):
@@ -64,22 +80,31 @@ class MLEngine:
         # Split data
         X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
         
-        # Create and fit vectorizer
-        self.vectorizer = TfidfVectorizer(max_features=5000)
-        X_train_vectorized = self.vectorizer.fit_transform(X_train)
-        
-        # Train model
-        self.model = RandomForestClassifier(n_estimators=100, random_state=42)
-        self.model.fit(X_train_vectorized, y_train)
-        
-        # Evaluate
-        X_test_vectorized = self.vectorizer.transform(X_test)
-        y_pred = self.model.predict(X_test_vectorized)
-        accuracy = accuracy_score(y_test, y_pred)
-        
-        # Save model and vectorizer
-        joblib.dump(self.model, self.model_path)
-        joblib.dump(self.vectorizer, self.vectorizer_path)
+        if self.is_online:
+            # Full refit of the online model; later labels are applied with learn()
+            self.model = OnlineMessageClassifier(use_metadata=False).fit(X_train, None, y_train)
+            y_pred = self.model.model.predict(self.model.transform(X_test))
+            accuracy = accuracy_score(y_test, y_pred)
+            
+            # Swap in and save model
+            self.online_learner.consolidate(self.model)
+        else:
+            # Create and fit vectorizer
+            self.vectorizer = TfidfVectorizer(max_features=5000)
+            X_train_vectorized = self.vectorizer.fit_transform(X_train)
+            
+            # Train model
+            self.model = RandomForestClassifier(n_estimators=100, random_state=42)
+            self.model.fit(X_train_vectorized, y_train)
+            
+            # Evaluate
+            X_test_vectorized = self.vectorizer.transform(X_test)
+            y_pred = self.model.predict(X_test_vectorized)
+            accuracy = accuracy_score(y_test, y_pred)
+            
+            # Save model and vectorizer
+            joblib.dump(self.model, self.model_path)
+            joblib.dump(self.vectorizer, self.vectorizer_path)
         
         # Save category distribution
         category_counts = data['category'].value_counts().to_dict()
@@ -95,34 +120,58 @@ class MLEngine:
         
         return self.training_stats
     
+    def learn(self, message_text: str, category: str) -> bool:
+        """
+        Apply a single labelled example to the online model.
+        
+        Returns:
+            True if the model was updated, False if the category is new and
+            needs a full retrain
+        """
+        if not self.is_online:
+            raise ValueError("Incremental learning requires the online model type")
+        
+        return self.online_learner.learn(message_text, None, category)
+    
+    def _is_ready(self) -> bool:
+        if self.is_online:
+            return self.model is not None and self.model.is_fitted
+        return self.model is not None and self.vectorizer is not None
+    
     def predict_category(self, message_text: str) -> Dict:
         """Predict category for a message"""
-        if not self.model or not self.vectorizer:
+        return self.predict_categories([message_text])[0]
+    
+    def predict_categories(self, message_texts: List[str]) -> List[Dict]:
+        """Predict categories for many messages with a single model call"""
+        if not self._is_ready():
             raise ValueError("Model not loaded. Please train the model first.")
         
-        # Vectorize input
-        X = self.vectorizer.transform([message_text])
-        
-        # Get prediction and probabilities
-        category = self.model.predict(X)[0]
-        proba = self.model.predict_proba(X)[0]
-        
-        # Map probabilities to classes
-        class_probabilities = {
-            cls: float(prob) 
-            for cls, prob in zip(self.model.classes_, proba)
-        }
-        
-        return {
-            'predicted_category': category,
-            'confidence': float(max(proba)),
-            'class_probabilities': class_probabilities
-        }
+        # Get predictions and probabilities
+        if self.is_online:
+            probas = self.model.predict_proba(message_texts)
+        else:
+            # Vectorize input
+            X = self.vectorizer.transform(message_texts)
+            probas = self.model.predict_proba(X)
+        classes = self.model.classes_
+        
+        predictions = []
+        for proba in probas:
+            best = int(np.argmax(proba))
+            predictions.append({
+                'predicted_category': classes[best],
+                'confidence': float(proba[best]),
+                # Map probabilities to classes
+                'class_probabilities': {cls: float(prob) for cls, prob in zip(classes, proba)}
+            })
+        return predictions
     
     def get_stats(self) -> Dict:
         """Get model statistics"""
         return {
-            'model_exists': self.model is not None and self.vectorizer is not None,
+            'model_type': self.model_type,
+            'model_exists': self._is_ready(),
             'training_data_count': self.training_stats.get('training_data_count', 0),
             'accuracy': self.training_stats.get('accuracy', 0),
             'last_trained': self.training_stats.get('last_trained'),
@@ -0,0 +1,209 @@
+import asyncio
+import logging
+import multiprocessing
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from app.core.config import settings
+from app.db.database import SessionLocal
+from app.services import ml_service
+from app.services.ml_training import fit_artifacts, fit_online_model, publish_version
+from app.services.online_learning import ONLINE_MODEL_TYPE
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+# Job states
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+
+@dataclass
+class TrainingJob:
+    """State of one background retraining run."""
+    id: str
+    status: str = QUEUED
+    stage: str = "queued"
+    progress: float = 0.0
+    version: Optional[str] = None
+    metrics: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+    created_at: datetime = field(default_factory=datetime.utcnow)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    def advance(self, stage: str, progress: float) -> None:
+        self.stage = stage
+        self.progress = progress
+
+
+class TrainingJobManager:
+    """
+    Runs model retraining in the background.
+
+    Training data is read from the database in a thread, the vectorizer and
+    classifier are fitted in a separate process so the API workers stay
+    responsive, and the new version is published with an atomic pointer
+    swap once all of its files are on disk. Only one job runs at a time;
+    requesting a retrain while one is pending returns that job.
+
+    In online mode a job is a consolidation: the online model is refitted
+    from scratch on every stored label and swapped in, and
+    :meth:`start_schedule` runs one periodically.
+    """
+
+    def __init__(self, max_workers: int = 1, history_size: int = 50):
+        self.max_workers = max_workers
+        self.history_size = history_size
+        self._jobs: Dict[str, TrainingJob] = {}
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._schedule: Optional[asyncio.Task] = None
+
+    def submit(self) -> TrainingJob:
+        """Start a retraining job, or return the one already pending."""
+        active = self.active_job()
+        if active is not None:
+            return active
+
+        job = TrainingJob(id=uuid.uuid4().hex)
+        self._jobs[job.id] = job
+        self._trim_history()
+        self._tasks[job.id] = asyncio.create_task(self._run(job))
+        return job
+
+    def get(self, job_id: str) -> Optional[TrainingJob]:
+        return self._jobs.get(job_id)
+
+    def list(self) -> List[TrainingJob]:
+        """Known jobs, newest first."""
+        return sorted(self._jobs.values(), key=lambda job: job.created_at, reverse=True)
+
+    def active_job(self) -> Optional[TrainingJob]:
+        for job in self._jobs.values():
+            if job.status in (QUEUED, RUNNING):
+                return job
+        return None
+
+    def start_schedule(self, interval: float) -> None:
+        """Submit a retraining job every ``interval`` seconds."""
+        if interval > 0 and (self._schedule is None or self._schedule.done()):
+            self._schedule = asyncio.create_task(self._run_schedule(interval))
+
+    async def _run_schedule(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            self.submit()
+
+    async def shutdown(self) -> None:
+        """Cancel pending jobs and stop the worker processes."""
+        if self._schedule is not None:
+            self._schedule.cancel()
+            self._schedule = None
+        for task in self._tasks.values():
+            task.cancel()
+        self._tasks.clear()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # Spawn rather than fork so workers don't inherit the event loop and DB connections
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    async def _run(self, job: TrainingJob) -> None:
+        loop = asyncio.get_running_loop()
+        job.status = RUNNING
+        job.started_at = datetime.utcnow()
+
+        online = settings.ML_MODEL_TYPE == ONLINE_MODEL_TYPE
+        try:
+            if online:
+                # Feedback arriving from now on is replayed onto the refitted model
+                ml_service.online_learner.begin_consolidation()
+
+            job.advance("loading_data", 0.05)
+            training_set = await loop.run_in_executor(None, _load_training_set)
+            if training_set is None:
+                raise ValueError("No training data available")
+
+            job.advance("training", 0.2)
+            if online:
+                classifier = await loop.run_in_executor(
+                    self._get_executor(),
+                    fit_online_model,
+                    training_set["texts"],
+                    training_set["metadata_features"],
+                    training_set["labels"],
+                )
+
+                job.advance("publishing", 0.95)
+                await loop.run_in_executor(None, ml_service.online_learner.consolidate, classifier)
+                job.metrics = {"training_samples": len(training_set["labels"]), "classes": list(classifier.classes)}
+            else:
+                result = await loop.run_in_executor(
+                    self._get_executor(),
+                    fit_artifacts,
+                    training_set["texts"],
+                    training_set["metadata_features"],
+                    training_set["labels"],
+                    ml_service.MODELS_DIR,
+                )
+
+                job.advance("publishing", 0.95)
+                await loop.run_in_executor(
+                    None,
+                    publish_version,
+                    ml_service.MODELS_DIR,
+                    result["version"],
+                    ml_service.MODEL_VERSIONS_TO_KEEP,
+                )
+                job.version = result["version"]
+                job.metrics = result["metrics"]
+
+            job.status = SUCCEEDED
+            job.advance("done", 1.0)
+            logger.info(f"Model retraining job {job.id} finished")
+        except asyncio.CancelledError:
+            if online:
+                ml_service.online_learner.abort_consolidation()
+            job.status = FAILED
+            job.error = "Cancelled"
+            raise
+        except Exception as e:
+            logger.error(f"Error retraining model: {str(e)}")
+            if online:
+                ml_service.online_learner.abort_consolidation()
+            job.status = FAILED
+            job.error = str(e)
+        finally:
+            job.finished_at = datetime.utcnow()
+            self._tasks.pop(job.id, None)
+
+    def _trim_history(self) -> None:
+        finished = [job for job in self.list() if job.status in (SUCCEEDED, FAILED)]
+        for job in finished[self.history_size:]:
+            del self._jobs[job.id]
+
+
+def _load_training_set() -> Optional[Dict[str, Any]]:
+    """Read the training set with a dedicated session (runs in a thread)."""
+    db = SessionLocal()
+    try:
+        return ml_service.load_training_set(db)
+    finally:
+        db.close()
+
+
+# Create a singleton instance
+training_jobs = TrainingJobManager(max_workers=settings.ML_TRAINING_WORKERS)
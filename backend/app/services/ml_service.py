@@ -1,19 +1,56 @@
-from typing import Dict, Any, List, Optional
-import joblib
+from collections import namedtuple
+from typing import Dict, Any, List, Optional, Tuple
 import os
 import numpy as np
+import scipy.sparse as sp
 from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.metrics import predict_latency
 from app.db import models
 from app.ml_engine import MessageFeatureExtractor
 from app.schemas.ml import MLPrediction, MLFeedback, MLStats
+from app.services.model_registry import model_registry
+from app.services.ml_training import (
+    MODEL_FILENAME,
+    VECTORIZER_FILENAME,
+    current_version_dir,
+    fit_artifacts,
+    publish_version,
+)
+from app.services.online_learning import ONLINE_MODEL_TYPE, OnlineLearner
+from app.services.feature_store import pack_features, save_vectors, stored_vector
 from datetime import datetime, timedelta
 
-# Path to the ML model file
-MODEL_PATH = "models/message_classifier.joblib"
+# Root directory for trained model versions
+MODELS_DIR = "models"
+
+# Path to the ML model file (unversioned layout used before model versions)
+MODEL_PATH = os.path.join(MODELS_DIR, MODEL_FILENAME)
+
+# Path to the fitted TF-IDF vectorizer (unversioned layout)
+VECTORIZER_PATH = os.path.join(MODELS_DIR, VECTORIZER_FILENAME)
+
+# Number of trained versions kept on disk
+MODEL_VERSIONS_TO_KEEP = 3
+
+# Path to the incrementally trained model used when ML_MODEL_TYPE is "online"
+ONLINE_MODEL_PATH = os.path.join(MODELS_DIR, "online", "online_classifier.joblib")
+
+# Maximum number of IDs bound into a single IN (...) query
+PREDICT_QUERY_CHUNK_SIZE = 5000
+
+# Rows fetched per round trip when streaming the training set
+TRAINING_STREAM_BATCH_SIZE = 1000
+
+# Lightweight message shape expected by the feature extractor
+MessageObj = namedtuple('MessageObj', ['text', 'date'])
 
 # Feature extractor instance
 feature_extractor = MessageFeatureExtractor()
 
+# Online learner instance, used when ML_MODEL_TYPE is "online"
+online_learner = OnlineLearner(ONLINE_MODEL_PATH, save_every=settings.ML_ONLINE_SAVE_EVERY)
+
 def categorize_message(db: Session, message_id: int) -> MLPrediction:
     """
     Predict category for a message.
@@ -30,11 +67,113 @@ def categorize_message(db: Session, message_id: int) -> MLPrediction:
     if not message:
         raise ValueError(f"Message with ID {message_id} not found")
     
-    # Check if we have a trained model
-    if not os.path.exists(MODEL_PATH):
-        # If no model exists, use a fallback category
-        return MLPrediction(
-            message_id=message_id,
+    return _predict_messages([message])[0]
+
+def categorize_messages(db: Session, message_ids: List[int]) -> List[MLPrediction]:
+    """
+    Predict categories for many messages at once.
+    
+    Messages are fetched with one query per chunk of ids, features are built
+    for the whole batch and the model is called once over the stacked matrix.
+    
+    Args:
+        db: Database session
+        message_ids: IDs of the messages to categorize
+        
+    Returns:
+        Predictions in the order of ``message_ids``; unknown IDs are skipped
+    """
+    unique_ids = list(dict.fromkeys(message_ids))
+    
+    # Only load the columns feature extraction needs
+    messages = []
+    for start in range(0, len(unique_ids), PREDICT_QUERY_CHUNK_SIZE):
+        chunk = unique_ids[start:start + PREDICT_QUERY_CHUNK_SIZE]
+        messages.extend(
+            db.query(models.Message.id, models.Message.message_text, models.Message.timestamp)
+            .filter(models.Message.id.in_(chunk))
+            .all()
+        )
+    
+    order = {message_id: i for i, message_id in enumerate(unique_ids)}
+    messages.sort(key=lambda message: order[message.id])
+    
+    return _predict_messages(messages)
+
+def _predict_messages(messages: List[Any]) -> List[MLPrediction]:
+    """
+    Run the classifier over a batch of messages.
+    
+    Args:
+        messages: Objects with ``id``, ``message_text`` and ``timestamp``
+        
+    Returns:
+        One prediction per message
+    """
+    if not messages:
+        return []
+    
+    # Extract metadata features for the whole batch
+    texts = [message.message_text or "" for message in messages]
+    features = feature_extractor.extract_metadata_features(
+        [_message_db_to_obj(message) for message in messages]
+    )
+    
+    if settings.ML_MODEL_TYPE == ONLINE_MODEL_TYPE:
+        classifier = online_learner.get()
+        if not classifier.is_fitted:
+            return _fallback_predictions(messages)
+        
+        with predict_latency.labels(ONLINE_MODEL_TYPE).time():
+            proba = classifier.predict_proba(texts, features)
+        model_classes = classifier.classes_
+    else:
+        # Resolve both artifacts from the same version so they always match
+        model_path, vectorizer_path = get_model_paths()
+        
+        # Check if we have a trained model
+        if not os.path.exists(model_path):
+            # If no model exists, use a fallback category
+            return _fallback_predictions(messages)
+        
+        # Get the model from the in-memory registry (reloaded only when the file changes)
+        model = model_registry.get(model_path, key="classifier")
+        vectorizer = model_registry.get(vectorizer_path, key="vectorizer")
+        
+        text_features = vectorizer.transform(texts)
+        combined_features = sp.hstack([text_features, features], format="csr")
+        
+        # Get prediction probabilities in a single call
+        with predict_latency.labels("classifier").time():
+            proba = model.predict_proba(combined_features)
+        model_classes = model.classes_
+    
+    predicted_idx = np.argmax(proba, axis=1)
+    classes = [str(cls) for cls in model_classes]
+    
+    return [
+        MLPrediction(
+            message_id=message.id,
+            predicted_category=classes[idx],
+            confidence=float(row[idx]),
+            confidence_scores=dict(zip(classes, row.tolist()))
+        )
+        for message, idx, row in zip(messages, predicted_idx, proba)
+    ]
+
+def _fallback_predictions(messages: List[Any]) -> List[MLPrediction]:
+    """
+    Predictions used while no model has been trained yet.
+    
+    Args:
+        messages: Objects with an ``id``
+        
+    Returns:
+        One "needs_attention" prediction per message
+    """
+    return [
+        MLPrediction(
+            message_id=message.id,
             predicted_category="needs_attention",
             confidence=1.0,
             confidence_scores={
@@ -44,44 +183,8 @@ def categorize_message(db: Session, message_id: int) -> MLPrediction:
                 "action_item": 0.0
             }
         )
-    
-    # Load the model
-    model = joblib.load(MODEL_PATH)
-    
-    # Extract features from the message
-    message_obj = _message_db_to_obj(message)
-    features = feature_extractor.extract_metadata_features([message_obj])
-    
-    # Get text features
-    if message.message_text:
-        from sklearn.feature_extraction.text import TfidfVectorizer
-        vectorizer = joblib.load("models/tfidf_vectorizer.joblib")
-        text_features = vectorizer.transform([message.message_text])
-        # Combine with metadata features
-        import scipy.sparse as sp
-        combined_features = sp.hstack([text_features, features])
-    else:
-        # Only use metadata features
-        combined_features = features
-    
-    # Get prediction probabilities
-    proba = model.predict_proba(combined_features)
-    
-    # Get the predicted category and confidence
-    predicted_idx = np.argmax(proba, axis=1)[0]
-    confidence = proba[0][predicted_idx]
-    predicted_category = model.classes_[predicted_idx]
-    
-    # Create confidence scores dictionary
-    confidence_scores = {cat: float(proba[0][i]) for i, cat in enumerate(model.classes_)}
-    
-    # Return prediction
-    return MLPrediction(
-        message_id=message_id,
-        predicted_category=predicted_category,
-        confidence=float(confidence),
-        confidence_scores=confidence_scores
-    )
+        for message in messages
+    ]
 
 def add_training_feedback(db: Session, message_id: int, correct_category: str) -> MLFeedback:
     """
@@ -108,6 +211,8 @@ def add_training_feedback(db: Session, message_id: int, correct_category: str) -
     ml_data = models.MLTrainingData(
         message_id=message_id,
         features={"metadata": features},
+        feature_vector=pack_features(features),
+        feature_version=feature_extractor.FEATURE_VERSION,
         label=correct_category,
         feedback_source="user"
     )
@@ -120,6 +225,10 @@ def add_training_feedback(db: Session, message_id: int, correct_category: str) -
     message.category = correct_category
     db.commit()
     
+    # Apply the label to the online model right away
+    if settings.ML_MODEL_TYPE == ONLINE_MODEL_TYPE:
+        online_learner.learn(message.message_text or "", features, correct_category)
+    
     # Return feedback
     return MLFeedback(
         id=ml_data.id,
@@ -156,90 +265,135 @@ def get_ml_stats(db: Session) -> MLStats:
     ).count()
     
     # Check if model exists and get last training time
-    model_exists = os.path.exists(MODEL_PATH)
+    if settings.ML_MODEL_TYPE == ONLINE_MODEL_TYPE:
+        model_path = ONLINE_MODEL_PATH
+        model_exists = online_learner.get().is_fitted
+    else:
+        model_path, _ = get_model_paths()
+        model_exists = os.path.exists(model_path)
     last_trained = None
-    if model_exists:
+    if os.path.exists(model_path):
         # Get file modification time
-        last_trained = datetime.fromtimestamp(os.path.getmtime(MODEL_PATH))
+        last_trained = datetime.fromtimestamp(os.path.getmtime(model_path))
+    
+    # In-memory model registry load cost
+    registry_stats = model_registry.stats()
     
     return MLStats(
         training_data_count=training_count,
         category_distribution=category_distribution,
         recent_feedback_count=recent_count,
         model_exists=model_exists,
-        last_trained=last_trained
+        last_trained=last_trained,
+        model_loaded_at=registry_stats["loaded_at"],
+        model_load_time_ms=registry_stats["load_time"] * 1000 if registry_stats["artifacts"] else None,
+        model_memory_bytes=registry_stats["memory_bytes"] if registry_stats["artifacts"] else None,
+        model_type=settings.ML_MODEL_TYPE,
+        online_updates=online_learner.stats()["updates"] if settings.ML_MODEL_TYPE == ONLINE_MODEL_TYPE else None
+    )
+
+def get_model_paths() -> Tuple[str, str]:
+    """
+    Get the model and vectorizer files currently being served.
+    
+    Returns:
+        Tuple of (model path, vectorizer path) from the published version,
+        falling back to the unversioned layout
+    """
+    version_dir = current_version_dir(MODELS_DIR)
+    if version_dir is None:
+        return MODEL_PATH, VECTORIZER_PATH
+    return (
+        os.path.join(version_dir, MODEL_FILENAME),
+        os.path.join(version_dir, VECTORIZER_FILENAME),
     )
 
+def load_training_set(db: Session) -> Optional[Dict[str, Any]]:
+    """
+    Load texts, metadata features and labels for training.
+    
+    Training rows are streamed together with just the message columns
+    needed. Stored feature vectors are reused; rows without a vector, or
+    with one from an older extractor version, are recomputed in one batch
+    and written back.
+    
+    Args:
+        db: Database session
+        
+    Returns:
+        Dict with ``texts``, ``metadata_features`` and ``labels``, or None if
+        there is no training data
+    """
+    current_version = feature_extractor.FEATURE_VERSION
+    rows = (
+        db.query(
+            models.MLTrainingData.id,
+            models.MLTrainingData.label,
+            models.MLTrainingData.feature_vector,
+            models.MLTrainingData.feature_version,
+            models.Message.message_text,
+            models.Message.timestamp,
+        )
+        # Inner join keeps only training rows whose message still exists
+        .join(models.Message, models.Message.id == models.MLTrainingData.message_id)
+        .order_by(models.MLTrainingData.id)
+        .yield_per(TRAINING_STREAM_BATCH_SIZE)
+    )
+    
+    texts = []
+    labels = []
+    vectors = []
+    stale = []
+    for row in rows:
+        texts.append(row.message_text or "")
+        labels.append(row.label)
+        vector = stored_vector(row.feature_vector, row.feature_version, current_version)
+        if vector is None:
+            stale.append((len(vectors), row))
+        vectors.append(vector)
+    
+    if not labels:
+        return None
+    
+    # Recompute missing or outdated vectors and store them for next time
+    if stale:
+        recomputed = feature_extractor.extract_metadata_features(
+            [_message_db_to_obj(row) for _, row in stale]
+        )
+        for (i, _), vector in zip(stale, recomputed):
+            vectors[i] = vector
+        save_vectors(db, ((row.id, vector) for (_, row), vector in zip(stale, recomputed)), current_version)
+    
+    return {
+        "texts": texts,
+        "metadata_features": np.vstack(vectors),
+        "labels": labels,
+    }
+
 def retrain_model(db: Session) -> bool:
     """
     Retrain the ML model with all available training data.
     
+    This trains synchronously in the calling process; the API uses
+    ``ml_jobs.training_jobs`` to train in the background instead.
+    
     Args:
         db: Database session
         
     Returns:
         True if successful, False otherwise
     """
-    from sklearn.ensemble import RandomForestClassifier
-    from sklearn.feature_extraction.text import TfidfVectorizer
-    
-    # Get all training data
-    training_data = db.query(models.MLTrainingData).all()
-    if not training_data:
+    training_set = load_training_set(db)
+    if training_set is None:
         return False
     
-    # Get all messages referenced by training data
-    message_ids = [td.message_id for td in training_data]
-    messages = db.query(models.Message).filter(models.Message.id.in_(message_ids)).all()
-    message_map = {msg.id: msg for msg in messages}
-    
-    # Prepare features and labels
-    X_metadata = []
-    texts = []
-    y = []
-    
-    for td in training_data:
-        if td.message_id in message_map:
-            message = message_map[td.message_id]
-            message_obj = _message_db_to_obj(message)
-            
-            # Get metadata features
-            metadata_features = feature_extractor.extract_metadata_features([message_obj]).tolist()[0]
-            X_metadata.append(metadata_features)
-            
-            # Get text
-            texts.append(message.message_text or "")
-            
-            # Get label
-            y.append(td.label)
-    
-    # Convert to numpy arrays
-    X_metadata = np.array(X_metadata)
-    y = np.array(y)
-    
-    # Create TF-IDF vectorizer for text features
-    vectorizer = TfidfVectorizer(max_features=1000, stop_words='english', ngram_range=(1, 2))
-    X_text = vectorizer.fit_transform(texts)
-    
-    # Create and train the model
-    from sklearn.ensemble import RandomForestClassifier
-    model = RandomForestClassifier(n_estimators=100, random_state=42)
-    
-    # Combine features
-    import scipy.sparse as sp
-    X = sp.hstack([X_text, X_metadata])
-    
-    # Fit the model
-    model.fit(X, y)
-    
-    # Save the model and vectorizer
-    os.makedirs("models", exist_ok=True)
-    joblib.dump(model, MODEL_PATH)
-    joblib.dump(vectorizer, "models/tfidf_vectorizer.joblib")
+    # Write a new model version and switch serving to it
+    result = fit_artifacts(models_dir=MODELS_DIR, **training_set)
+    publish_version(MODELS_DIR, result["version"], keep=MODEL_VERSIONS_TO_KEEP)
     
     return True
 
-def _message_db_to_obj(message: models.Message) -> Any:
+def _message_db_to_obj(message: Any) -> Any:
     """
     Convert a database message to an object for feature extraction.
     
@@ -249,13 +403,9 @@ def _message_db_to_obj(message: models.Message) -> Any:
     Returns:
         Object with properties needed for feature extraction
     """
-    from collections import namedtuple
-    MessageObj = namedtuple('MessageObj', ['text', 'date'])
-    
-    from datetime import datetime
     message_date = message.timestamp or datetime.utcnow()
     
     return MessageObj(
         text=message.message_text or "",
         date=message_date
-    ) 
\ No newline at end of file
+    )
@@ -0,0 +1,161 @@
+import json
+import os
+import shutil
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+
+import joblib
+import numpy as np
+import scipy.sparse as sp
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from app.services.online_learning import OnlineMessageClassifier
+
+# This module only depends on numpy/scipy/sklearn (and the equally light
+# online_learning module) so it can be imported cheaply in training worker
+# processes.
+
+# File names inside a model version directory
+MODEL_FILENAME = "message_classifier.joblib"
+VECTORIZER_FILENAME = "tfidf_vectorizer.joblib"
+METADATA_FILENAME = "metadata.json"
+
+# File in the models directory naming the version currently being served
+CURRENT_POINTER = "CURRENT"
+
+# Sub-directory holding one directory per trained version
+VERSIONS_DIR = "versions"
+
+
+def new_version_id() -> str:
+    """Sortable, unique identifier for a trained model version."""
+    return f"{datetime.utcnow().strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:8]}"
+
+
+def fit_artifacts(
+    texts: Sequence[str],
+    metadata_features: Any,
+    labels: Sequence[str],
+    models_dir: str,
+) -> Dict[str, Any]:
+    """
+    Fit the TF-IDF vectorizer and classifier and write them as a new version.
+
+    Artifacts are written to a hidden temporary directory which is renamed
+    into place only once every file is complete, so a version directory is
+    never visible half-written.
+
+    Args:
+        texts: Message texts
+        metadata_features: Array of shape (n_samples, n_metadata_features)
+        labels: Category labels
+        models_dir: Root models directory
+
+    Returns:
+        Dict with the new ``version`` and training ``metrics``
+    """
+    start = time.perf_counter()
+
+    vectorizer = TfidfVectorizer(max_features=1000, stop_words='english', ngram_range=(1, 2))
+    X_text = vectorizer.fit_transform(texts)
+    X = sp.hstack([X_text, np.asarray(metadata_features, dtype=float)], format="csr")
+
+    model = RandomForestClassifier(n_estimators=100, random_state=42)
+    model.fit(X, np.asarray(labels))
+
+    labels_array, counts = np.unique(np.asarray(labels), return_counts=True)
+    version = new_version_id()
+    metrics = {
+        "training_samples": int(X.shape[0]),
+        "feature_count": int(X.shape[1]),
+        "category_distribution": {str(label): int(count) for label, count in zip(labels_array, counts)},
+        "fit_seconds": time.perf_counter() - start,
+        "trained_at": datetime.utcnow().isoformat(),
+    }
+
+    versions_dir = os.path.join(models_dir, VERSIONS_DIR)
+    tmp_dir = os.path.join(versions_dir, f".tmp-{version}")
+    os.makedirs(tmp_dir)
+    try:
+        joblib.dump(model, os.path.join(tmp_dir, MODEL_FILENAME))
+        joblib.dump(vectorizer, os.path.join(tmp_dir, VECTORIZER_FILENAME))
+        with open(os.path.join(tmp_dir, METADATA_FILENAME), "w") as f:
+            json.dump({"version": version, "metrics": metrics}, f)
+        os.rename(tmp_dir, os.path.join(versions_dir, version))
+    except Exception:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    return {"version": version, "metrics": metrics}
+
+
+def fit_online_model(
+    texts: Sequence[str],
+    metadata_features: Any,
+    labels: Sequence[str],
+) -> OnlineMessageClassifier:
+    """
+    Refit the online classifier from scratch on the full training set.
+
+    Used by the periodic consolidation job; the returned classifier is
+    swapped in by ``OnlineLearner.consolidate``.
+    """
+    return OnlineMessageClassifier().fit(texts, metadata_features, labels)
+
+
+def current_version_dir(models_dir: str) -> Optional[str]:
+    """
+    Directory of the version currently being served.
+
+    Returns:
+        Path to the version directory, or None if no version was published
+    """
+    try:
+        with open(os.path.join(models_dir, CURRENT_POINTER)) as f:
+            version = f.read().strip()
+    except FileNotFoundError:
+        return None
+    return os.path.join(models_dir, VERSIONS_DIR, version) if version else None
+
+
+def publish_version(models_dir: str, version: str, keep: int = 3) -> None:
+    """
+    Atomically point serving at ``version`` and prune old versions.
+
+    The pointer file is replaced with ``os.replace``, so readers see either
+    the previous or the new version name.
+
+    Args:
+        models_dir: Root models directory
+        version: Version to serve
+        keep: Number of most recent versions to keep on disk
+    """
+    if not os.path.isdir(os.path.join(models_dir, VERSIONS_DIR, version)):
+        raise ValueError(f"Model version {version} does not exist")
+
+    pointer = os.path.join(models_dir, CURRENT_POINTER)
+    tmp_pointer = f"{pointer}.{uuid.uuid4().hex}.tmp"
+    with open(tmp_pointer, "w") as f:
+        f.write(version)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_pointer, pointer)
+
+    _prune_versions(models_dir, keep=keep, protected=version)
+
+
+def list_versions(models_dir: str) -> List[str]:
+    """Published version ids, oldest first."""
+    versions_dir = os.path.join(models_dir, VERSIONS_DIR)
+    if not os.path.isdir(versions_dir):
+        return []
+    return sorted(name for name in os.listdir(versions_dir) if not name.startswith("."))
+
+
+def _prune_versions(models_dir: str, keep: int, protected: str) -> None:
+    stale = [version for version in list_versions(models_dir)[:-keep] if version != protected] if keep > 0 else []
+    for version in stale:
+        shutil.rmtree(os.path.join(models_dir, VERSIONS_DIR, version), ignore_errors=True)
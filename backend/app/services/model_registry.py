@@ -0,0 +1,154 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+import tracemalloc
+from dataclasses import dataclass, replace
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+import joblib
+
+from app.core.metrics import model_load_latency
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class LoadedArtifact:
+    """A deserialized artifact and the file fingerprint it was loaded from."""
+    obj: Any
+    path: str
+    mtime_ns: int
+    size: int
+    sha256: str
+    load_time: float  # seconds spent in joblib.load
+    memory_bytes: int  # bytes allocated while unpickling
+    loaded_at: datetime
+
+
+def _file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ModelRegistry:
+    """
+    Process-wide cache of joblib artifacts.
+
+    An artifact is loaded on first use and kept in memory. Each lookup does a
+    cheap ``os.stat``; only when the file's mtime or size changed is its
+    content hashed, and only when the hash differs is it reloaded. The new
+    object replaces the old one in a single assignment, so callers always see
+    either the previous or the new artifact, never a partial one.
+    """
+
+    def __init__(self):
+        self._artifacts: Dict[str, LoadedArtifact] = {}
+        self._lock = threading.Lock()
+
+    def get(self, path: str, key: Optional[str] = None) -> Any:
+        """
+        Get the loaded object for ``path``, (re)loading it if the file changed.
+
+        Args:
+            path: Artifact file
+            key: Registry slot; defaults to the path. Using a stable key for
+                an artifact whose path changes between versions replaces the
+                previous version in memory instead of keeping both.
+
+        Raises:
+            FileNotFoundError: If the artifact does not exist
+        """
+        return self.get_artifact(path, key=key).obj
+
+    def get_artifact(self, path: str, key: Optional[str] = None) -> LoadedArtifact:
+        """Like :meth:`get`, but returns the artifact with its load metadata."""
+        path = os.path.abspath(path)
+        key = key or path
+        stat = os.stat(path)
+
+        current = self._artifacts.get(key)
+        if self._is_fresh(current, path, stat):
+            return current
+
+        with self._lock:
+            # Another thread may have reloaded while we waited for the lock
+            current = self._artifacts.get(key)
+            stat = os.stat(path)
+            if self._is_fresh(current, path, stat):
+                return current
+
+            sha256 = _file_sha256(path)
+            if current is not None and current.sha256 == sha256:
+                # Touched or moved but unchanged; just remember the new fingerprint
+                current = replace(current, path=path, mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+            else:
+                current = self._load(path, stat, sha256)
+            self._artifacts[key] = current
+            return current
+
+    def invalidate(self, key: Optional[str] = None) -> None:
+        """Forget one artifact (or all of them) so the next lookup reloads it."""
+        with self._lock:
+            if key is None:
+                self._artifacts.clear()
+            else:
+                self._artifacts.pop(key, None)
+                self._artifacts.pop(os.path.abspath(key), None)
+
+    def stats(self) -> Dict[str, Any]:
+        """Aggregate load time and memory use over all loaded artifacts."""
+        artifacts = list(self._artifacts.values())
+        return {
+            "artifacts": len(artifacts),
+            "load_time": sum(a.load_time for a in artifacts),
+            "memory_bytes": sum(a.memory_bytes for a in artifacts),
+            "loaded_at": max((a.loaded_at for a in artifacts), default=None),
+        }
+
+    @staticmethod
+    def _is_fresh(current: Optional[LoadedArtifact], path: str, stat: os.stat_result) -> bool:
+        return (
+            current is not None
+            and current.path == path
+            and current.mtime_ns == stat.st_mtime_ns
+            and current.size == stat.st_size
+        )
+
+    @staticmethod
+    def _load(path: str, stat: os.stat_result, sha256: str) -> LoadedArtifact:
+        tracing = tracemalloc.is_tracing()
+        if not tracing:
+            tracemalloc.start()
+        try:
+            before, _ = tracemalloc.get_traced_memory()
+            start = time.perf_counter()
+            obj = joblib.load(path)
+            load_time = time.perf_counter() - start
+            model_load_latency.labels(os.path.basename(path)).observe(load_time)
+            after, _ = tracemalloc.get_traced_memory()
+        finally:
+            if not tracing:
+                tracemalloc.stop()
+
+        logger.info(f"Loaded {path} in {load_time * 1000:.1f} ms")
+        return LoadedArtifact(
+            obj=obj,
+            path=path,
+            mtime_ns=stat.st_mtime_ns,
+            size=stat.st_size,
+            sha256=sha256,
+            load_time=load_time,
+            memory_bytes=max(after - before, 0),
+            loaded_at=datetime.utcnow(),
+        )
+
+
+# Create a singleton instance
+model_registry = ModelRegistry()
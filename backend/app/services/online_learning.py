@@ -0,0 +1,208 @@
+import logging
+import os
+import threading
+import uuid
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import joblib
+import numpy as np
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.linear_model import SGDClassifier
+
+from app.core.metrics import model_load_latency
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+# Model types selectable through settings.ML_MODEL_TYPE
+RANDOM_FOREST_MODEL_TYPE = "random_forest"
+ONLINE_MODEL_TYPE = "online"
+
+# Categories an untrained online model can learn without a full refit
+DEFAULT_CATEGORIES = ["needs_attention", "ignore", "schedule_call", "action_item"]
+
+# Rough per-column scale for the metadata features (length, hour, weekday,
+# has question, urgency) so they don't dominate the linear model
+_METADATA_SCALE = np.array([1.0, 23.0, 6.0, 1.0, 5.0])
+
+
+class OnlineMessageClassifier:
+    """
+    Linear message classifier that can learn one example at a time.
+
+    Text is hashed with a stateless ``HashingVectorizer``, so there is no
+    vocabulary to refit, and an ``SGDClassifier`` with logistic loss is
+    updated in place with ``partial_fit``. New categories cannot be added
+    incrementally; they are picked up by the next full refit.
+    """
+
+    def __init__(self, classes: Optional[Sequence[str]] = None, use_metadata: bool = True):
+        self.vectorizer = HashingVectorizer(
+            n_features=2 ** 18,
+            alternate_sign=False,
+            stop_words='english',
+            ngram_range=(1, 2)
+        )
+        self.model = SGDClassifier(loss="log_loss", alpha=1e-5, random_state=42)
+        self.classes = sorted(classes or DEFAULT_CATEGORIES)
+        self.use_metadata = use_metadata
+        self.updates = 0
+
+    @property
+    def is_fitted(self) -> bool:
+        return hasattr(self.model, "classes_")
+
+    @property
+    def classes_(self) -> np.ndarray:
+        return self.model.classes_
+
+    def transform(self, texts: Sequence[str], metadata_features: Any = None) -> sp.csr_matrix:
+        X = self.vectorizer.transform([text or "" for text in texts])
+        if not self.use_metadata:
+            return X
+
+        metadata = np.asarray(metadata_features, dtype=float).reshape(len(texts), -1).copy()
+        metadata[:, 0] = np.log1p(metadata[:, 0])
+        metadata /= _METADATA_SCALE[:metadata.shape[1]]
+        return sp.hstack([X, metadata], format="csr")
+
+    def fit(self, texts: Sequence[str], metadata_features: Any, labels: Sequence[str]) -> "OnlineMessageClassifier":
+        """Full refit from scratch on the whole training set."""
+        self.classes = sorted(set(self.classes) | set(labels))
+        X = self.transform(texts, metadata_features)
+        y = np.asarray(labels)
+
+        self.model = SGDClassifier(loss="log_loss", alpha=1e-5, random_state=42)
+        # A few shuffled passes; registers every known class even if some
+        # have no examples yet so later partial_fit calls accept them
+        for _ in range(5):
+            order = np.random.permutation(len(y))
+            self.model.partial_fit(X[order], y[order], classes=self.classes)
+        self.updates = 0
+        return self
+
+    def partial_fit(self, texts: Sequence[str], metadata_features: Any, labels: Sequence[str]) -> bool:
+        """
+        Update the model in place with new labelled examples.
+
+        Returns:
+            False if a label is unknown to the model and must wait for a full refit
+        """
+        if any(label not in self.classes for label in labels):
+            return False
+
+        self.model.partial_fit(self.transform(texts, metadata_features), np.asarray(labels), classes=self.classes)
+        self.updates += len(labels)
+        return True
+
+    def predict_proba(self, texts: Sequence[str], metadata_features: Any = None) -> np.ndarray:
+        return self.model.predict_proba(self.transform(texts, metadata_features))
+
+
+class OnlineLearner:
+    """
+    Holds the serving online classifier and applies feedback to it.
+
+    Feedback is applied to the in-memory model immediately and the model is
+    written to disk every ``save_every`` updates (and on :meth:`save`). A
+    periodic full refit replaces the model through :meth:`consolidate`;
+    feedback that arrives while the refit is running is replayed onto the
+    new model so it is not lost. State is per process.
+    """
+
+    def __init__(self, path: str, save_every: int = 50, use_metadata: bool = True):
+        self.path = path
+        self.save_every = save_every
+        self.use_metadata = use_metadata
+        self._classifier: Optional[OnlineMessageClassifier] = None
+        self._lock = threading.Lock()
+        self._unsaved = 0
+        self._replay: Optional[List[Tuple[str, Any, str]]] = None
+        self.pending_labels: set = set()
+
+    def get(self) -> OnlineMessageClassifier:
+        """The serving classifier, loaded from disk or created on first use."""
+        if self._classifier is None:
+            with self._lock:
+                if self._classifier is None:
+                    self._classifier = self._load()
+        return self._classifier
+
+    def learn(self, text: str, metadata_row: Sequence[float], label: str) -> bool:
+        """
+        Apply one feedback label to the serving model.
+
+        Returns:
+            True if the model was updated, False if the label needs a full refit
+        """
+        classifier = self.get()
+        with self._lock:
+            if self._replay is not None:
+                self._replay.append((text, metadata_row, label))
+
+            learned = classifier.partial_fit([text], [metadata_row], [label])
+            if not learned:
+                self.pending_labels.add(label)
+                return False
+
+            self._unsaved += 1
+            if self._unsaved >= self.save_every:
+                self._save_locked(classifier)
+        return True
+
+    def begin_consolidation(self) -> None:
+        """Start recording feedback so it can be replayed onto the refitted model."""
+        with self._lock:
+            self._replay = []
+
+    def abort_consolidation(self) -> None:
+        with self._lock:
+            self._replay = None
+
+    def consolidate(self, classifier: OnlineMessageClassifier) -> None:
+        """Swap in a fully refitted classifier and replay feedback received meanwhile."""
+        with self._lock:
+            for text, metadata_row, label in self._replay or []:
+                classifier.partial_fit([text], [metadata_row], [label])
+            self._replay = None
+            self.pending_labels = {label for label in self.pending_labels if label not in classifier.classes}
+            self._classifier = classifier
+            self._save_locked(classifier)
+
+    def save(self) -> None:
+        """Persist the serving model if it has unsaved updates."""
+        with self._lock:
+            if self._classifier is not None and self._unsaved:
+                self._save_locked(self._classifier)
+
+    def stats(self) -> Dict[str, Any]:
+        classifier = self._classifier
+        return {
+            "fitted": classifier is not None and classifier.is_fitted,
+            "updates": classifier.updates if classifier is not None else 0,
+            "unsaved_updates": self._unsaved,
+            "pending_labels": sorted(self.pending_labels),
+        }
+
+    def _load(self) -> OnlineMessageClassifier:
+        if os.path.exists(self.path):
+            try:
+                with model_load_latency.labels(os.path.basename(self.path)).time():
+                    return joblib.load(self.path)
+            except Exception as e:
+                logger.error(f"Error loading online model: {str(e)}")
+        return OnlineMessageClassifier(use_metadata=self.use_metadata)
+
+    def _save_locked(self, classifier: OnlineMessageClassifier) -> None:
+        # Write to a temporary file and rename so readers never see a partial file
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.{uuid.uuid4().hex}.tmp"
+        try:
+            joblib.dump(classifier, tmp_path)
+            os.replace(tmp_path, self.path)
+            self._unsaved = 0
+        except Exception as e:
+            logger.error(f"Error saving online model: {str(e)}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
@@ -0,0 +1,80 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, NamedTuple, Optional, Sequence
+
+from sqlalchemy import DateTime, tuple_
+
+class InvalidCursor(ValueError):
+    """A cursor token that wasn't produced by :func:`encode_cursor` for this listing."""
+
+class Page(NamedTuple):
+    items: List[Any]
+    next_cursor: Optional[str]  # None on the last page
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """
+    Encode the sort key of the last row of a page as an opaque token.
+
+    Args:
+        values: Sort key values, in the listing's key column order
+
+    Returns:
+        URL-safe cursor token
+    """
+    payload = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    data = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(data).decode().rstrip("=")
+
+def decode_cursor(token: str, columns: Sequence) -> tuple:
+    """
+    Decode a cursor token into sort key values for ``columns``.
+
+    Raises:
+        InvalidCursor: If the token is malformed or doesn't match the columns
+    """
+    try:
+        data = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        payload = json.loads(data)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor("Malformed cursor") from e
+    if not isinstance(payload, list) or len(payload) != len(columns):
+        raise InvalidCursor("Cursor does not match this listing")
+
+    values = []
+    for column, value in zip(columns, payload):
+        if isinstance(column.type, DateTime):
+            try:
+                value = datetime.fromisoformat(value)
+            except (ValueError, TypeError) as e:
+                raise InvalidCursor("Malformed cursor") from e
+        elif not isinstance(value, int) or isinstance(value, bool):
+            raise InvalidCursor("Malformed cursor")
+        values.append(value)
+    return tuple(values)
+
+def keyset(query, columns: Sequence, cursor: Optional[str], limit: int, descending: bool = True):
+    """
+    Order a select by ``columns`` and start it after ``cursor``.
+
+    The last column must be unique (the primary key) so the order is total.
+    One row more than ``limit`` is fetched to tell whether a next page exists;
+    pass the rows to :func:`make_page`.
+
+    Raises:
+        InvalidCursor: If ``cursor`` can't be decoded
+    """
+    if cursor:
+        key = tuple_(*columns)
+        bound = tuple_(*decode_cursor(cursor, columns))
+        query = query.where(key < bound if descending else key > bound)
+    order = [column.desc() if descending else column.asc() for column in columns]
+    return query.order_by(*order).limit(limit + 1)
+
+def make_page(rows: Sequence, columns: Sequence, limit: int) -> Page:
+    """Build a :class:`Page` from rows fetched by a :func:`keyset` query."""
+    items = list(rows[:limit])
+    if len(rows) <= limit or not items:
+        return Page(items, None)
+    last = items[-1]
+    return Page(items, encode_cursor([getattr(last, column.key) for column in columns]))
@@ -0,0 +1,98 @@
+import argparse
+import logging
+from typing import Dict
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db import models
+from app.services import auth_cache
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+def reencrypt_sessions(db: Session, encryptor, batch_size: int = 500) -> Dict[str, int]:
+    """
+    Re-encrypt every stored Telegram session under the current key.
+
+    Users are walked in id order, ``batch_size`` at a time; each batch's
+    rewritten sessions are saved with one bulk update and committed, so an
+    interrupted run can simply be started again. Sessions already under the
+    current key are left alone, and plaintext sessions (stored before
+    encryption was enabled) are skipped and reported. Retired keys can be
+    dropped from ``SESSION_ENCRYPTION_OLD_KEYS`` once a run reports no
+    failures.
+
+    Args:
+        db: Database session
+        encryptor: ``SessionEncryptor`` holding the current key and the retired ones
+        batch_size: Users per batch
+
+    Returns:
+        Dict with ``checked``, ``rotated``, ``plaintext`` and ``failed`` session counts
+    """
+    stats = {"checked": 0, "rotated": 0, "plaintext": 0, "failed": 0}
+    last_id = 0
+    while True:
+        rows = db.execute(
+            select(models.User.id, models.User.telegram_session)
+            .where(models.User.id > last_id, models.User.telegram_session.isnot(None))
+            .order_by(models.User.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            return stats
+        last_id = rows[-1].id
+
+        updates = []
+        for user_id, encrypted_session in rows:
+            stats["checked"] += 1
+            if not encryptor.is_encrypted(encrypted_session):
+                # Nothing to re-encrypt; encrypting it is up to the auth flow
+                stats["plaintext"] += 1
+                logger.warning(f"Telegram session of user {user_id} is not encrypted")
+                continue
+            try:
+                rotated = encryptor.rotate_session(encrypted_session)
+            except Exception as e:
+                # Encrypted with a key we no longer have
+                stats["failed"] += 1
+                logger.error(f"Cannot re-encrypt Telegram session of user {user_id}: {type(e).__name__}")
+                continue
+            if rotated is not None:
+                updates.append({"id": user_id, "telegram_session": rotated})
+
+        if updates:
+            db.bulk_update_mappings(models.User, updates)
+            db.commit()
+            # Bulk updates don't fire the cache's after_update listener
+            for update in updates:
+                auth_cache.user_cache.invalidate(update["id"])
+            stats["rotated"] += len(updates)
+
+def _main() -> None:
+    parser = argparse.ArgumentParser(description="Re-encrypt stored Telegram sessions under the current key")
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    from app.db.database import SessionLocal
+    from app.security_utils import SessionEncryptor
+    encryptor = SessionEncryptor(
+        key=settings.SESSION_ENCRYPTION_KEY,
+        old_keys=settings.SESSION_ENCRYPTION_OLD_KEYS.split(","),
+        cache_size=0
+    )
+    db = SessionLocal()
+    try:
+        result = reencrypt_sessions(db, encryptor, batch_size=args.batch_size)
+    finally:
+        db.close()
+    print(
+        f"Re-encrypted {result['rotated']} of {result['checked']} sessions "
+        f"({result['failed']} failed, {result['plaintext']} not encrypted)"
+    )
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    _main()
@@ -4,11 +4,14 @@ import uuid
 from typing import Dict, Tuple, Optional, Any
 import os
 
-from telethon import TelegramClient
+from telethon import TelegramClient, events
 from telethon.errors import SessionPasswordNeededError, PhoneCodeInvalidError
 from telethon.sessions import StringSession
 
 from app.core.config import settings
+from app.core.metrics import telegram_connect_latency, telegram_send_latency
+from app.services.telegram_pool import telegram_pool
+from app.services.message_ingestion import message_ingestor
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -51,6 +54,8 @@ async def start_telegram_client():
     if not telegram_client:
         telegram_client = await get_telegram_client()
         await telegram_client.start(bot_token=settings.TELEGRAM_BOT_TOKEN)
+        # Stream incoming messages into the database
+        telegram_client.add_event_handler(message_ingestor.handle_event, events.NewMessage(incoming=True))
         logger.info("Global Telegram client started")
 
 async def stop_telegram_client():
@@ -72,7 +77,8 @@ async def start_telegram_auth(phone: str) -> Tuple[str, str]:
     client = await get_telegram_client()
     
     try:
-        await client.connect()
+        with telegram_connect_latency.time():
+            await client.connect()
         
         # Start authentication
         result = await client.send_code_request(phone)
@@ -142,45 +148,32 @@ async def send_message(user_session: str, contact_id: int, text: str) -> bool:
     """
     Send a message to a Telegram contact
     
+    Uses a warm pooled connection for the session instead of connecting
+    and disconnecting on every call.
+    
     Returns:
         bool: True if successful
     """
-    client = await get_telegram_client(user_session)
-    
-    try:
-        await client.connect()
-        
+    async with telegram_pool.client(user_session) as client:
         # Send message
-        await client.send_message(contact_id, text)
-        
-        # Clean up
-        await client.disconnect()
-        
-        return True
+        with telegram_send_latency.time():
+            await client.send_message(contact_id, text)
     
-    except Exception as e:
-        if client:
-            await client.disconnect()
-        raise e
+    return True
 
 async def get_contacts(user_session: str) -> list:
     """
     Get user's Telegram contacts
     
+    Dialogs are streamed rather than fetched into one list. To persist
+    contacts, use :mod:`app.services.contact_sync`, which writes only changes.
+    
     Returns:
         list: List of contacts
     """
-    client = await get_telegram_client(user_session)
-    
-    try:
-        await client.connect()
-        
-        # Get dialogs
-        dialogs = await client.get_dialogs()
-        
-        # Extract contacts
-        contacts = []
-        for dialog in dialogs:
+    contacts = []
+    async with telegram_pool.client(user_session) as client:
+        async for dialog in client.iter_dialogs():
             if dialog.is_user:
                 user = dialog.entity
                 contacts.append({
@@ -189,15 +182,7 @@ async def get_contacts(user_session: str) -> list:
                     "first_name": user.first_name,
                     "last_name": user.last_name,
                     "phone": user.phone if hasattr(user, "phone") else None,
-                    "display_name": user.first_name + (f" {user.last_name}" if user.last_name else "")
+                    "display_name": (user.first_name or "") + (f" {user.last_name}" if user.last_name else "")
                 })
-        
-        # Clean up
-        await client.disconnect()
-        
-        return contacts
     
-    except Exception as e:
-        if client:
-            await client.disconnect()
-        raise e 
\ No newline at end of file
+    return contacts
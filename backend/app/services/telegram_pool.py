@@ -0,0 +1,246 @@
+import asyncio
+import hashlib
+import logging
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Callable, Dict, Optional
+
+from telethon import TelegramClient
+from telethon.sessions import StringSession
+from telethon.tl.functions import PingRequest
+
+from app.core.config import settings
+from app.core.metrics import telegram_connect_latency
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+
+def _default_client_factory(session_string: str) -> TelegramClient:
+    """Build a Telethon client for a decrypted session string."""
+    if not settings.TELEGRAM_API_ID or not settings.TELEGRAM_API_HASH:
+        raise ValueError("Telegram API credentials not configured")
+
+    return TelegramClient(
+        StringSession(session_string),
+        settings.TELEGRAM_API_ID,
+        settings.TELEGRAM_API_HASH
+    )
+
+
+@dataclass
+class _PooledClient:
+    """A pooled Telegram client plus the bookkeeping the pool needs."""
+    client: TelegramClient
+    last_used: float = field(default_factory=time.monotonic)
+    last_ping: float = field(default_factory=time.monotonic)
+    in_use: int = 0
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+
+class TelegramClientPool:
+    """
+    Registry of long-lived Telegram clients, one per user session.
+
+    Clients are created and connected lazily on first use, kept warm between
+    requests, pinged periodically and disconnected after being idle for
+    ``idle_timeout`` seconds. At most ``max_connections`` clients are kept;
+    when the cap is reached the least recently used idle client is evicted.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 100,
+        idle_timeout: float = 600.0,
+        ping_interval: float = 60.0,
+        client_factory: Callable[[str], TelegramClient] = _default_client_factory,
+    ):
+        self.max_connections = max_connections
+        self.idle_timeout = idle_timeout
+        self.ping_interval = ping_interval
+        self.client_factory = client_factory
+        self._clients: Dict[str, _PooledClient] = {}
+        self._lock = asyncio.Lock()
+        self._capacity = asyncio.Condition(self._lock)
+        self._reaper: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def session_key(session_string: str) -> str:
+        """Pool key for a decrypted session; avoids keeping the raw session as a dict key."""
+        return hashlib.sha256(session_string.encode()).hexdigest()
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+    def start(self) -> None:
+        """Start the background task that pings and evicts idle clients."""
+        if self._reaper is None or self._reaper.done():
+            self._reaper = asyncio.create_task(self._reap_forever())
+
+    async def close(self) -> None:
+        """Stop the background task and disconnect every pooled client."""
+        if self._reaper is not None:
+            self._reaper.cancel()
+            try:
+                await self._reaper
+            except asyncio.CancelledError:
+                pass
+            self._reaper = None
+
+        async with self._lock:
+            entries = list(self._clients.values())
+            self._clients.clear()
+            self._capacity.notify_all()
+
+        for entry in entries:
+            await self._disconnect(entry)
+
+    @asynccontextmanager
+    async def client(self, session_string: str) -> AsyncIterator[TelegramClient]:
+        """
+        Borrow a connected client for a decrypted session string.
+
+        The client stays in the pool after the block exits and is never
+        evicted while borrowed.
+        """
+        entry = await self._acquire(session_string)
+        try:
+            yield entry.client
+        finally:
+            async with self._lock:
+                entry.in_use -= 1
+                entry.last_used = time.monotonic()
+                self._capacity.notify_all()
+
+    async def discard(self, session_string: str) -> None:
+        """Drop and disconnect the client for a session (e.g. after logout)."""
+        async with self._lock:
+            entry = self._clients.pop(self.session_key(session_string), None)
+            self._capacity.notify_all()
+        if entry is not None:
+            await self._disconnect(entry)
+
+    async def _acquire(self, session_string: str) -> _PooledClient:
+        key = self.session_key(session_string)
+
+        evicted = []
+        async with self._lock:
+            entry = self._clients.get(key)
+            while entry is None and len(self._clients) >= self.max_connections:
+                lru = self._evict_lru_locked()
+                if lru is None:
+                    # Every pooled client is borrowed; wait for one to free up
+                    await self._capacity.wait()
+                else:
+                    evicted.append(lru)
+                entry = self._clients.get(key)
+            if entry is None:
+                entry = _PooledClient(client=self.client_factory(session_string))
+                self._clients[key] = entry
+            entry.in_use += 1
+
+        # Outside the lock, as reap() does, so other borrowers aren't held up
+        for lru in evicted:
+            await self._disconnect(lru)
+
+        try:
+            async with entry.lock:
+                if not entry.client.is_connected():
+                    with telegram_connect_latency.time():
+                        await entry.client.connect()
+                    entry.last_ping = time.monotonic()
+        except Exception:
+            async with self._lock:
+                entry.in_use -= 1
+                if self._clients.get(key) is entry and not entry.in_use:
+                    del self._clients[key]
+                self._capacity.notify_all()
+            raise
+
+        entry.last_used = time.monotonic()
+        return entry
+
+    def _evict_lru_locked(self) -> Optional[_PooledClient]:
+        """
+        Remove the least recently used idle client from the pool. Caller must hold ``_lock``.
+
+        Returns:
+            The removed entry, for the caller to disconnect once the lock is
+            released, or None if every client is borrowed
+        """
+        idle = [(k, e) for k, e in self._clients.items() if e.in_use == 0]
+        if not idle:
+            return None
+
+        key, entry = min(idle, key=lambda item: item[1].last_used)
+        del self._clients[key]
+        return entry
+
+    async def _reap_forever(self) -> None:
+        interval = max(1.0, min(self.idle_timeout, self.ping_interval) / 2)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.reap()
+            except Exception as e:
+                logger.error(f"Error while reaping Telegram clients: {str(e)}")
+
+    async def reap(self) -> None:
+        """Disconnect idle clients and ping the remaining ones."""
+        now = time.monotonic()
+        expired = []
+        to_ping = []
+
+        async with self._lock:
+            for key, entry in list(self._clients.items()):
+                if entry.in_use:
+                    continue
+                if now - entry.last_used >= self.idle_timeout:
+                    expired.append(self._clients.pop(key))
+                elif now - entry.last_ping >= self.ping_interval:
+                    to_ping.append((key, entry))
+            if expired:
+                self._capacity.notify_all()
+
+        for entry in expired:
+            await self._disconnect(entry)
+
+        for key, entry in to_ping:
+            if await self._ping(entry):
+                continue
+            async with self._lock:
+                stale = self._clients.get(key) is entry and not entry.in_use
+                if stale:
+                    del self._clients[key]
+                    self._capacity.notify_all()
+            if stale:
+                await self._disconnect(entry)
+
+    async def _ping(self, entry: _PooledClient) -> bool:
+        """Send an MTProto ping; return False if the connection is unhealthy."""
+        try:
+            async with entry.lock:
+                if not entry.client.is_connected():
+                    return False
+                await entry.client(PingRequest(ping_id=int(time.time() * 1000)))
+            entry.last_ping = time.monotonic()
+            return True
+        except Exception as e:
+            logger.warning(f"Telegram client health ping failed: {str(e)}")
+            return False
+
+    @staticmethod
+    async def _disconnect(entry: _PooledClient) -> None:
+        try:
+            await entry.client.disconnect()
+        except Exception as e:
+            logger.warning(f"Error disconnecting Telegram client: {str(e)}")
+
+
+# Create a singleton instance
+telegram_pool = TelegramClientPool(
+    max_connections=settings.TELEGRAM_POOL_MAX_CONNECTIONS,
+    idle_timeout=settings.TELEGRAM_POOL_IDLE_TIMEOUT,
+    ping_interval=settings.TELEGRAM_POOL_PING_INTERVAL,
+)
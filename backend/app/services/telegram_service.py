@@ -1,15 +1,24 @@
 import uuid
 import asyncio
-from typing import Dict, Optional, List, Any
+from typing import AsyncIterator, Dict, Optional, List, Any
 from app.core.config import settings
 from app.telegram_client import TelegramIntegration
 from app.security_utils import SessionEncryptor
+from app.services.telegram_pool import telegram_pool
 
 # Store ongoing auth processes
 auth_sessions: Dict[str, Dict[str, Any]] = {}
 
-# Session encryptor
-encryptor = SessionEncryptor(key=settings.SESSION_ENCRYPTION_KEY)
+# Unresponded-message scan state per session (keyed by pool key)
+scan_states: Dict[str, Dict[int, Any]] = {}
+
+# Session encryptor; caches decrypted sessions so repeat calls skip Fernet
+encryptor = SessionEncryptor(
+    key=settings.SESSION_ENCRYPTION_KEY,
+    old_keys=settings.SESSION_ENCRYPTION_OLD_KEYS.split(","),
+    cache_size=settings.SESSION_CACHE_SIZE,
+    cache_ttl=settings.SESSION_CACHE_TTL
+)
 
 async def start_telegram_auth(phone: str, user_id: int) -> str:
     """
@@ -105,24 +114,46 @@ async def send_telegram_message(
     # Decrypt the session string
     decrypted_session = encryptor.decrypt_session(session_string)
     
-    # Create a Telegram client
-    client = TelegramIntegration(
-        api_id=settings.TELEGRAM_API_ID,
-        api_hash=settings.TELEGRAM_API_HASH,
-        session_string=decrypted_session
-    )
+    # Send the message over a warm pooled connection
+    async with telegram_pool.client(decrypted_session) as client:
+        await client.send_message(
+            entity=chat_id,
+            message=text,
+            reply_to=reply_to
+        )
     
-    # Connect to Telegram
-    await client.connect()
+    return True
+
+async def stream_unresponded_messages(session_string: str, days_back: int = 7) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Stream unresponded messages from Telegram as dialogs are scanned.
     
-    # Send the message
-    await client.client.send_message(
-        entity=chat_id,
-        message=text,
-        reply_to=reply_to
-    )
+    Scan state is kept per session, so repeat calls only fetch messages
+    newer than the previous scan.
     
-    return True
+    Args:
+        session_string: Encrypted session string
+        days_back: Number of days to look back
+        
+    Yields:
+        Unresponded messages
+    """
+    # Decrypt the session string
+    decrypted_session = encryptor.decrypt_session(session_string)
+    scan_state = scan_states.setdefault(telegram_pool.session_key(decrypted_session), {})
+    
+    # Reuse a warm pooled connection for the session
+    async with telegram_pool.client(decrypted_session) as client:
+        integration = TelegramIntegration(
+            api_id=settings.TELEGRAM_API_ID,
+            api_hash=settings.TELEGRAM_API_HASH,
+            client=client,
+            scan_state=scan_state,
+            max_concurrent_scans=settings.TELEGRAM_SCAN_CONCURRENCY
+        )
+        
+        async for message in integration.get_unresponded_messages(days_back=days_back):
+            yield message
 
 async def fetch_unresponded_messages(session_string: str, days_back: int = 7) -> List[Dict[str, Any]]:
     """
@@ -135,20 +166,4 @@ async def fetch_unresponded_messages(session_string: str, days_back: int = 7) ->
     Returns:
         List of unresponded messages
     """
-    # Decrypt the session string
-    decrypted_session = encryptor.decrypt_session(session_string)
-    
-    # Create a Telegram client
-    client = TelegramIntegration(
-        api_id=settings.TELEGRAM_API_ID,
-        api_hash=settings.TELEGRAM_API_HASH,
-        session_string=decrypted_session
-    )
-    
-    # Connect to Telegram
-    await client.connect()
-    
-    # Get unresponded messages
-    messages = await client.get_unresponded_messages(days_back=days_back)
-    
-    return messages 
\ No newline at end of file
+    return [message async for message in stream_unresponded_messages(session_string, days_back=days_back)]
@@ -1,15 +1,16 @@
 from typing import Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
+from jose import JWTError
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
-from app.core.security import verify_password, get_password_hash, ALGORITHM
+from app.core.security import verify_password, get_password_hash
 from app.db import models
 from app.db.database import get_db
 from app.schemas.token import TokenPayload
 from app.schemas.user import User, UserCreate, UserUpdate
+from app.services.auth_cache import token_cache, user_cache
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login")
 
@@ -125,7 +126,8 @@ async def get_current_user(
     Get the current authenticated user.
     
     This is a dependency that can be used in API endpoints to get the current user
-    based on the JWT token provided in the request.
+    based on the JWT token provided in the request. Token verification and the
+    user lookup are cached (see :mod:`app.services.auth_cache`).
     
     Args:
         db: Database session
@@ -143,9 +145,8 @@ async def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[ALGORITHM]
-        )
+        # Verified once per token, then memoized until it expires
+        payload = token_cache.decode(token)
         user_id: Optional[int] = payload.get("sub")
         if user_id is None:
             raise credentials_exception
@@ -153,10 +154,14 @@ async def get_current_user(
     except JWTError:
         raise credentials_exception
     
-    user = get_user(db=db, user_id=token_data.sub)
+    exp = payload.get("exp", 0)
+    user = user_cache.get(db, token_data.sub, exp)
     if user is None:
-        raise credentials_exception
+        user = get_user(db=db, user_id=token_data.sub)
+        if user is None:
+            raise credentials_exception
+        user_cache.set(user, exp)
     if not user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
     
-    return user 
\ No newline at end of file
+    return user
\ No newline at end of file
@@ -1,12 +1,29 @@
+import asyncio
+import logging
+
 import uvicorn
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 
 from app.api.api import api_router
 from app.core.config import settings
+from app.core.metrics import CONTENT_TYPE, MetricsMiddleware, install_query_timing, registry
 from app.db.session import engine, SessionLocal
+from app.db.database import dispose_async_engine
 from app.db.base import Base
+from app.services.telegram_pool import telegram_pool
+from app.services.ml_jobs import training_jobs
+from app.services.ml_service import online_learner
+from app.services.online_learning import ONLINE_MODEL_TYPE
+from app.services.ai_categorization import ai_categorization, PROMPT_VERSION
+from app.services.categorization_cache import categorization_cache
+from app.services.message_ingestion import message_ingestor
+from app.services.history_backfill import history_backfill
+from app.services.account_listeners import account_listeners
+
+# Set up logger
+logger = logging.getLogger(__name__)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -15,17 +32,49 @@ async def lifespan(app: FastAPI):
     if settings.ENVIRONMENT == "development":
         Base.metadata.create_all(bind=engine)
     
+    # Start writing incoming messages to the database in batches
+    message_ingestor.start()
+    
     # Initialize Telegram client if needed
     if settings.TELEGRAM_AUTO_START:
-        from app.services.telegram_client import telegram_client
-        await telegram_client.start()
+        from app.services.telegram_client import start_telegram_client
+        await start_telegram_client()
+    
+    # Start idle eviction and health pings for pooled user clients
+    telegram_pool.start()
+    
+    # Store incoming messages of every connected account
+    if settings.TELEGRAM_LISTEN_ACCOUNTS:
+        await account_listeners.start()
+    
+    # Drop cached AI categorizations made with an older prompt
+    if categorization_cache.backend is not None:
+        try:
+            await asyncio.to_thread(categorization_cache.invalidate, PROMPT_VERSION)
+        except Exception as e:
+            logger.warning(f"Could not purge AI categorization cache: {str(e)}")
+    
+    # Periodically consolidate the online model with a full refit
+    if settings.ML_MODEL_TYPE == ONLINE_MODEL_TYPE:
+        training_jobs.start_schedule(settings.ML_CONSOLIDATION_INTERVAL)
     
     yield
     
     # On shutdown: Clean up resources
+    await history_backfill.shutdown()
+    await account_listeners.close()
+    await telegram_pool.close()
+    await training_jobs.shutdown()
+    online_learner.save()
+    await ai_categorization.close()
+    await dispose_async_engine()
+    
     if settings.TELEGRAM_AUTO_START:
-        from app.services.telegram_client import telegram_client
-        await telegram_client.disconnect()
+        from app.services.telegram_client import stop_telegram_client
+        await stop_telegram_client()
+    
+    # Flush messages received before the client disconnected
+    await message_ingestor.stop()
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -43,6 +92,16 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Record request and query latencies for /metrics
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+    install_query_timing()
+    
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        """Prometheus scrape endpoint."""
+        return Response(registry.render(), media_type=CONTENT_TYPE)
+
 @app.get("/api/v1/health")
 async def health_check():
     try:
@@ -1,3 +1,7 @@
+-- Reference only: indexes and search triggers now ship as Alembic migrations
+-- (backend/alembic/versions), which check the dialect and the columns that
+-- actually exist. Run `alembic upgrade head` instead of this script.
+
 -- Add indexes for faster lookups
 CREATE INDEX idx_messages_telegram_message_id ON messages(telegram_message_id);
 CREATE INDEX idx_messages_chat_id ON messages(chat_id);
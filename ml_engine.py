@@ -4,8 +4,17 @@ from sklearn.pipeline import Pipeline, FeatureUnion
 from sklearn.preprocessing import StandardScaler
 import joblib
 import numpy as np
+import re
+
+URGENT_TERMS = ('urgent', 'asap', 'emergency', 'immediately', 'help')
+
+# Precompiled once; matches any urgent term anywhere in the text
+URGENT_TERMS_PATTERN = re.compile('|'.join(map(re.escape, URGENT_TERMS)), re.IGNORECASE)
 
 class MessageFeatureExtractor:
+    # Bump whenever extract_metadata_features changes so stored vectors are recomputed
+    FEATURE_VERSION = 1
+    
     def __init__(self):
         self.text_vectorizer = TfidfVectorizer(
             max_features=1000,
@@ -15,21 +24,24 @@ class MessageFeatureExtractor:
         
     def extract_metadata_features(self, messages):
         """Extract non-text features from messages"""
-        features = np.zeros((len(messages), 5))
+        texts = [msg.text or '' for msg in messages]
+        dates = [msg.date for msg in messages]
+        count = len(messages)
+        
+        # Build each feature column in a single pass instead of row by row
+        features = np.empty((count, 5))
+        features[:, 0] = np.fromiter(map(len, texts), dtype=float, count=count)  # Length
+        features[:, 1] = np.fromiter((d.hour for d in dates), dtype=float, count=count)  # Hour of day
+        features[:, 2] = np.fromiter((d.weekday() for d in dates), dtype=float, count=count)  # Day of week
+        features[:, 3] = np.fromiter(('?' in t for t in texts), dtype=float, count=count)  # Has question
+        features[:, 4] = np.fromiter(map(self._urgency_score, texts), dtype=float, count=count)  # Urgency heuristic
         
-        for i, msg in enumerate(messages):
-            features[i, 0] = len(msg.text) if msg.text else 0  # Length
-            features[i, 1] = msg.date.hour  # Hour of day
-            features[i, 2] = msg.date.weekday()  # Day of week
-            features[i, 3] = 1 if '?' in (msg.text or '') else 0  # Has question
-            features[i, 4] = self._urgency_score(msg.text)  # Urgency heuristic
-            
         return features
     
     def _urgency_score(self, text):
         """Calculate urgency score based on keywords and patterns"""
         if not text:
             return 0
-            
-        urgent_terms = ['urgent', 'asap', 'emergency', 'immediately', 'help']
-        return sum(term in text.lower() for term in urgent_terms) 
\ No newline at end of file
+        
+        # Number of distinct urgent terms present, found in one regex scan
+        return len({match.lower() for match in URGENT_TERMS_PATTERN.findall(text)})
@@ -1,16 +1,36 @@
 from telethon.sync import TelegramClient
 from telethon.sessions import StringSession
 from telethon import events
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
 import asyncio
 import logging
 
+# Queue marker for the end of a history scan
+_SCAN_DONE = object()
+
+@dataclass
+class DialogScanState:
+    """What earlier scans learned about one dialog."""
+    high_water_mark: int = 0  # Newest message id already scanned
+    scanned_since: datetime = None  # Oldest date covered by the scans
+    pending: list = field(default_factory=list)  # Unresponded messages, oldest first
+
 class TelegramIntegration:
-    def __init__(self, api_id, api_hash, session_string=None):
+    def __init__(self, api_id, api_hash, session_string=None, client=None, scan_state=None, max_concurrent_scans=8):
         self.api_id = api_id
         self.api_hash = api_hash
-        self.session = StringSession(session_string) if session_string else StringSession()
-        self.client = TelegramClient(self.session, api_id, api_hash)
+        if client is not None:
+            # Wrap an already connected (e.g. pooled) client
+            self.session = client.session
+            self.client = client
+        else:
+            self.session = StringSession(session_string) if session_string else StringSession()
+            self.client = TelegramClient(self.session, api_id, api_hash)
         self.message_handlers = []
+        # Per-dialog scan state; pass the same dict again to scan incrementally
+        self.scan_state = scan_state if scan_state is not None else {}
+        self.max_concurrent_scans = max_concurrent_scans
         
     async def connect(self, phone=None):
         await self.client.start(phone=phone)
@@ -30,5 +50,92 @@ class TelegramIntegration:
                 await handler(event.message)
                 
     async def get_unresponded_messages(self, days_back=7):
-        """Retrieve messages that haven't been responded to within a time period"""
-        # ... implementation details 
\ No newline at end of file
+        """
+        Stream incoming private messages that haven't been answered.
+        
+        A message is unresponded when no outgoing message follows it in its
+        dialog. Dialogs are scanned concurrently, at most
+        ``max_concurrent_scans`` at a time, and messages are yielded as each
+        dialog finishes. Each dialog's newest scanned message id is kept in
+        ``scan_state``, so a repeat scan only fetches newer messages, and
+        dialogs whose newest message was already seen cost no request.
+        
+        Yields:
+            dict: message_id, chat_id, sender_id, contact, text and date
+        """
+        cutoff = datetime.now(timezone.utc) - timedelta(days=days_back)
+        results = asyncio.Queue()
+        semaphore = asyncio.Semaphore(self.max_concurrent_scans)
+        
+        async def scan_all():
+            scans = []
+            try:
+                async for dialog in self.client.iter_dialogs():
+                    # Dialogs are ordered by latest activity, pinned ones first
+                    if dialog.date and dialog.date < cutoff:
+                        if dialog.pinned:
+                            continue
+                        break
+                    if not dialog.is_user or getattr(dialog.entity, "bot", False):
+                        continue
+                    scans.append(asyncio.create_task(self._scan_dialog(dialog, cutoff, semaphore, results)))
+                await asyncio.gather(*scans)
+            finally:
+                for scan in scans:
+                    scan.cancel()
+                await results.put(_SCAN_DONE)
+        
+        producer = asyncio.create_task(scan_all())
+        try:
+            while True:
+                item = await results.get()
+                if item is _SCAN_DONE:
+                    break
+                yield item
+            # Surface scan errors
+            await producer
+        finally:
+            producer.cancel()
+    
+    async def _scan_dialog(self, dialog, cutoff, semaphore, results):
+        """Scan one dialog's new messages and queue its unresponded ones."""
+        state = self.scan_state.get(dialog.id)
+        if state is None or state.scanned_since is None or state.scanned_since > cutoff:
+            # First scan, or a longer look-back than before: walk the history again
+            state = self.scan_state[dialog.id] = DialogScanState(scanned_since=cutoff)
+        
+        top = dialog.message
+        if top is not None and top.id > state.high_water_mark:
+            if top.out:
+                # Our message is the newest, so everything before it is answered
+                state.pending = []
+            else:
+                async with semaphore:
+                    new_messages = []
+                    answered = False
+                    # Newest first, stopping at the previous scan's high-water mark
+                    async for message in self.client.iter_messages(dialog.entity, min_id=state.high_water_mark):
+                        if message.date < cutoff:
+                            break
+                        if message.out:
+                            answered = True
+                            break
+                        new_messages.append(self._message_info(dialog, message))
+                new_messages.reverse()
+                state.pending = new_messages if answered else state.pending + new_messages
+            state.high_water_mark = top.id
+        
+        state.pending = [message for message in state.pending if message["date"] >= cutoff]
+        for message in state.pending:
+            await results.put(message)
+    
+    @staticmethod
+    def _message_info(dialog, message):
+        return {
+            "message_id": message.id,
+            "chat_id": dialog.id,
+            "sender_id": message.sender_id,
+            "contact": dialog.name,
+            "text": message.message,
+            "date": message.date,
+        }
@@ -0,0 +1,9 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Make the backend ``app`` package and the root-level Telegram/ML modules
+# importable when running pytest from the repo root
+sys.path.insert(0, os.path.join(ROOT, "backend"))
+sys.path.insert(1, ROOT)
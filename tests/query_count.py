@@ -0,0 +1,37 @@
+"""Assertions on the number of SQL statements a block of code runs."""
+from contextlib import contextmanager
+from typing import Iterator, List
+
+from sqlalchemy import event
+
+
+class QueryCounter:
+    """Records the SQL statements executed on an engine while active."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.statements: List[str] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def __enter__(self) -> "QueryCounter":
+        event.listen(self.engine, "before_cursor_execute", self._record)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        event.remove(self.engine, "before_cursor_execute", self._record)
+
+
+@contextmanager
+def assert_num_queries(engine, expected: int) -> Iterator[QueryCounter]:
+    """Fail unless the block runs exactly ``expected`` statements on ``engine``."""
+    with QueryCounter(engine) as counter:
+        yield counter
+    assert counter.count == expected, (
+        f"Expected {expected} queries, got {counter.count}:\n" + "\n".join(counter.statements)
+    )
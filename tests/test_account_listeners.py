@@ -0,0 +1,106 @@
+import asyncio
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db import models
+from app.db.database import Base
+from app.services.account_listeners import AccountListeners
+from app.services.message_ingestion import MessageIngestor, write_batch
+
+
+class FakeClient:
+    def __init__(self, session_string):
+        self.session_string = session_string
+        self.connected = False
+        self.handlers = []
+
+    async def connect(self):
+        self.connected = True
+
+    async def disconnect(self):
+        self.connected = False
+
+    def add_event_handler(self, handler, event):
+        self.handlers.append(handler)
+
+    async def receive(self, message):
+        for handler in self.handlers:
+            await handler(SimpleNamespace(message=message))
+
+
+def _message(message_id, out=False):
+    sender = SimpleNamespace(id=42, first_name="Ann", last_name=None, username=None, phone=None)
+    return SimpleNamespace(
+        id=message_id, chat_id=42, sender_id=42, message="hello", date=datetime(2026, 1, 1, tzinfo=timezone.utc),
+        media=None, sender=sender, out=out,
+    )
+
+def test_messages_on_a_user_client_are_stored_for_that_user():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(bind=engine)
+    db = factory()
+    db.add_all([
+        models.User(id=1, email="a@example.com", hashed_password="x", telegram_session="session-1"),
+        models.User(id=2, email="b@example.com", hashed_password="x"),
+    ])
+    db.commit()
+
+    clients = {}
+
+    def client_factory(session_string):
+        clients[session_string] = FakeClient(session_string)
+        return clients[session_string]
+
+    def writer(batch):
+        session = factory()
+        try:
+            return write_batch(session, batch)
+        finally:
+            session.close()
+
+    ingestor = MessageIngestor(batch_size=10, flush_interval=0.01, writer=writer)
+    listeners = AccountListeners(ingestor=ingestor, client_factory=client_factory, session_factory=factory)
+
+    async def run():
+        ingestor.start()
+        # Only accounts with a session are listened on
+        await listeners.start()
+        assert len(listeners) == 1
+        client = clients["session-1"]
+        await client.receive(_message(1))
+        await client.receive(_message(2, out=True))
+        await ingestor.stop()
+        await listeners.close()
+        return client
+
+    client = asyncio.run(run())
+
+    assert not client.connected
+    message = db.query(models.Message).one()
+    assert (message.user_id, message.telegram_message_id) == (1, 1)
+    assert message.contact.user_id == 1
+
+def test_attach_replaces_and_detach_disconnects_a_users_client():
+    clients = []
+
+    def client_factory(session_string):
+        clients.append(FakeClient(session_string))
+        return clients[-1]
+
+    listeners = AccountListeners(ingestor=MessageIngestor(), client_factory=client_factory)
+
+    async def run():
+        await listeners.attach(1, "old")
+        await listeners.attach(1, "new")
+        assert len(listeners) == 1
+        assert [client.connected for client in clients] == [False, True]
+        await listeners.detach(1)
+
+    asyncio.run(run())
+    assert len(listeners) == 0
+    assert not clients[1].connected
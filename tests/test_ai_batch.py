@@ -0,0 +1,53 @@
+import asyncio
+from datetime import datetime
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.db import models
+from app.db.database import Base
+from app.services import ai_batch
+from app.services.cascade_categorization import LLM_TIER
+from app.services.inbox_summary import get_inbox_summary
+
+
+def test_categorizes_in_batches_on_an_async_session(monkeypatch):
+    async def categorize_messages(texts):
+        results = [
+            {"category": "followup_required", "confidence": 0.9, "reasoning": "", "tier": LLM_TIER} for _ in texts
+        ]
+        # One provider failure, left for a later run
+        results[0] = {"error": True}
+        return results
+
+    monkeypatch.setattr(ai_batch.cascade_categorizer, "categorize_messages", categorize_messages)
+
+    async def run():
+        engine = create_async_engine("sqlite+aiosqlite://")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        factory = async_sessionmaker(engine, expire_on_commit=False)
+
+        async with factory() as db:
+            db.add(models.User(id=1, email="a@example.com", hashed_password="x"))
+            db.add_all([
+                models.Message(
+                    user_id=1, telegram_message_id=i, chat_id=100, sender_id=100,
+                    message_text=f"m{i}", timestamp=datetime(2026, 1, 1, i)
+                )
+                for i in range(5)
+            ])
+            await db.commit()
+
+            result = await ai_batch.categorize_uncategorized_messages(db, user_id=1, batch_size=2)
+            categories = (await db.scalars(select(models.Message.ai_category).order_by(models.Message.id))).all()
+            summary = await db.run_sync(get_inbox_summary, 1)
+        await engine.dispose()
+        return result, categories, summary
+
+    result, categories, summary = asyncio.run(run())
+
+    # The first message of each batch of two failed
+    assert result == {"categorized": 2, "failed": 3, "local": 0, "llm": 2}
+    assert categories == [None, "followup_required", None, "followup_required", None]
+    assert summary["by_ai_category"] == {"": 3, "followup_required": 2}
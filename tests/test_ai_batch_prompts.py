@@ -0,0 +1,49 @@
+import asyncio
+import json
+
+import pytest
+
+from app.core.config import settings
+from app.services.ai_categorization import AICategorization, BatchParseError, parse_batch_response
+
+
+def _response(items):
+    return json.dumps({"results": items})
+
+def _item(index, category="not_important"):
+    return {"index": index, "category": category, "confidence": 0.9, "reasoning": "routine"}
+
+
+def test_parse_batch_response_orders_by_index():
+    results = parse_batch_response(_response([_item(1, "followup_required"), _item(0)]), 2)
+
+    assert [result["category"] for result in results] == ["not_important", "followup_required"]
+
+@pytest.mark.parametrize("content", [
+    "not json",
+    _response([_item(0)]),
+    _response([_item(0), _item(1, "spam")]),
+    _response([_item(0), _item(5)]),
+])
+def test_parse_batch_response_rejects_invalid_output(content):
+    with pytest.raises(BatchParseError):
+        parse_batch_response(content, 2)
+
+def test_invalid_batch_is_split_and_retried(monkeypatch):
+    monkeypatch.setattr(settings, "AI_PROMPT_BATCH_SIZE", 4)
+    monkeypatch.setattr(settings, "AI_CACHE_ENABLED", False)
+    client = AICategorization()
+    requests = []
+
+    async def complete(system, content, max_tokens=1000):
+        messages = json.loads(content)
+        requests.append(len(messages))
+        if len(messages) == 4:
+            return "truncated {"
+        return _response([_item(message["index"]) for message in messages])
+
+    client._complete = complete
+    results = asyncio.run(client.categorize_messages(["a", "b", "c", "d"]))
+
+    assert requests == [4, 2, 2]
+    assert all(result["category"] == "not_important" for result in results)
@@ -0,0 +1,36 @@
+import asyncio
+from datetime import datetime
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.db.database import Base, async_database_url
+from app.schemas.contact import ContactCreate
+from app.schemas.message import MessageCreate
+from app.services import contact_service, message_service
+
+
+def test_async_database_url_picks_async_drivers():
+    assert async_database_url("postgresql://u:p@db/crm") == "postgresql+asyncpg://u:p@db/crm"
+    assert async_database_url("sqlite:///./app.db") == "sqlite+aiosqlite:///./app.db"
+    assert async_database_url("postgresql+asyncpg://db/crm") == "postgresql+asyncpg://db/crm"
+
+def test_async_services_round_trip():
+    async def run():
+        engine = create_async_engine("sqlite+aiosqlite://")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        factory = async_sessionmaker(engine, expire_on_commit=False)
+
+        async with factory() as db:
+            contact = await contact_service.create_contact_async(db, ContactCreate(telegram_id=42, display_name="Ann"), user_id=1)
+            await message_service.create_message_async(db, MessageCreate(
+                telegram_message_id=1, chat_id=42, sender_id=42, message_text="hi", timestamp=datetime.utcnow()
+            ), user_id=1)
+
+            assert (await contact_service.get_contact_by_telegram_id_async(db, 1, 42)).id == contact.id
+            messages = await contact_service.get_contact_messages_async(db, contact.id)
+            assert [message.message_text for message in messages] == ["hi"]
+            assert len(await message_service.get_unresponded_messages_async(db)) == 1
+        await engine.dispose()
+
+    asyncio.run(run())
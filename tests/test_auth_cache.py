@@ -0,0 +1,106 @@
+import time
+from datetime import timedelta
+
+import pytest
+from cryptography.fernet import Fernet
+from jose import JWTError, jwt
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.security import create_access_token
+from app.db import models
+from app.db.database import Base
+from app.services import auth_cache
+from app.services.auth_cache import MemoryAuthCacheBackend, TokenCache, UserCache
+from app.services.session_rotation import reencrypt_sessions
+from query_count import assert_num_queries
+from app.security_utils import SessionEncryptor
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    db.add(models.User(id=1, email="ann@example.com", hashed_password="x", telegram_session="s1"))
+    db.commit()
+    db.close()
+    return engine
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = UserCache(ttl=60)
+    monkeypatch.setattr(auth_cache, "user_cache", cache)
+    return cache
+
+def test_token_verified_once(monkeypatch):
+    cache = TokenCache()
+    token = create_access_token(1)
+    calls = []
+    decode = jwt.decode
+    monkeypatch.setattr(auth_cache.jwt, "decode", lambda *a, **kw: calls.append(1) or decode(*a, **kw))
+
+    assert cache.decode(token)["sub"] == "1"
+    assert cache.decode(token)["sub"] == "1"
+    assert len(calls) == 1
+
+def test_expired_token_is_not_served_from_cache():
+    cache = TokenCache()
+    token = create_access_token(1, expires_delta=timedelta(seconds=1))
+    cache.decode(token)
+    time.sleep(2)
+
+    with pytest.raises(JWTError):
+        cache.decode(token)
+
+def test_cached_user_is_attached_without_a_query(engine, cache):
+    exp = int(time.time()) + 3600
+    db = sessionmaker(bind=engine)()
+    cache.set(db.get(models.User, 1), exp)
+
+    other = sessionmaker(bind=engine)()
+    with assert_num_queries(engine, 0):
+        user = cache.get(other, 1, exp)
+
+    assert user in other
+    assert user.telegram_session == "s1"
+
+def test_user_update_invalidates(engine, cache):
+    exp = int(time.time()) + 3600
+    db = sessionmaker(bind=engine)()
+    cache.set(db.get(models.User, 1), exp)
+
+    user = cache.get(db, 1, exp)
+    user.telegram_session = "s2"
+    db.commit()
+
+    assert cache.get(sessionmaker(bind=engine)(), 1, exp) is None
+
+def test_shared_tier_fills_local_misses(engine):
+    shared = MemoryAuthCacheBackend()
+    exp = int(time.time()) + 3600
+    db = sessionmaker(bind=engine)()
+    UserCache(ttl=60, shared=shared).set(db.get(models.User, 1), exp)
+
+    other_process = UserCache(ttl=60, shared=shared)
+    user = other_process.get(sessionmaker(bind=engine)(), 1, exp)
+
+    assert user.email == "ann@example.com"
+    assert other_process.hits == 1
+
+def test_session_rotation_invalidates(engine, cache):
+    old_key, new_key = Fernet.generate_key(), Fernet.generate_key()
+    db = sessionmaker(bind=engine)()
+    user = db.get(models.User, 1)
+    user.telegram_session = SessionEncryptor(key=old_key).encrypt_session("s1")
+    db.commit()
+    exp = int(time.time()) + 3600
+    cache.set(user, exp)
+
+    reencrypt_sessions(db, SessionEncryptor(key=new_key, old_keys=[old_key]))
+
+    assert cache.get(sessionmaker(bind=engine)(), 1, exp) is None
+
+def test_shared_backend_is_abstract():
+    with pytest.raises(TypeError):
+        auth_cache.AuthCacheBackend()
@@ -0,0 +1,87 @@
+import asyncio
+
+from app.services.cascade_categorization import CascadeCategorizer
+
+
+class FakeLocal:
+    def __init__(self, predictions):
+        self.predictions = predictions
+
+    def predict_categories(self, texts):
+        return [
+            {"predicted_category": self.predictions[text][0], "confidence": self.predictions[text][1]}
+            for text in texts
+        ]
+
+
+class FakeRemote:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.calls = []
+
+    async def categorize_messages(self, texts):
+        self.calls.extend(texts)
+        if self.fail:
+            return [{"category": "unsure_ask_user", "confidence": 0.0, "reasoning": "", "error": True} for _ in texts]
+        return [{"category": "followup_required", "confidence": 0.8, "reasoning": "llm"} for _ in texts]
+
+
+def test_escalates_only_low_confidence_and_unsure_messages():
+    local = FakeLocal({
+        "ok": ("not_important", 0.95),
+        "maybe": ("followup_required", 0.4),
+        "hmm": ("unsure_ask_user", 0.99),
+    })
+    remote = FakeRemote()
+    cascade = CascadeCategorizer(local=local, remote=remote, threshold=0.75, enabled=True)
+
+    results = asyncio.run(cascade.categorize_messages(["ok", "maybe", "hmm"]))
+
+    assert remote.calls == ["maybe", "hmm"]
+    assert [result["tier"] for result in results] == ["local", "llm", "llm"]
+    assert results[0]["category"] == "not_important"
+    assert cascade.stats()["local"] == 1 and cascade.stats()["llm"] == 2
+
+def test_untrained_local_model_sends_everything_to_the_llm():
+    class Untrained:
+        def predict_categories(self, texts):
+            raise ValueError("Model not loaded")
+
+    remote = FakeRemote()
+    cascade = CascadeCategorizer(local=Untrained(), remote=remote, threshold=0.75, enabled=True)
+
+    results = asyncio.run(cascade.categorize_messages(["a", "b"]))
+
+    assert remote.calls == ["a", "b"]
+    assert all(result["tier"] == "llm" for result in results)
+
+def test_llm_failure_falls_back_to_local_prediction():
+    local = FakeLocal({"maybe": ("followup_required", 0.4)})
+    cascade = CascadeCategorizer(local=local, remote=FakeRemote(fail=True), threshold=0.75, enabled=True)
+
+    result = asyncio.run(cascade.categorize_message("maybe"))
+
+    assert result["tier"] == "local"
+    assert result["category"] == "followup_required"
+    assert result["escalation_failed"]
+
+def test_local_labels_outside_the_llm_categories_are_escalated():
+    # A local model trained on the user's own labels
+    local = FakeLocal({"call me": ("schedule_call", 0.99), "fyi": ("not_important", 0.9)})
+    remote = FakeRemote()
+    cascade = CascadeCategorizer(local=local, remote=remote, threshold=0.75, enabled=True)
+
+    results = asyncio.run(cascade.categorize_messages(["call me", "fyi"]))
+
+    assert remote.calls == ["call me"]
+    assert [result["category"] for result in results] == ["followup_required", "not_important"]
+    assert [result["tier"] for result in results] == ["llm", "local"]
+
+def test_llm_failure_does_not_fall_back_to_a_foreign_label():
+    local = FakeLocal({"call me": ("schedule_call", 0.99)})
+    cascade = CascadeCategorizer(local=local, remote=FakeRemote(fail=True), threshold=0.75, enabled=True)
+
+    result = asyncio.run(cascade.categorize_message("call me"))
+
+    assert result["tier"] == "llm"
+    assert result["error"]
@@ -0,0 +1,37 @@
+import asyncio
+
+from app.services.categorization_cache import CategorizationCache, prompt_version
+
+
+def test_key_ignores_case_and_whitespace_but_not_prompt_version():
+    key = CategorizationCache.make_key("Thanks!", "openai", "gpt-4", "v1")
+
+    assert CategorizationCache.make_key("  thanks!\n", "openai", "gpt-4", "v1") == key
+    assert CategorizationCache.make_key("Thanks!", "openai", "gpt-4", "v2") != key
+    assert prompt_version("prompt a") != prompt_version("prompt b")
+
+def test_lru_eviction_and_hit_rate():
+    cache = CategorizationCache(max_entries=2, ttl=60)
+    value = {"category": "ignore", "confidence": 0.9, "reasoning": "small talk"}
+
+    async def run():
+        await cache.set("a", value, "v1")
+        await cache.set("b", value, "v1")
+        assert await cache.get("a") == value
+        await cache.set("c", value, "v1")
+        # "b" was least recently used
+        assert await cache.get("b") is None
+
+    asyncio.run(run())
+    stats = cache.stats()
+    assert stats["entries"] == 2
+    assert stats["hits"] == 1 and stats["misses"] == 1
+
+def test_expired_entries_are_misses():
+    cache = CategorizationCache(ttl=0)
+
+    async def run():
+        await cache.set("a", {"category": "ignore", "confidence": 1.0, "reasoning": ""}, "v1")
+        return await cache.get("a")
+
+    assert asyncio.run(run()) is None
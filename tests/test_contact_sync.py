@@ -0,0 +1,73 @@
+import asyncio
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db import models
+from app.db.database import Base
+from app.services.contact_sync import ContactSync
+from query_count import QueryCounter
+
+
+def _dialog(user_id, first_name, day=1, is_user=True):
+    entity = SimpleNamespace(id=user_id, first_name=first_name, last_name=None, username=f"u{user_id}", phone=None)
+    return SimpleNamespace(entity=entity, is_user=is_user, date=datetime(2026, 1, day, tzinfo=timezone.utc))
+
+
+class FakeClient:
+    def __init__(self, dialogs):
+        self.dialogs = dialogs
+
+    async def iter_dialogs(self):
+        for dialog in self.dialogs:
+            yield dialog
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    return engine
+
+def test_sync_writes_only_changed_contacts(engine):
+    sync = ContactSync(batch_size=3, session_factory=sessionmaker(bind=engine))
+    dialogs = [_dialog(i, f"User {i}") for i in range(1, 8)] + [_dialog(99, "Group", is_user=False)]
+
+    assert asyncio.run(sync.run(FakeClient(dialogs), 1)) == {"dialogs": 7, "changed": 7}
+
+    dialogs[2] = _dialog(3, "Renamed")
+    dialogs[5] = _dialog(6, "User 6", day=5)
+    with QueryCounter(engine) as counter:
+        assert asyncio.run(sync.run(FakeClient(dialogs), 1)) == {"dialogs": 7, "changed": 2}
+
+    writes = [s for s in counter.statements if s.lstrip().upper().startswith(("INSERT", "UPDATE"))]
+    assert len(writes) == 2
+
+    db = sessionmaker(bind=engine)()
+    contacts = {c.telegram_id: c for c in db.query(models.Contact)}
+    assert len(contacts) == 7
+    assert contacts[3].display_name == "Renamed"
+    assert contacts[6].last_message_time == datetime(2026, 1, 5)
+
+def test_unchanged_sync_writes_nothing(engine):
+    sync = ContactSync(batch_size=100, session_factory=sessionmaker(bind=engine))
+    dialogs = [_dialog(i, f"User {i}") for i in range(1, 4)]
+    asyncio.run(sync.run(FakeClient(dialogs), 1))
+
+    with QueryCounter(engine) as counter:
+        assert asyncio.run(sync.run(FakeClient(dialogs), 1))["changed"] == 0
+
+    assert all(s.lstrip().upper().startswith("SELECT") for s in counter.statements)
+
+def test_sync_keeps_each_users_contacts_apart(engine):
+    sync = ContactSync(batch_size=100, session_factory=sessionmaker(bind=engine))
+    asyncio.run(sync.run(FakeClient([_dialog(1, "Ann")]), 1))
+    # The same peer, under another name, in a second user's dialogs
+    assert asyncio.run(sync.run(FakeClient([_dialog(1, "Anna")]), 2))["changed"] == 1
+
+    db = sessionmaker(bind=engine)()
+    assert {c.user_id: c.display_name for c in db.query(models.Contact)} == {1: "Ann", 2: "Anna"}
@@ -0,0 +1,19 @@
+import numpy as np
+
+from app.services.feature_store import pack_features, stored_vector, unpack_features
+
+
+def test_pack_roundtrip_is_compact():
+    vector = [120.0, 14.0, 2.0, 1.0, 3.0]
+
+    blob = pack_features(vector)
+
+    assert len(blob) == 4 * len(vector)
+    np.testing.assert_allclose(unpack_features(blob), vector)
+
+def test_stale_or_missing_vectors_are_not_reused():
+    blob = pack_features([1.0, 2.0, 3.0, 4.0, 5.0])
+
+    assert stored_vector(blob, 1, current_version=1) is not None
+    assert stored_vector(blob, 1, current_version=2) is None
+    assert stored_vector(None, None, current_version=1) is None
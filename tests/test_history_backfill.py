@@ -0,0 +1,73 @@
+import asyncio
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db import models
+from app.db.database import Base
+from app.services.history_backfill import HistoryBackfill, load_checkpoints
+
+
+def _message(message_id, out=False):
+    sender = SimpleNamespace(id=42, first_name="Ann", last_name=None, username=None, phone=None)
+    return SimpleNamespace(id=message_id, out=out, chat_id=42, sender_id=None if out else 42, message=f"m{message_id}",
+                           date=datetime(2024, 1, 1, tzinfo=timezone.utc), media=None, action=None,
+                           sender=None if out else sender)
+
+
+class FakeClient:
+    """One private dialog; optionally fails after yielding ``fail_after`` messages."""
+
+    def __init__(self, history, fail_after=None):
+        self.history = history
+        self.fail_after = fail_after
+
+    async def iter_dialogs(self):
+        yield SimpleNamespace(id=42, entity=42, is_user=True, is_group=False)
+
+    async def iter_messages(self, entity, offset_id=0, wait_time=None):
+        yielded = 0
+        for message in sorted(self.history, key=lambda m: m.id, reverse=True):
+            if offset_id and message.id >= offset_id:
+                continue
+            if self.fail_after is not None and yielded >= self.fail_after:
+                raise ConnectionError("connection lost")
+            yielded += 1
+            yield message
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine)
+
+
+def test_backfill_resumes_from_last_committed_batch(session_factory):
+    history = [_message(1), _message(2, out=True), _message(3), _message(4), _message(5), _message(6)]
+    backfill = HistoryBackfill(batch_size=2, session_factory=session_factory)
+
+    # Interrupted after one full batch (6, 5) was committed
+    result = asyncio.run(backfill.run(FakeClient(history, fail_after=3), user_id=1))
+    assert result["completed"] == 0
+    db = session_factory()
+    assert load_checkpoints(db, 1)[42]["oldest_message_id"] == 5
+    db.close()
+
+    result = asyncio.run(backfill.run(FakeClient(history), user_id=1))
+    assert result == {"dialogs": 1, "completed": 1, "messages": 3}
+
+    db = session_factory()
+    stored = {m.telegram_message_id: m.is_responded for m in db.query(models.Message)}
+    # Outgoing message 2 is not stored and answers message 1
+    assert stored == {1: True, 3: False, 4: False, 5: False, 6: False}
+    assert load_checkpoints(db, 1)[42]["completed"]
+    # Imported history belongs to the user
+    assert {m.user_id for m in db.query(models.Message)} == {1}
+
+    # A finished dialog is skipped
+    assert asyncio.run(backfill.run(FakeClient(history), user_id=1))["messages"] == 0
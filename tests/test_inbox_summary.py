@@ -0,0 +1,135 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db import models
+from app.db.database import Base
+from app.services import inbox_summary
+from app.services.inbox_summary import apply_changes, get_inbox_summary, inbox_entry, rebuild
+from app.services.message_ingestion import insert_messages, link_contacts
+from query_count import assert_num_queries
+
+START = datetime(2026, 1, 1)
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    db.add_all([models.User(id=1, email="a@example.com", hashed_password="x"), models.Contact(id=1, user_id=1, telegram_id=100)])
+    db.commit()
+    db.close()
+    return engine
+
+@pytest.fixture
+def db(engine):
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+def _message(i, **values):
+    return models.Message(
+        user_id=1, telegram_message_id=i, chat_id=100, sender_id=100, contact_id=1,
+        timestamp=START + timedelta(hours=i), **values
+    )
+
+def _assert_matches_rebuild(db):
+    maintained = get_inbox_summary(db, 1)
+    rebuild(db)
+    assert maintained == get_inbox_summary(db, 1)
+    return maintained
+
+def test_orm_inserts_and_updates_keep_summary_current(db):
+    messages = [_message(i, category="lead" if i % 2 else None) for i in range(6)]
+    db.add_all(messages)
+    db.commit()
+
+    # Answered, recategorized and AI-categorized
+    messages[0].is_responded = True
+    messages[1].category = "support"
+    messages[2].ai_category = "question"
+    db.commit()
+
+    summary = _assert_matches_rebuild(db)
+    assert summary["unresponded_count"] == 5
+    # The oldest message was answered
+    assert summary["oldest_unresponded_at"] == START + timedelta(hours=1)
+    assert summary["by_category"] == {"": 2, "lead": 2, "support": 1}
+    assert summary["by_ai_category"] == {"": 4, "question": 1}
+    assert summary["by_contact"] == {1: 5}
+
+def test_deleting_and_reopening_messages(db):
+    messages = [_message(i) for i in range(3)]
+    db.add_all(messages)
+    db.commit()
+
+    db.delete(messages[0])
+    messages[1].is_responded = True
+    db.commit()
+    assert _assert_matches_rebuild(db)["unresponded_count"] == 1
+
+    messages[1].is_responded = False
+    db.commit()
+    summary = _assert_matches_rebuild(db)
+    assert summary["unresponded_count"] == 2
+    assert summary["oldest_unresponded_at"] == START + timedelta(hours=1)
+
+def test_bulk_inserts_count_only_new_owned_messages(db):
+    def rows():
+        return [
+            {"telegram_message_id": i, "chat_id": 100, "sender_id": 100, "timestamp": START + timedelta(hours=i)}
+            for i in range(4)
+        ]
+
+    batch = rows()
+    link_contacts(db, batch, user_id=1)
+    assert insert_messages(db, batch) == 4
+    # Redelivered: nothing new
+    batch = rows()
+    link_contacts(db, batch, user_id=1)
+    assert insert_messages(db, batch) == 0
+    # Ownerless messages are in no inbox
+    insert_messages(db, [{"telegram_message_id": 9, "chat_id": 200, "sender_id": 100, "timestamp": START}])
+    db.commit()
+
+    summary = _assert_matches_rebuild(db)
+    assert summary["unresponded_count"] == 4
+    assert summary["by_contact"] == {1: 4}
+
+def test_bulk_categorization_moves_entries(db):
+    db.add(_message(1))
+    db.commit()
+    values = {"user_id": 1, "is_responded": False, "category": None, "contact_id": 1, "timestamp": START}
+
+    db.bulk_update_mappings(models.Message, [{"id": 1, "ai_category": "lead"}])
+    apply_changes(
+        db.connection(),
+        [inbox_entry({**values, "ai_category": None})],
+        [inbox_entry({**values, "ai_category": "lead"})]
+    )
+    db.commit()
+
+    assert get_inbox_summary(db, 1)["by_ai_category"] == {"lead": 1}
+
+def test_summary_reads_do_not_scan_messages(engine, db):
+    db.add_all([_message(i, category=f"c{i % 3}") for i in range(50)])
+    db.commit()
+    db.expunge_all()
+
+    with assert_num_queries(engine, 2):
+        summary = get_inbox_summary(db, 1)
+
+    assert summary["unresponded_count"] == 50
+
+def test_rebuild_single_user(db):
+    db.add_all([_message(i) for i in range(3)])
+    db.commit()
+    db.query(models.InboxCount).delete()
+    db.query(models.InboxSummary).delete()
+    db.commit()
+
+    assert rebuild(db, user_id=1) == 1
+    assert get_inbox_summary(db, 1)["unresponded_count"] == 3
+    assert inbox_summary.get_unresponded_count(db, 2) == 0
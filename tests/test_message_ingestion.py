@@ -0,0 +1,130 @@
+import asyncio
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db import models
+from app.db.database import Base
+from app.services.message_ingestion import MessageIngestor, contact_row, insert_messages, message_row, write_batch
+
+
+def _message(message_id, chat_id=1, sender=None, text="hello"):
+    return SimpleNamespace(
+        id=message_id,
+        chat_id=chat_id,
+        sender_id=sender.id if sender else chat_id,
+        message=text,
+        date=datetime(2024, 1, 1, tzinfo=timezone.utc),
+        media=None,
+        sender=sender,
+        out=False,
+    )
+
+def _sender(telegram_id, first_name="Ann", username=None):
+    return SimpleNamespace(id=telegram_id, first_name=first_name, last_name=None, username=username, phone=None)
+
+
+def test_flushes_full_batches_and_leftovers_on_stop():
+    batches = []
+    ingestor = MessageIngestor(batch_size=3, flush_interval=10, writer=lambda batch: batches.append(batch) or len(batch))
+
+    async def run():
+        ingestor.start()
+        for i in range(7):
+            await ingestor.submit(_message(i))
+        await asyncio.sleep(0.05)
+        await ingestor.stop()
+
+    asyncio.run(run())
+
+    assert [len(batch) for batch in batches[:2]] == [3, 3]
+    assert sum(len(batch) for batch in batches) == 7
+    assert ingestor.stats()["written"] == 7
+
+def test_partial_batch_is_flushed_after_interval():
+    batches = []
+    ingestor = MessageIngestor(batch_size=100, flush_interval=0.01, writer=lambda batch: batches.append(batch) or len(batch))
+
+    async def run():
+        ingestor.start()
+        await ingestor.submit(_message(1))
+        await asyncio.sleep(0.1)
+        flushed = len(batches)
+        await ingestor.stop()
+        return flushed
+
+    assert asyncio.run(run()) == 1
+
+def test_full_queue_applies_backpressure():
+    ingestor = MessageIngestor(max_queue_size=1, writer=len)
+
+    async def run():
+        await ingestor.submit(_message(1))
+        blocked = asyncio.create_task(ingestor.submit(_message(2)))
+        await asyncio.sleep(0.01)
+        assert not blocked.done()
+        ingestor.queue.get_nowait()
+        await blocked
+
+    asyncio.run(run())
+    assert ingestor.stats()["blocked_submits"] == 1
+
+def test_write_batch_upserts_contacts_and_skips_duplicate_messages():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+
+    def item(message):
+        return message_row(message), contact_row(message.sender)
+
+    assert write_batch(db, [item(_message(1, sender=_sender(42))), item(_message(2, sender=_sender(42)))]) == 2
+    # Redelivered message and a renamed sender
+    assert write_batch(db, [item(_message(2, sender=_sender(42, first_name="Anna", username="anna")))]) == 0
+
+    contact = db.query(models.Contact).one()
+    assert contact.first_name == "Anna" and contact.username == "anna"
+    assert db.query(models.Message).count() == 2
+    assert {message.contact_id for message in db.query(models.Message)} == {contact.id}
+
+def test_same_chat_message_is_stored_once_per_owner():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    db.add_all([models.User(id=1, email="a@example.com", hashed_password="x"), models.User(id=2, email="b@example.com", hashed_password="x")])
+    db.commit()
+
+    def rows(user_id):
+        # Private chats are keyed by the peer, so both accounts see chat 42, message 7
+        return [{**message_row(_message(7, chat_id=42)), "user_id": user_id}]
+
+    assert insert_messages(db, rows(1)) == 1
+    assert insert_messages(db, rows(2)) == 1
+    # Redelivered to the first account
+    assert insert_messages(db, rows(1)) == 0
+    db.commit()
+
+    assert sorted(user_id for (user_id,) in db.query(models.Message.user_id)) == [1, 2]
+
+def test_each_owner_gets_its_own_contact_for_a_sender():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+
+    def item(message_id, user_id, first_name):
+        message = _message(message_id, chat_id=42, sender=_sender(42, first_name=first_name))
+        row = message_row(message)
+        if user_id is not None:
+            row["user_id"] = user_id
+        return row, contact_row(message.sender)
+
+    write_batch(db, [item(1, 1, "Ann"), item(1, 2, "Anna"), item(1, None, "Bot's Ann")])
+    # A later rename seen by one account leaves the others' contacts alone
+    write_batch(db, [item(2, 2, "Annie")])
+
+    contacts = {contact.user_id: contact for contact in db.query(models.Contact)}
+    assert {owner: contact.first_name for owner, contact in contacts.items()} == {1: "Ann", 2: "Annie", None: "Bot's Ann"}
+    assert {
+        (message.user_id, message.telegram_message_id): message.contact_id for message in db.query(models.Message)
+    } == {(1, 1): contacts[1].id, (2, 1): contacts[2].id, (2, 2): contacts[2].id, (None, 1): contacts[None].id}
@@ -0,0 +1,99 @@
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.db import models
+from app.db.database import Base
+from app.services import history_backfill, message_listing
+from app.services.message_listing import CountCache, list_user_messages
+
+@pytest.fixture
+def db(monkeypatch):
+    monkeypatch.setattr(message_listing, "count_cache", CountCache(ttl=60))
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    start = datetime(2026, 1, 1)
+    session.add_all([
+        models.Message(
+            user_id=1 + i % 2, telegram_message_id=i, chat_id=7, sender_id=7,
+            message_text=f"note {i}", is_responded=i % 3 == 0, timestamp=start + timedelta(minutes=i)
+        )
+        for i in range(20)
+    ])
+    session.commit()
+
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    session.statements = statements
+    yield session
+    session.close()
+    engine.dispose()
+
+def test_page_and_total_in_one_query(db):
+    page, total = list_user_messages(db, user_id=1, limit=4)
+
+    assert total == 10
+    assert [m.message_text for m in page.items] == ["note 18", "note 16", "note 14", "note 12"]
+    assert len(db.statements) == 1
+
+def test_cached_total_skips_counting(db):
+    list_user_messages(db, user_id=1, limit=4, is_responded=False)
+    db.statements.clear()
+
+    page, total = list_user_messages(db, user_id=1, skip=4, limit=4, is_responded=False)
+
+    assert total == 6
+    assert len(page.items) == 2
+    assert "OVER" not in db.statements[0].upper()
+
+def test_past_last_page_still_counts(db):
+    page, total = list_user_messages(db, user_id=2, skip=50, limit=4, search="note")
+
+    assert page.items == []
+    assert total == 10
+
+def test_invalidate_drops_user_totals():
+    cache = CountCache(ttl=60)
+    cache.set(1, ("a",), 5)
+    cache.set(2, ("a",), 7)
+
+    cache.invalidate(1)
+
+    assert cache.get(1, ("a",)) is None
+    assert cache.get(2, ("a",)) == 7
+
+def test_zero_ttl_disables_cache():
+    cache = CountCache(ttl=0)
+    cache.set(1, (), 5)
+
+    assert cache.get(1, ()) is None
+
+def test_cache_is_safe_across_threads():
+    cache = CountCache(ttl=60, max_entries=50)
+
+    def churn(user_id):
+        for i in range(2000):
+            cache.set(user_id, (i,), i)
+            cache.invalidate(user_id % 3)
+
+    threads = [threading.Thread(target=churn, args=(user_id,)) for user_id in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(cache._entries) <= 50
+
+def test_history_backfill_drops_cached_totals(db, monkeypatch):
+    monkeypatch.setattr(history_backfill, "count_cache", message_listing.count_cache)
+    list_user_messages(db, user_id=1, limit=4)
+    row = {"telegram_message_id": 100, "chat_id": 9, "sender_id": 9, "message_text": "new", "timestamp": datetime(2026, 2, 1)}
+
+    history_backfill.save_progress(db, 1, 9, {"oldest_message_id": 100, "seen_reply": False, "completed": True}, [(row, None)])
+
+    _, total = list_user_messages(db, user_id=1, limit=4)
+    assert total == 11
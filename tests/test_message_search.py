@@ -0,0 +1,102 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import Boolean, Column, DateTime, Integer, String, Text, create_engine, select, text
+from sqlalchemy.orm import declarative_base, sessionmaker
+
+from app.services import message_search
+from app.services.message_search import LikeSearchBackend, SQLiteFTSBackend, search_backend, search_messages
+
+SearchBase = declarative_base()
+
+class Message(SearchBase):
+    __tablename__ = "messages"
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer)
+    message_text = Column(Text)
+    is_responded = Column(Boolean, default=False)
+    category = Column(String)
+    timestamp = Column(DateTime)
+
+# As created by the add_message_search migration
+FTS_DDL = [
+    "CREATE VIRTUAL TABLE message_fts USING fts5(message_text, content='messages', content_rowid='id')",
+    "CREATE TRIGGER messages_ai AFTER INSERT ON messages BEGIN "
+    "INSERT INTO message_fts(rowid, message_text) VALUES (new.id, new.message_text); END",
+    "CREATE TRIGGER messages_au AFTER UPDATE OF message_text ON messages BEGIN "
+    "INSERT INTO message_fts(message_fts, rowid, message_text) VALUES ('delete', old.id, old.message_text); "
+    "INSERT INTO message_fts(rowid, message_text) VALUES (new.id, new.message_text); END",
+]
+
+TEXTS = [
+    "Can we schedule a call about the invoice?",
+    "Invoice attached, invoice number 42",
+    "Lunch tomorrow?",
+    "Re: scheduling",
+]
+
+def _session(monkeypatch, fts: bool):
+    monkeypatch.setattr(message_search, "models", SimpleNamespace(Message=Message))
+    monkeypatch.setattr(message_search, "settings", SimpleNamespace(SEARCH_BACKEND="auto"))
+    engine = create_engine("sqlite://")
+    SearchBase.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    if fts:
+        for statement in FTS_DDL:
+            session.execute(text(statement))
+    start = datetime(2026, 1, 1)
+    session.add_all([
+        Message(user_id=1, message_text=body, timestamp=start + timedelta(hours=i)) for i, body in enumerate(TEXTS)
+    ])
+    session.add(Message(user_id=2, message_text="invoice for someone else", timestamp=start))
+    session.commit()
+    return session
+
+def test_detects_fts_table(monkeypatch):
+    assert isinstance(search_backend(_session(monkeypatch, fts=True)), SQLiteFTSBackend)
+    assert isinstance(search_backend(_session(monkeypatch, fts=False)), LikeSearchBackend)
+
+def test_fts_ranks_and_highlights(monkeypatch):
+    db = _session(monkeypatch, fts=True)
+
+    hits = search_messages(db, user_id=1, search="invoice")
+
+    assert [hit["message"].message_text for hit in hits] == [TEXTS[1], TEXTS[0]]
+    assert hits[0]["rank"] > hits[1]["rank"]
+    assert "<mark>invoice</mark>" in hits[1]["snippet"].lower()
+
+def test_fts_matches_prefix_of_last_word_and_tracks_updates(monkeypatch):
+    db = _session(monkeypatch, fts=True)
+    assert {hit["message"].id for hit in search_messages(db, 1, "sched")} == {1, 4}
+
+    db.get(Message, 3).message_text = "Lunch schedule tomorrow"
+    db.commit()
+
+    assert {hit["message"].id for hit in search_messages(db, 1, "sched")} == {1, 3, 4}
+
+def test_fts_filter_handles_punctuation_only_queries(monkeypatch):
+    db = _session(monkeypatch, fts=True)
+    backend = search_backend(db)
+
+    assert db.scalars(backend.filter(select(Message), Message, '"')).all() == []
+    assert len(db.scalars(backend.filter(select(Message), Message, "invoice")).all()) == 3
+
+def test_like_fallback_snippet(monkeypatch):
+    db = _session(monkeypatch, fts=False)
+
+    hits = search_messages(db, user_id=1, search="LUNCH")
+
+    assert len(hits) == 1
+    assert hits[0]["snippet"] == "<mark>Lunch</mark> tomorrow?"
+
+@pytest.mark.parametrize("search", ["%", "_", "in_oice"])
+def test_like_treats_wildcards_literally(monkeypatch, search):
+    db = _session(monkeypatch, fts=False)
+
+    assert db.scalars(LikeSearchBackend().filter(select(Message), Message, search)).all() == []
+
+def test_search_backend_is_abstract():
+    with pytest.raises(TypeError):
+        message_search.SearchBackend()
@@ -0,0 +1,98 @@
+import asyncio
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core import metrics
+from app.core.metrics import MetricsMiddleware, MetricsRegistry, install_query_timing
+from app.db.database import Base
+from app.services.inbox_summary import get_unresponded_count
+
+def test_render_counters_and_histograms():
+    registry = MetricsRegistry()
+    errors = registry.counter("errors_total", "Errors", ("provider",))
+    latency = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+
+    errors.labels("openai").inc()
+    errors.labels("openai").inc(2)
+    for value in (0.05, 0.5, 0.5, 5.0):
+        latency.observe(value)
+
+    lines = registry.render().splitlines()
+    assert "# TYPE errors_total counter" in lines
+    assert 'errors_total{provider="openai"} 3' in lines
+    assert "# TYPE latency_seconds histogram" in lines
+    # Buckets are cumulative
+    assert 'latency_seconds_bucket{le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{le="1"} 3' in lines
+    assert 'latency_seconds_bucket{le="+Inf"} 4' in lines
+    assert "latency_seconds_sum 6.05" in lines
+    assert "latency_seconds_count 4" in lines
+
+def test_labels_must_match_and_names_are_unique():
+    registry = MetricsRegistry()
+    counter = registry.counter("requests_total", "Requests", ("method",))
+
+    with pytest.raises(ValueError):
+        counter.labels("GET", "extra")
+    with pytest.raises(ValueError):
+        registry.counter("requests_total", "Requests")
+
+class _Route:
+    path = "/api/v1/messages/{message_id}"
+
+def test_middleware_labels_by_route_template():
+    registry = MetricsRegistry()
+    histogram = registry.histogram("http_seconds", "HTTP", ("method", "route", "status"))
+
+    async def app(scope, receive, send):
+        # What the router does when a route matches
+        scope["route"] = _Route()
+        await send({"type": "http.response.start", "status": 404})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def send(message):
+        pass
+
+    middleware = MetricsMiddleware(app, histogram)
+    scope = {"type": "http", "method": "GET", "path": "/api/v1/messages/42"}
+    asyncio.run(middleware(scope, None, send))
+
+    assert 'http_seconds_count{method="GET",route="/api/v1/messages/{message_id}",status="404"} 1' in registry.render()
+
+def test_middleware_records_failed_requests_as_500():
+    registry = MetricsRegistry()
+    histogram = registry.histogram("http_seconds", "HTTP", ("method", "route", "status"))
+
+    async def app(scope, receive, send):
+        raise RuntimeError("boom")
+
+    middleware = MetricsMiddleware(app, histogram)
+    with pytest.raises(RuntimeError):
+        asyncio.run(middleware({"type": "http", "method": "POST", "path": "/x"}, None, None))
+
+    assert 'http_seconds_count{method="POST",route="<unmatched>",status="500"} 1' in registry.render()
+
+@pytest.fixture
+def query_timing():
+    install_query_timing()
+    yield
+    event.remove(Engine, "before_cursor_execute", metrics._before_cursor_execute)
+    event.remove(Engine, "after_cursor_execute", metrics._after_cursor_execute)
+
+def test_queries_are_attributed_to_service_functions(query_timing):
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+
+    get_unresponded_count(db, 1)
+    db.close()
+
+    child = metrics.db_query_latency.labels("inbox_summary.get_unresponded_count")
+    assert sum(child.counts) >= 1
+
+def test_metric_is_abstract():
+    with pytest.raises(TypeError):
+        metrics.Metric("untyped", "Untyped")
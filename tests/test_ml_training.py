@@ -0,0 +1,36 @@
+import os
+
+import pytest
+
+from app.services.ml_training import (
+    VERSIONS_DIR,
+    current_version_dir,
+    list_versions,
+    publish_version,
+)
+
+
+def _make_version(models_dir, version):
+    os.makedirs(os.path.join(models_dir, VERSIONS_DIR, version))
+
+def test_publish_switches_current_version(tmp_path):
+    models_dir = str(tmp_path)
+    assert current_version_dir(models_dir) is None
+
+    _make_version(models_dir, "20240101000000-a")
+    publish_version(models_dir, "20240101000000-a")
+
+    assert current_version_dir(models_dir) == os.path.join(models_dir, VERSIONS_DIR, "20240101000000-a")
+
+def test_publish_prunes_old_versions(tmp_path):
+    models_dir = str(tmp_path)
+    for i in range(4):
+        _make_version(models_dir, f"2024010100000{i}-a")
+
+    publish_version(models_dir, "20240101000003-a", keep=2)
+
+    assert list_versions(models_dir) == ["20240101000002-a", "20240101000003-a"]
+
+def test_publish_rejects_unknown_version(tmp_path):
+    with pytest.raises(ValueError):
+        publish_version(str(tmp_path), "missing")
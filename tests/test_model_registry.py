@@ -0,0 +1,32 @@
+import os
+
+import joblib
+
+from app.services.model_registry import ModelRegistry
+
+
+def test_loads_once_until_file_changes(tmp_path):
+    path = str(tmp_path / "model.joblib")
+    joblib.dump({"version": 1}, path)
+    registry = ModelRegistry()
+
+    first = registry.get(path)
+    assert registry.get(path) is first
+
+    joblib.dump({"version": 2}, path)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    assert registry.get(path) == {"version": 2}
+
+def test_touch_without_content_change_keeps_object(tmp_path):
+    path = str(tmp_path / "model.joblib")
+    joblib.dump({"version": 1}, path)
+    registry = ModelRegistry()
+    first = registry.get(path)
+
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    assert registry.get(path) is first
+    assert registry.stats()["artifacts"] == 1
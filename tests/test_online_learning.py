@@ -0,0 +1,32 @@
+from app.services.online_learning import OnlineLearner, OnlineMessageClassifier
+
+
+def _metadata(text):
+    return [len(text), 12, 2, int("?" in text), 0]
+
+def test_learn_applies_label_immediately(tmp_path):
+    learner = OnlineLearner(str(tmp_path / "online.joblib"), save_every=100)
+
+    assert learner.learn("can we schedule a call tomorrow?", _metadata("can we schedule a call tomorrow?"), "schedule_call")
+
+    classifier = learner.get()
+    assert classifier.is_fitted
+    assert classifier.updates == 1
+    assert classifier.predict_proba(["call tomorrow?"], [_metadata("call tomorrow?")]).shape == (1, 4)
+
+def test_unknown_label_waits_for_consolidation(tmp_path):
+    learner = OnlineLearner(str(tmp_path / "online.joblib"))
+
+    assert not learner.learn("spam offer", _metadata("spam offer"), "spam")
+    assert learner.stats()["pending_labels"] == ["spam"]
+
+    learner.begin_consolidation()
+    learner.learn("call me", _metadata("call me"), "schedule_call")
+    refitted = OnlineMessageClassifier().fit(["spam offer"], [_metadata("spam offer")], ["spam"])
+    learner.consolidate(refitted)
+
+    # Feedback received during the refit was replayed onto the new model
+    assert learner.get() is refitted
+    assert refitted.updates == 1
+    assert learner.stats()["pending_labels"] == []
+    assert (tmp_path / "online.joblib").exists()
@@ -0,0 +1,119 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db import models
+from app.db.database import Base
+from app.services import contact_service, message_listing, message_service
+from app.services.message_listing import CountCache, list_user_messages
+from app.services.pagination import InvalidCursor, encode_cursor
+
+
+@pytest.fixture
+def db(monkeypatch):
+    monkeypatch.setattr(message_listing, "count_cache", CountCache(ttl=60))
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+def _add_messages(db, count):
+    start = datetime(2026, 1, 1)
+    contact = models.Contact(telegram_id=7, display_name="Ann")
+    # Pairs share a timestamp, so the id has to break ties
+    db.add_all([
+        models.Message(
+            user_id=1, contact=contact, telegram_message_id=i, chat_id=7, sender_id=7, message_text=str(i),
+            timestamp=start + timedelta(minutes=i // 2), is_responded=i % 3 == 0
+        )
+        for i in range(count)
+    ])
+    db.commit()
+
+def _user_page(db, cursor, **filters):
+    page, _ = list_user_messages(db, user_id=1, cursor=cursor, **filters)
+    return page
+
+def _walk(fetch):
+    seen, cursor = [], None
+    while True:
+        page = fetch(cursor)
+        seen.extend(page.items)
+        if page.next_cursor is None:
+            return seen
+        cursor = page.next_cursor
+
+def test_keyset_pages_match_offset_order(db):
+    _add_messages(db, 11)
+
+    keyset = _walk(lambda cursor: _user_page(db, cursor, limit=3))
+    offset = message_service.get_messages(db, limit=100)
+
+    assert [m.id for m in keyset] == [m.id for m in offset]
+    assert len(keyset) == 11
+    assert all(
+        (a.timestamp, a.id) > (b.timestamp, b.id) for a, b in zip(keyset, keyset[1:])
+    )
+
+def test_keyset_pages_apply_filters(db):
+    _add_messages(db, 10)
+
+    responded = _walk(lambda cursor: _user_page(db, cursor, limit=2, is_responded=True))
+    contact = db.query(models.Contact).one()
+    by_contact = _walk(lambda cursor: contact_service.get_contact_messages_page(db, contact.id, cursor=cursor, limit=4))
+
+    assert sorted(m.telegram_message_id for m in responded) == [0, 3, 6, 9]
+    assert len(by_contact) == 10
+
+def test_contacts_page_in_id_order(db):
+    db.add_all([models.Contact(user_id=1, telegram_id=100 + i) for i in range(5)])
+    # Another user's contact for the same peer, and one of the bot's
+    db.add_all([models.Contact(user_id=2, telegram_id=100), models.Contact(telegram_id=101)])
+    db.commit()
+
+    contacts = _walk(lambda cursor: contact_service.get_contacts_page(db, 1, cursor=cursor, limit=2))
+
+    assert [c.telegram_id for c in contacts] == [100, 101, 102, 103, 104]
+    assert {c.user_id for c in contacts} == {1}
+
+def test_contact_lookups_are_scoped_to_the_owner(db):
+    db.add_all([models.Contact(id=1, user_id=1, telegram_id=100), models.Contact(id=2, user_id=2, telegram_id=100)])
+    db.commit()
+
+    assert contact_service.get_contact_by_id(db, 1, 1).id == 1
+    assert contact_service.get_contact_by_id(db, 1, 2) is None
+    assert contact_service.get_contact_by_telegram_id(db, 2, 100).id == 2
+    assert [c.id for c in contact_service.get_contacts(db, 2)] == [2]
+
+def test_new_rows_do_not_shift_later_pages(db):
+    _add_messages(db, 6)
+    first = _user_page(db, None, limit=3)
+
+    db.add(models.Message(user_id=1, telegram_message_id=99, chat_id=7, sender_id=7, timestamp=datetime(2027, 1, 1)))
+    db.commit()
+    second = _user_page(db, first.next_cursor, limit=3)
+
+    assert {m.id for m in first.items}.isdisjoint(m.id for m in second.items)
+    assert len(first.items) + len(second.items) == 6
+
+@pytest.mark.parametrize("cursor", ["not-base64!", encode_cursor([1]), encode_cursor(["x", 1])])
+def test_invalid_cursor_rejected(db, cursor):
+    with pytest.raises(InvalidCursor):
+        list_user_messages(db, user_id=1, cursor=cursor)
+
+def test_cursor_pages_keep_the_first_pages_total(db):
+    _add_messages(db, 7)
+    db.add(models.Message(user_id=2, telegram_message_id=50, chat_id=8, sender_id=8, timestamp=datetime(2026, 1, 1)))
+    db.commit()
+
+    first, total = list_user_messages(db, user_id=1, limit=3)
+    message_listing.count_cache.invalidate(1)
+    second, second_total = list_user_messages(db, user_id=1, cursor=first.next_cursor, limit=3)
+
+    # Counted over the whole listing, not from the cursor on; other users' messages never appear
+    assert total == second_total == 7
+    assert all(m.user_id == 1 for m in first.items + second.items)
@@ -0,0 +1,89 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.exc import InvalidRequestError
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.db import models
+from app.db.database import Base
+from app.schemas.contact import ContactWithMessages
+from app.schemas.message import Message as MessageSchema, MessageContact
+from app.services import contact_service, message_listing
+from app.services.message_listing import CountCache, list_user_messages
+from query_count import assert_num_queries
+
+PAGE = 100
+
+@pytest.fixture
+def listing_engine(monkeypatch):
+    monkeypatch.setattr(message_listing, "count_cache", CountCache(ttl=0))
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    contacts = [models.Contact(telegram_id=100 + i, display_name=f"C{i}") for i in range(10)]
+    db.add_all(contacts)
+    db.add_all([
+        models.Message(
+            user_id=1, contact=contacts[i % 10], telegram_message_id=i, chat_id=100 + i % 10, sender_id=100 + i % 10,
+            message_text=str(i), timestamp=datetime(2026, 1, 1) + timedelta(minutes=i)
+        )
+        for i in range(PAGE)
+    ])
+    db.commit()
+    db.close()
+    return engine
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    contact = models.Contact(user_id=1, telegram_id=7, display_name="Ann")
+    db.add_all([
+        models.Message(
+            contact=contact, telegram_message_id=i, chat_id=7, sender_id=7, timestamp=datetime(2026, 1, 1) + timedelta(minutes=i)
+        )
+        for i in range(PAGE)
+    ])
+    db.commit()
+    db.close()
+    return engine
+
+def test_listing_with_contacts_is_two_queries(listing_engine):
+    db = sessionmaker(bind=listing_engine)()
+
+    with assert_num_queries(listing_engine, 2):
+        page, total = list_user_messages(db, user_id=1, limit=PAGE, with_contact=True)
+        payload = [MessageContact.from_orm(m.contact) for m in page.items]
+
+    assert total == PAGE
+    assert {contact.display_name for contact in payload} == {f"C{i}" for i in range(10)}
+
+def test_listing_without_contacts_refuses_to_lazy_load(listing_engine):
+    db = sessionmaker(bind=listing_engine)()
+
+    with assert_num_queries(listing_engine, 1):
+        page, _ = list_user_messages(db, user_id=1, limit=PAGE)
+
+    with pytest.raises(InvalidRequestError):
+        page.items[0].contact
+
+def test_contact_with_messages_is_two_queries(engine):
+    db = sessionmaker(bind=engine)()
+
+    with assert_num_queries(engine, 2):
+        contact = contact_service.get_contact_by_id(db, 1, 1)
+        messages = contact_service.get_contact_messages(db, contact_id=1, limit=10)
+        set_committed_value(contact, "messages", messages)
+        result = ContactWithMessages.from_orm(contact)
+
+    assert len(result.messages) == 10
+    assert isinstance(result.messages[0], MessageSchema)
+
+def test_contact_messages_of_unknown_contact(engine):
+    db = sessionmaker(bind=engine)()
+
+    with assert_num_queries(engine, 1):
+        assert contact_service.get_contact_messages(db, contact_id=99) == []
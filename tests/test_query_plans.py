@@ -0,0 +1,70 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import sessionmaker
+
+from app.db import models
+from app.db.database import Base
+from app.services import contact_service, message_listing, message_service
+from app.services.message_listing import CountCache, list_user_messages
+
+@pytest.fixture
+def engine(monkeypatch):
+    monkeypatch.setattr(message_listing, "count_cache", CountCache(ttl=0))
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+
+    db = sessionmaker(bind=engine)()
+    contacts = [models.Contact(telegram_id=7 + i) for i in range(5)]
+    now = datetime.utcnow()
+    db.add_all([
+        models.Message(
+            contact=contacts[i % 5], telegram_message_id=i, chat_id=7, sender_id=7 + i % 5,
+            timestamp=now - timedelta(hours=i), is_responded=i % 2 == 0
+        )
+        for i in range(200)
+    ])
+    db.commit()
+    db.execute(text("UPDATE messages SET user_id = id % 3"))
+    db.execute(text("ANALYZE"))
+    db.commit()
+    db.close()
+    return engine
+
+def _plans(engine, call):
+    """Run ``call(db)`` and return the query plan of each SELECT it issued."""
+    statements = []
+    listener = lambda conn, cursor, statement, parameters, context, many: statements.append((statement, parameters))
+    db = sessionmaker(bind=engine)()
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        call(db)
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+    plans = []
+    with engine.connect() as connection:
+        for statement, parameters in statements:
+            if statement.lstrip().upper().startswith("SELECT"):
+                rows = connection.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).all()
+                plans.append("\n".join(row[-1] for row in rows))
+    return plans
+
+@pytest.mark.parametrize("call, indexes", [
+    (lambda db: message_service.get_unresponded_messages(db), ["ix_messages_unresponded_timestamp_id"]),
+    (lambda db: message_service.get_messages(db, is_responded=False), ["ix_messages_unresponded_timestamp_id"]),
+    (lambda db: contact_service.get_contact_messages(db, contact_id=1), ["ix_messages_contact_id_timestamp_id"]),
+    # The windowed total reads every row of the user, so either index leading with user_id serves it
+    (lambda db: list_user_messages(db, user_id=1), [
+        "ix_messages_user_id_timestamp_id", "ix_messages_user_id_contact_id_timestamp_id"
+    ]),
+    (lambda db: list_user_messages(db, user_id=1, is_responded=False), ["ix_messages_user_id_unresponded_timestamp_id"]),
+    (lambda db: list_user_messages(db, user_id=1, contact_id=1), ["ix_messages_user_id_contact_id_timestamp_id"]),
+])
+def test_hot_queries_use_their_index(engine, call, indexes):
+    plan, = _plans(engine, call)
+
+    assert any(index in plan for index in indexes), plan
+    # Every access to messages goes through an index
+    assert all("USING" in line for line in plan.splitlines() if "messages" in line), plan
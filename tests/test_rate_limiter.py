@@ -0,0 +1,29 @@
+import asyncio
+import time
+
+import pytest
+
+from app.services.rate_limiter import TokenBucket
+
+
+def test_burst_up_to_capacity_then_throttles():
+    bucket = TokenBucket(rate=20, capacity=2)
+
+    async def take(n):
+        for _ in range(n):
+            await bucket.acquire()
+
+    start = time.monotonic()
+    asyncio.run(take(2))
+    assert time.monotonic() - start < 0.05
+
+    start = time.monotonic()
+    asyncio.run(take(1))
+    # Bucket was empty, so one token takes ~1/rate seconds to refill
+    assert time.monotonic() - start >= 0.04
+
+def test_rejects_requests_larger_than_capacity():
+    bucket = TokenBucket(rate=1, capacity=1)
+
+    with pytest.raises(ValueError):
+        asyncio.run(bucket.acquire(2))
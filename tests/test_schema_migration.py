@@ -0,0 +1,224 @@
+import importlib.util
+import os
+
+import pytest
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.exc import IntegrityError
+
+VERSIONS = os.path.join(os.path.dirname(__file__), "..", "backend", "alembic", "versions")
+MIGRATION = os.path.join(VERSIONS, "d9b3e7a1c5f4_unify_message_contact_schema.py")
+
+# The tables as the previous revision left them, trimmed to the columns the migration reads
+PREVIOUS_SCHEMA = [
+    "CREATE TABLE users (id INTEGER PRIMARY KEY, email VARCHAR)",
+    "CREATE TABLE contacts (id INTEGER PRIMARY KEY, telegram_id BIGINT UNIQUE)",
+    "CREATE TABLE backfill_checkpoints (id INTEGER PRIMARY KEY, user_id INTEGER, dialog_id BIGINT)",
+    "CREATE TABLE messages (id INTEGER PRIMARY KEY, chat_id BIGINT, sender_id BIGINT, "
+    "is_responded BOOLEAN, category VARCHAR, timestamp DATETIME, ai_category VARCHAR, ai_confidence FLOAT, "
+    "ai_reasoning TEXT, ai_categorized_at DATETIME, ai_tier VARCHAR(16))",
+]
+
+def _load_migration(path=MIGRATION):
+    spec = importlib.util.spec_from_file_location(os.path.basename(path)[:-3], path)
+    migration = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migration)
+    return migration
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://")
+    with engine.begin() as connection:
+        for statement in PREVIOUS_SCHEMA:
+            connection.execute(text(statement))
+        connection.execute(text("INSERT INTO users (id, email) VALUES (1, 'a@example.com'), (2, 'b@example.com')"))
+        connection.execute(text("INSERT INTO contacts (id, telegram_id) VALUES (1, 100), (2, 200), (3, 300)"))
+        connection.execute(text("INSERT INTO backfill_checkpoints (user_id, dialog_id) VALUES (1, 10), (2, 20)"))
+        connection.execute(text(
+            "INSERT INTO messages (id, chat_id, sender_id, is_responded) VALUES "
+            "(1, 10, 100, 0), (2, 10, 100, 1), (3, 20, 200, 0), (4, 30, 999, 0), (5, 10, 100, 0), (6, 20, 200, 1), (7, 20, 200, 0)"
+        ))
+    return engine
+
+def _run(engine, migration, step="upgrade"):
+    with engine.connect() as connection:
+        context = MigrationContext.configure(connection, opts={"transaction_per_migration": True})
+        # The per-revision transaction env.py's run_migrations opens
+        with Operations.context(context), context.begin_transaction(_per_migration=True):
+            getattr(migration, step)()
+
+def _upgrade(engine, monkeypatch):
+    migration = _load_migration()
+    # Several batches per table
+    monkeypatch.setattr(migration, "BATCH_SIZE", 2)
+    _run(engine, migration)
+
+def test_upgrade_adds_owner_columns_and_indexes(engine, monkeypatch):
+    _upgrade(engine, monkeypatch)
+
+    inspector = inspect(engine)
+    columns = {column["name"] for column in inspector.get_columns("messages")}
+    assert {"user_id", "contact_id", "response_text", "created_at"} <= columns
+    assert "user_id" in {column["name"] for column in inspector.get_columns("contacts")}
+    indexes = {index["name"] for index in inspector.get_indexes("messages")}
+    assert {"ix_messages_contact_id_timestamp_id", "ix_messages_user_id_contact_id_timestamp_id"} <= indexes
+
+def test_upgrade_backfills_in_batches(engine, monkeypatch):
+    _upgrade(engine, monkeypatch)
+
+    with engine.connect() as connection:
+        messages = connection.execute(text("SELECT id, contact_id, user_id FROM messages ORDER BY id")).all()
+        contacts = connection.execute(text("SELECT id, user_id FROM contacts ORDER BY id")).all()
+
+    assert messages == [(1, 1, 1), (2, 1, 1), (3, 2, 2), (4, None, None), (5, 1, 1), (6, 2, 2), (7, 2, 2)]
+    # Contact 3 never sent a message
+    assert contacts == [(1, 1), (2, 2), (3, None)]
+
+def test_upgrade_is_resumable(engine, monkeypatch):
+    with engine.begin() as connection:
+        connection.execute(text("ALTER TABLE messages ADD COLUMN user_id INTEGER"))
+        connection.execute(text("UPDATE messages SET user_id = 2 WHERE id = 1"))
+
+    _upgrade(engine, monkeypatch)
+
+    with engine.connect() as connection:
+        # Rows a previous run (or the application) already filled are left alone
+        assert connection.execute(text("SELECT user_id FROM messages WHERE id = 1")).scalar() == 2
+
+def test_upgrade_leaves_shared_dialogs_unowned(engine, monkeypatch):
+    with engine.begin() as connection:
+        # Both users backfilled the dialog with contact 1
+        connection.execute(text("INSERT INTO backfill_checkpoints (user_id, dialog_id) VALUES (2, 10)"))
+
+    _upgrade(engine, monkeypatch)
+
+    with engine.connect() as connection:
+        messages = connection.execute(text("SELECT id, user_id FROM messages ORDER BY id")).all()
+        contacts = connection.execute(text("SELECT id, user_id FROM contacts ORDER BY id")).all()
+
+    assert messages == [(1, None), (2, None), (3, 2), (4, None), (5, None), (6, 2), (7, 2)]
+    assert contacts == [(1, None), (2, 2), (3, None)]
+
+def test_downgrade_drops_only_the_columns_it_added(engine, monkeypatch):
+    with engine.begin() as connection:
+        # As databases created from app.models have it
+        connection.execute(text("ALTER TABLE messages ADD COLUMN user_id INTEGER"))
+
+    _upgrade(engine, monkeypatch)
+    _run(engine, _load_migration(), "downgrade")
+
+    inspector = inspect(engine)
+    columns = {column["name"] for column in inspector.get_columns("messages")}
+    assert "user_id" in columns
+    assert not {"contact_id", "response_text", "created_at"} & columns
+    assert "ai_category" in columns
+    assert "user_id" not in {column["name"] for column in inspector.get_columns("contacts")}
+    assert not inspector.has_table("unify_schema_added_columns")
+
+OWNED_MESSAGES = [
+    "CREATE TABLE messages (id INTEGER PRIMARY KEY, user_id INTEGER, chat_id BIGINT, telegram_message_id BIGINT, "
+    "is_responded BOOLEAN, timestamp DATETIME)",
+    "CREATE INDEX ix_messages_user_id_unresponded_timestamp_id ON messages (user_id, timestamp, id) WHERE is_responded = 0",
+    # Two accounts talking to the same peer, one message stored twice, and the bot's copy
+    "INSERT INTO messages (id, user_id, chat_id, telegram_message_id) VALUES "
+    "(1, 1, 500, 7), (2, 2, 500, 7), (3, 1, 500, 7), (4, NULL, 500, 7), (5, NULL, 500, 7)",
+]
+
+def _owned_messages_engine():
+    engine = create_engine("sqlite://")
+    with engine.begin() as connection:
+        for statement in OWNED_MESSAGES:
+            connection.execute(text(statement))
+    return engine
+
+def test_chat_dedup_keeps_each_owners_copy():
+    engine = _owned_messages_engine()
+
+    _run(engine, _load_migration(os.path.join(VERSIONS, "d5a7e3b9f2c8_add_message_chat_unique_constraint.py")))
+
+    with engine.connect() as connection:
+        assert connection.execute(text("SELECT id FROM messages ORDER BY id")).scalars().all() == [1, 2, 4]
+    constraints = {constraint["name"] for constraint in inspect(engine).get_unique_constraints("messages")}
+    assert constraints == {"uq_messages_user_id_chat_id_telegram_message_id"}
+
+def test_chat_unique_constraint_is_scoped_to_the_owner():
+    engine = create_engine("sqlite://")
+    with engine.begin() as connection:
+        # As d5a7e3b9f2c8 left databases created without owners
+        connection.execute(text(OWNED_MESSAGES[0][:-1] + (
+            ", CONSTRAINT uq_messages_chat_id_telegram_message_id UNIQUE (chat_id, telegram_message_id))"
+        )))
+        connection.execute(text(OWNED_MESSAGES[1]))
+        connection.execute(text("INSERT INTO messages (id, user_id, chat_id, telegram_message_id) VALUES (1, 1, 500, 7)"))
+
+    _run(engine, _load_migration(os.path.join(VERSIONS, "f5b2d8a4c7e3_scope_message_dedup_to_owner.py")))
+
+    with engine.begin() as connection:
+        # Another owner's copy of the same message
+        connection.execute(text("INSERT INTO messages (id, user_id, chat_id, telegram_message_id) VALUES (2, 2, 500, 7)"))
+        connection.execute(text("INSERT INTO messages (id, user_id, chat_id, telegram_message_id) VALUES (3, NULL, 500, 7)"))
+        for duplicate in ("(4, 1, 500, 7)", "(4, NULL, 500, 7)"):
+            with pytest.raises(IntegrityError), connection.begin_nested():
+                connection.execute(text(f"INSERT INTO messages (id, user_id, chat_id, telegram_message_id) VALUES {duplicate}"))
+    indexes = {index["name"]: index for index in inspect(engine).get_indexes("messages")}
+    # The partial index survives the table rebuild
+    assert indexes["ix_messages_user_id_unresponded_timestamp_id"]["dialect_options"]["sqlite_where"] is not None
+
+@pytest.mark.parametrize("contacts", [
+    # As app.db.models and app.models created the table
+    "CREATE TABLE contacts (id INTEGER PRIMARY KEY, user_id INTEGER, telegram_id BIGINT UNIQUE)",
+    "CREATE TABLE contacts (id INTEGER PRIMARY KEY, user_id INTEGER, telegram_id BIGINT); "
+    "CREATE UNIQUE INDEX ix_contacts_telegram_id ON contacts (telegram_id)",
+])
+def test_contacts_are_unique_per_owner(contacts):
+    engine = create_engine("sqlite://")
+    with engine.begin() as connection:
+        for statement in contacts.split("; "):
+            connection.execute(text(statement))
+        connection.execute(text("INSERT INTO contacts (id, user_id, telegram_id) VALUES (1, 1, 100)"))
+
+    _run(engine, _load_migration(os.path.join(VERSIONS, "a8d4f1c6e2b9_scope_contacts_to_owner.py")))
+
+    with engine.begin() as connection:
+        # Another user's contact for the same peer, and the bot's
+        connection.execute(text("INSERT INTO contacts (id, user_id, telegram_id) VALUES (2, 2, 100), (3, NULL, 100)"))
+        for duplicate in ("(4, 1, 100)", "(4, NULL, 100)"):
+            with pytest.raises(IntegrityError), connection.begin_nested():
+                connection.execute(text(f"INSERT INTO contacts (id, user_id, telegram_id) VALUES {duplicate}"))
+
+def _search(connection, term):
+    return connection.execute(
+        text("SELECT rowid FROM message_fts WHERE message_fts MATCH :term ORDER BY rowid"), {"term": term}
+    ).scalars().all()
+
+@pytest.mark.parametrize("step", ["upgrade", "downgrade"])
+def test_rebuilding_messages_keeps_search_triggers(step):
+    engine = create_engine("sqlite://")
+    with engine.begin() as connection:
+        connection.execute(text(
+            "CREATE TABLE messages (id INTEGER PRIMARY KEY, user_id INTEGER, chat_id BIGINT, "
+            "telegram_message_id BIGINT, message_text TEXT, "
+            "CONSTRAINT uq_messages_chat_id_telegram_message_id UNIQUE (chat_id, telegram_message_id))"
+        ))
+        connection.execute(text(
+            "INSERT INTO messages (id, user_id, chat_id, telegram_message_id, message_text) VALUES (1, 1, 500, 7, 'hello')"
+        ))
+    _run(engine, _load_migration(os.path.join(VERSIONS, "a4d9e2f7c1b8_add_message_search.py")))
+    migration = _load_migration(os.path.join(VERSIONS, "f5b2d8a4c7e3_scope_message_dedup_to_owner.py"))
+    _run(engine, migration)
+    if step == "downgrade":
+        _run(engine, migration, "downgrade")
+
+    with engine.begin() as connection:
+        triggers = connection.execute(
+            text("SELECT name FROM sqlite_master WHERE type = 'trigger' ORDER BY name")
+        ).scalars().all()
+        connection.execute(text(
+            "INSERT INTO messages (id, user_id, chat_id, telegram_message_id, message_text) VALUES (2, 2, 500, 8, 'hello again')"
+        ))
+        connection.execute(text("UPDATE messages SET message_text = 'goodbye' WHERE id = 1"))
+
+        assert triggers == ["messages_ad", "messages_ai", "messages_au"]
+        assert _search(connection, "hello") == [2]
+        assert _search(connection, "goodbye") == [1]
@@ -0,0 +1,101 @@
+import base64
+import sys
+
+from cryptography.fernet import Fernet
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from app.db import database, models
+from app.db.database import Base
+from app.security_utils import DecryptedSessionCache, SessionEncryptor
+from app.services import session_rotation
+from app.services.session_rotation import reencrypt_sessions
+
+# A Telethon string session as the auth flow stores it
+PLAINTEXT_SESSION = "1" + base64.urlsafe_b64encode(bytes(range(200)) + bytes(63)).decode()
+
+
+def test_decrypt_is_cached(monkeypatch):
+    encryptor = SessionEncryptor(key=Fernet.generate_key())
+    token = encryptor.encrypt_session("session-1")
+    calls = []
+    decrypt = encryptor.cipher.decrypt
+    monkeypatch.setattr(encryptor.cipher, "decrypt", lambda data: calls.append(1) or decrypt(data))
+
+    assert encryptor.decrypt_session(token) == "session-1"
+    assert encryptor.decrypt_session(token) == "session-1"
+    assert len(calls) == 1
+
+def test_evicted_plaintext_is_zeroed():
+    cache = DecryptedSessionCache(max_entries=1)
+    cache.set("a", "secret")
+    (_, plaintext), = cache._entries.values()
+
+    cache.set("b", "other")
+
+    assert cache.get("a") is None
+    assert plaintext == bytearray(6)
+
+def test_expired_entries_are_not_served():
+    cache = DecryptedSessionCache(ttl=-1)
+    cache.set("a", "secret")
+    assert cache.get("a") is None
+
+def test_old_keys_decrypt_and_rotate():
+    old_key, new_key = Fernet.generate_key(), Fernet.generate_key()
+    token = SessionEncryptor(key=old_key).encrypt_session("session-1")
+    encryptor = SessionEncryptor(key=new_key, old_keys=[old_key])
+
+    assert encryptor.decrypt_session(token) == "session-1"
+    rotated = encryptor.rotate_session(token)
+    assert encryptor.rotate_session(rotated) is None
+    assert SessionEncryptor(key=new_key).decrypt_session(rotated) == "session-1"
+
+def test_reencrypt_sessions_in_batches():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    old_key, new_key, lost_key = Fernet.generate_key(), Fernet.generate_key(), Fernet.generate_key()
+    old, new = SessionEncryptor(key=old_key), SessionEncryptor(key=new_key)
+    db.add_all([models.User(email=f"u{i}@x", hashed_password="x", telegram_session=old.encrypt_session(f"s{i}")) for i in range(5)])
+    db.add(models.User(email="current@x", hashed_password="x", telegram_session=new.encrypt_session("current")))
+    db.add(models.User(email="lost@x", hashed_password="x", telegram_session=SessionEncryptor(key=lost_key).encrypt_session("lost")))
+    db.add(models.User(email="none@x", hashed_password="x"))
+    db.add(models.User(email="plain@x", hashed_password="x", telegram_session=PLAINTEXT_SESSION))
+    db.commit()
+
+    stats = reencrypt_sessions(db, SessionEncryptor(key=new_key, old_keys=[old_key]), batch_size=2)
+
+    assert stats == {"checked": 8, "rotated": 5, "plaintext": 1, "failed": 1}
+    assert db.scalars(select(models.User.telegram_session).where(models.User.email == "plain@x")).one() == PLAINTEXT_SESSION
+    sessions = db.scalars(
+        select(models.User.telegram_session).where(models.User.email.notin_(["lost@x", "plain@x"]))
+    ).all()
+    assert sorted(filter(None, map(new.decrypt_session, sessions))) == ["current", "s0", "s1", "s2", "s3", "s4"]
+
+def test_is_encrypted_tells_ciphertexts_from_plaintext_sessions():
+    encryptor = SessionEncryptor(key=Fernet.generate_key())
+
+    assert SessionEncryptor.is_encrypted(encryptor.encrypt_session("session-1"))
+    assert not SessionEncryptor.is_encrypted(PLAINTEXT_SESSION)
+    assert not SessionEncryptor.is_encrypted(base64.urlsafe_b64encode(b"not a token").decode())
+
+def test_rotation_job_runs_from_the_command_line(monkeypatch, capsys):
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine)
+    old_key, new_key = Fernet.generate_key(), Fernet.generate_key()
+    db = factory()
+    db.add(models.User(email="a@x", hashed_password="x", telegram_session=SessionEncryptor(key=old_key).encrypt_session("s")))
+    db.add(models.User(email="plain@x", hashed_password="x", telegram_session=PLAINTEXT_SESSION))
+    db.commit()
+
+    monkeypatch.setattr(database, "SessionLocal", factory)
+    monkeypatch.setattr(session_rotation.settings, "SESSION_ENCRYPTION_KEY", new_key)
+    monkeypatch.setattr(session_rotation.settings, "SESSION_ENCRYPTION_OLD_KEYS", old_key.decode())
+    monkeypatch.setattr(sys, "argv", ["session_rotation", "--batch-size", "1"])
+    session_rotation._main()
+
+    assert capsys.readouterr().out.strip() == "Re-encrypted 1 of 2 sessions (0 failed, 1 not encrypted)"
+    stored = db.scalars(select(models.User.telegram_session).where(models.User.email == "a@x")).one()
+    assert SessionEncryptor(key=new_key).decrypt_session(stored) == "s"
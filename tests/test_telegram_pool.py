@@ -0,0 +1,74 @@
+import asyncio
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from app.services.telegram_pool import TelegramClientPool
+
+
+def _fake_client():
+    client = MagicMock()
+    client.connected = False
+    client.is_connected.side_effect = lambda: client.connected
+
+    async def connect():
+        client.connected = True
+
+    client.connect = AsyncMock(side_effect=connect)
+    client.disconnect = AsyncMock()
+    return client
+
+
+@pytest.fixture
+def pool():
+    clients = {}
+
+    def factory(session_string):
+        clients[session_string] = _fake_client()
+        return clients[session_string]
+
+    pool = TelegramClientPool(max_connections=2, idle_timeout=0, ping_interval=60, client_factory=factory)
+    pool.created = clients
+    return pool
+
+def test_reuses_warm_connection(pool):
+    async def run():
+        async with pool.client("session-a") as first:
+            pass
+        async with pool.client("session-a") as second:
+            pass
+        return first, second
+
+    first, second = asyncio.run(run())
+
+    # Same client, connected exactly once
+    assert first is second
+    first.connect.assert_awaited_once()
+    assert len(pool) == 1
+
+def test_evicts_least_recently_used_at_capacity(pool):
+    async def run():
+        async with pool.client("session-a"):
+            pass
+        async with pool.client("session-b"):
+            pass
+        async with pool.client("session-c"):
+            # Disconnected before the new client is handed out, not in the background
+            pool.created["session-a"].disconnect.assert_awaited_once()
+
+    asyncio.run(run())
+
+    assert len(pool) == 2
+    assert pool.created["session-a"].disconnect.await_count == 1
+
+def test_reap_disconnects_idle_clients(pool):
+    async def run():
+        async with pool.client("session-a") as client:
+            pass
+        await pool.reap()
+        return client
+
+    client = asyncio.run(run())
+
+    assert len(pool) == 0
+    client.disconnect.assert_awaited_once()
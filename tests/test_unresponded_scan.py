@@ -0,0 +1,71 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from telegram_client import TelegramIntegration
+
+NOW = datetime.now(timezone.utc)
+
+
+def _message(message_id, out=False, age_hours=1):
+    return SimpleNamespace(id=message_id, out=out, sender_id=7, message=f"m{message_id}",
+                           date=NOW - timedelta(hours=age_hours))
+
+
+class FakeClient:
+    """Serves one private dialog whose history is a list of messages, oldest first."""
+
+    def __init__(self, history):
+        self.session = None
+        self.history = history
+        self.fetched = []
+
+    async def iter_dialogs(self):
+        top = self.history[-1]
+        yield SimpleNamespace(id=1, name="Ann", is_user=True, pinned=False, entity=SimpleNamespace(bot=False),
+                              message=top, date=top.date)
+
+    async def iter_messages(self, entity, min_id=0):
+        for message in reversed(self.history):
+            if message.id <= min_id:
+                break
+            self.fetched.append(message.id)
+            yield message
+
+
+def _scan(integration):
+    async def collect():
+        return [message["message_id"] async for message in integration.get_unresponded_messages(days_back=7)]
+    return asyncio.run(collect())
+
+
+def test_messages_after_our_last_reply_are_unresponded():
+    client = FakeClient([_message(1), _message(2, out=True), _message(3), _message(4)])
+    integration = TelegramIntegration(1, "hash", client=client)
+
+    assert _scan(integration) == [3, 4]
+
+def test_repeat_scan_fetches_only_new_messages():
+    client = FakeClient([_message(1, out=True), _message(2)])
+    state = {}
+    assert _scan(TelegramIntegration(1, "hash", client=client, scan_state=state)) == [2]
+
+    # Nothing new: no history request at all
+    client.fetched.clear()
+    assert _scan(TelegramIntegration(1, "hash", client=client, scan_state=state)) == [2]
+    assert client.fetched == []
+
+    client.history.append(_message(3))
+    assert _scan(TelegramIntegration(1, "hash", client=client, scan_state=state)) == [2, 3]
+    assert client.fetched == [3]
+
+    # Our reply clears everything before it without fetching history
+    client.history.append(_message(4, out=True))
+    client.fetched.clear()
+    assert _scan(TelegramIntegration(1, "hash", client=client, scan_state=state)) == []
+    assert client.fetched == []
+
+def test_messages_older_than_cutoff_are_ignored():
+    client = FakeClient([_message(1, age_hours=24 * 30), _message(2)])
+
+    assert _scan(TelegramIntegration(1, "hash", client=client)) == [2]